@@ -0,0 +1,180 @@
+"""
+Offline pattern analysis of recorded transcripts, in parallel.
+
+Runs the PatternAnalyzer metrics over a corpus of any size: each worker
+process streams its share of the transcript files through a generator
+pipeline (records -> responses -> batches -> metrics) and returns per-player
+counts, sums and sums of squares, which are merged as workers finish. No
+process ever holds more than one batch of responses. The report is the
+`generate_summary` text per player and for all players together:
+
+    python -m analysis.corpus transcripts/ --workers 8
+    python -m analysis.corpus transcripts/ --phase voting --event vote --json patterns.json
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from analysis.corpus_store import RESPONSE_EVENTS, response_text
+from analysis.pattern_mining import METRIC_NAMES, patterns_from_moments, response_metrics_batch, summarize_patterns
+from utils.transcript import read_transcripts, transcript_files
+
+ALL_PLAYERS = "All players"
+
+
+class Moments:
+    """
+    Per-player count, sum and sum of squares of every metric. Partial
+    moments from different shards merge by addition.
+    """
+
+    def __init__(self):
+        self.players: Dict[str, np.ndarray] = {}
+
+    def add(self, players: Sequence[str], metrics: np.ndarray):
+        """Fold in a batch of metric rows (`METRIC_NAMES` order), one per player entry."""
+        codes = {}
+        groups = np.array([codes.setdefault(p, len(codes)) for p in players], dtype=np.int64)
+        present = ~np.isnan(metrics)
+        values = np.where(present, metrics, 0.0)
+        blocks = np.zeros((len(codes), 3, len(METRIC_NAMES)))
+        for i in range(len(METRIC_NAMES)):
+            blocks[:, 0, i] = np.bincount(groups, weights=present[:, i], minlength=len(codes))
+            blocks[:, 1, i] = np.bincount(groups, weights=values[:, i], minlength=len(codes))
+            blocks[:, 2, i] = np.bincount(groups, weights=values[:, i] ** 2, minlength=len(codes))
+        for player, code in codes.items():
+            if player in self.players:
+                self.players[player] += blocks[code]
+            else:
+                self.players[player] = blocks[code]
+
+    def merge(self, other: "Moments"):
+        for player, block in other.players.items():
+            if player in self.players:
+                self.players[player] += block
+            else:
+                self.players[player] = block.copy()
+
+    @property
+    def responses(self) -> int:
+        """Number of responses folded in (every response has a length)."""
+        return int(sum(block[0, 0] for block in self.players.values()))
+
+    def extract_frequent_patterns(self, players: Optional[Iterable[str]] = None) -> Dict[str, Dict]:
+        """Same structure as `PatternAnalyzer.extract_frequent_patterns`."""
+        names = sorted(self.players) if players is None else [p for p in players if p in self.players]
+        if not names:
+            return {}
+        blocks = np.stack([self.players[name] for name in names])
+        return patterns_from_moments(names, blocks[:, 0], blocks[:, 1], blocks[:, 2])
+
+    def aggregate(self) -> Dict[str, Dict]:
+        """The patterns of every response together, under ALL_PLAYERS."""
+        if not self.players:
+            return {}
+        block = sum(self.players.values())
+        return patterns_from_moments([ALL_PLAYERS], block[None, 0], block[None, 1], block[None, 2])
+
+
+def _responses(paths: List[str], phases: Optional[Sequence[str]],
+               events: Optional[Sequence[str]]) -> Iterator[Tuple[str, str]]:
+    """(player, text) of every response event in `paths` that passes the filters."""
+    for record in read_transcripts(paths):
+        event = record["event"]
+        if event not in RESPONSE_EVENTS:
+            continue
+        if events and event not in events:
+            continue
+        if phases and record.get("phase") not in phases:
+            continue
+        yield record.get("player") or record.get("voter") or "", response_text(record)
+
+
+def _batches(items: Iterable, size: int) -> Iterator[list]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def analyze_shard(paths: List[str], phases: Optional[Sequence[str]] = None, events: Optional[Sequence[str]] = None,
+                  batch_size: int = 50_000) -> Moments:
+    """Partial moments of one shard of transcript files."""
+    moments = Moments()
+    for batch in _batches(_responses(paths, phases, events), batch_size):
+        players, texts = zip(*batch)
+        moments.add(players, response_metrics_batch(list(texts)))
+    return moments
+
+
+def analyze_corpus(sources: Iterable[str], workers: int = os.cpu_count() or 1,
+                   phases: Optional[Sequence[str]] = None, events: Optional[Sequence[str]] = None,
+                   files_per_task: int = 1, batch_size: int = 50_000) -> Moments:
+    """
+    Moments of every response in the transcripts under `sources`, with the
+    files sharded over `workers` processes.
+    """
+    files = transcript_files(sources)
+    shards = [files[i:i + files_per_task] for i in range(0, len(files), files_per_task)]
+    total = Moments()
+    if workers <= 1 or len(shards) <= 1:
+        for shard in shards:
+            total.merge(analyze_shard(shard, phases, events, batch_size))
+        return total
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(shards))) as pool:
+        futures = [pool.submit(analyze_shard, shard, phases, events, batch_size) for shard in shards]
+        for future in as_completed(futures):
+            total.merge(future.result())
+    return total
+
+
+def _jsonable(patterns: Dict[str, Dict]) -> Dict[str, Dict]:
+    return {
+        player: {
+            'metrics': {k: None if np.isnan(v) else float(v) for k, v in data['metrics'].items()},
+            'patterns': data['patterns'],
+        }
+        for player, data in patterns.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the pattern analysis over recorded transcripts.")
+    parser.add_argument("sources", nargs="+", help="transcript files or directories")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--phase", action="append", dest="phases", help="only responses from this phase")
+    parser.add_argument("--event", action="append", dest="events", choices=RESPONSE_EVENTS,
+                        help="only this kind of response")
+    parser.add_argument("--files-per-task", type=int, default=1, help="transcript files per worker task")
+    parser.add_argument("--batch-size", type=int, default=50_000, help="responses measured at a time")
+    parser.add_argument("--json", default=None, help="also write the patterns as JSON to this file")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    moments = analyze_corpus(args.sources, args.workers, args.phases, args.events,
+                             args.files_per_task, args.batch_size)
+    elapsed = time.perf_counter() - start
+
+    players = moments.extract_frequent_patterns()
+    aggregate = moments.aggregate()
+    print(summarize_patterns(aggregate) + summarize_patterns(players).split("\n\n", 1)[1], end="")
+    print(f"{moments.responses} responses from {len(players)} players analyzed in {elapsed:.1f}s")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"aggregate": _jsonable(aggregate), "players": _jsonable(players)}, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
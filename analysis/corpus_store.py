@@ -0,0 +1,367 @@
+"""
+Columnar, memory-mapped store of recorded game transcripts.
+
+`build_store` converts transcripts (see utils.transcript) into a directory of
+flat files that `CorpusStore` opens with memory mapping, so analyses scan
+columns in place instead of re-parsing JSON:
+
+    responses.npy       one fixed-width record per response: game, sequence
+                        number, figure, human flag, phase, event, every
+                        PatternAnalyzer metric and the text's place in the blob
+    games.npy           one record per game: id, mode, human figure,
+                        detection accuracy, outcome and its rows' range
+    text.bin            the response texts, UTF-8, back to back
+    index_<key>_*.npy   row numbers grouped by figure, player (human or ai),
+                        phase and game outcome, with the offset of each group
+    meta.json           the names behind the integer codes
+
+    python -m analysis.corpus_store build transcripts/ --out corpus/
+    python -m analysis.corpus_store info corpus/ --player human --outcome fooled
+
+Responses are ordered by game, then by their order within the game.
+"""
+import argparse
+import json
+import os
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from analysis.pattern_mining import METRICS, METRIC_NAMES, patterns_from_moments, response_metrics_batch
+from utils.transcript import read_transcripts
+
+FORMAT_VERSION = 1
+
+# Transcript events that carry a player's response
+RESPONSE_EVENTS = ("intro", "question", "answer", "vote")
+PLAYERS = ("ai", "human")
+MODES = ("quick", "full")
+# Same thresholds as the end-of-game verdict
+OUTCOMES = ("detected", "partial", "fooled", "unknown", "aborted")
+
+_METRIC_DTYPES = {int: np.uint32, float: np.float32, bool: np.bool_}
+
+RESPONSE_DTYPE = np.dtype(
+    [
+        ('game', np.uint32),
+        ('seq', np.uint32),
+        ('figure', np.uint16),
+        ('human', np.bool_),
+        ('phase', np.uint8),
+        ('event', np.uint8),
+    ]
+    + [(name, _METRIC_DTYPES[kind]) for name, kind in METRICS]
+    + [
+        ('text_offset', np.uint64),
+        ('text_length', np.uint32),
+    ]
+)
+
+GAME_DTYPE = np.dtype([
+    ('id', 'S32'),
+    ('mode', np.uint8),
+    ('human', np.uint16),
+    ('accuracy', np.float32),
+    ('outcome', np.uint8),
+    ('start', np.uint64),
+    ('count', np.uint32),
+])
+
+INDEX_KEYS = ("figure", "player", "phase", "outcome")
+
+
+def outcome_of(accuracy: Optional[float], aborted: bool = False) -> str:
+    """Name of a game's outcome from its detection accuracy (percent)."""
+    if aborted:
+        return "aborted"
+    if accuracy is None:
+        return "unknown"
+    if accuracy > 66:
+        return "detected"
+    if accuracy > 33:
+        return "partial"
+    return "fooled"
+
+
+class _Codes:
+    """Assigns small integer codes to names in order of first appearance."""
+
+    def __init__(self, names: Sequence[str] = ()):
+        self.names = list(names)
+        self._codes = {name: i for i, name in enumerate(self.names)}
+
+    def __call__(self, name: str) -> int:
+        code = self._codes.get(name)
+        if code is None:
+            code = self._codes[name] = len(self.names)
+            self.names.append(name)
+        return code
+
+
+def response_text(record: Dict) -> str:
+    """The text of a response event (a vote's text is the name voted for)."""
+    if record["event"] == "vote":
+        return record.get("vote") or ""
+    return record.get("text") or ""
+
+
+def _chunks(records: Iterable[Dict], size: int) -> Iterator[List[Dict]]:
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _write_index(out: str, key: str, codes: np.ndarray, groups: int):
+    """Row numbers sorted by `codes`, and where each code's rows start."""
+    rows = np.argsort(codes, kind='stable').astype(np.uint64)
+    offsets = np.concatenate(([0], np.cumsum(np.bincount(codes, minlength=groups)))).astype(np.uint64)
+    np.save(os.path.join(out, f"index_{key}_rows.npy"), rows)
+    np.save(os.path.join(out, f"index_{key}_offsets.npy"), offsets)
+
+
+def build_store(sources: Iterable[str], out: str, chunk_size: int = 100_000) -> "CorpusStore":
+    """
+    Convert transcripts into a store at `out`.
+
+    Args:
+        sources: Transcript files, or directories of them
+        out: Directory to write the store to (created if missing)
+        chunk_size: Records parsed and measured at a time
+
+    Returns:
+        The new store, opened
+    """
+    os.makedirs(out, exist_ok=True)
+    figures, phases = _Codes(), _Codes([""])
+    games = {}
+    parts = []
+    blob_size = 0
+
+    with open(os.path.join(out, "text.bin"), "wb") as blob:
+        for chunk in _chunks(read_transcripts(sources), chunk_size):
+            responses = []
+            for record in chunk:
+                game = games.setdefault(record["game"], {"index": len(games)})
+                event = record["event"]
+                if event in RESPONSE_EVENTS:
+                    responses.append(record)
+                elif event == "game_start":
+                    game["mode"] = record.get("mode")
+                    game["human"] = record.get("human")
+                elif event == "result":
+                    game["accuracy"] = record.get("accuracy")
+                elif event == "game_aborted":
+                    game["aborted"] = True
+            if not responses:
+                continue
+
+            texts = [response_text(r) for r in responses]
+            encoded = [text.encode("utf-8") for text in texts]
+            lengths = np.fromiter((len(e) for e in encoded), dtype=np.uint64, count=len(encoded))
+            part = np.zeros(len(responses), dtype=RESPONSE_DTYPE)
+            part['game'] = [games[r["game"]]["index"] for r in responses]
+            part['seq'] = [r["seq"] for r in responses]
+            part['figure'] = [figures(r.get("player") or r.get("voter") or "") for r in responses]
+            part['phase'] = [phases(r.get("phase") or "") for r in responses]
+            part['event'] = [RESPONSE_EVENTS.index(r["event"]) for r in responses]
+            metrics = response_metrics_batch(texts)
+            for i, name in enumerate(METRIC_NAMES):
+                part[name] = np.nan_to_num(metrics[:, i]) if part.dtype[name].kind != 'f' else metrics[:, i]
+            part['text_offset'] = blob_size + np.cumsum(lengths) - lengths
+            part['text_length'] = lengths
+            blob.write(b"".join(encoded))
+            blob_size += int(lengths.sum())
+            parts.append(part)
+
+    responses = np.concatenate(parts) if parts else np.zeros(0, dtype=RESPONSE_DTYPE)
+    responses = responses[np.lexsort((responses['seq'], responses['game']))]
+
+    game_table = np.zeros(len(games), dtype=GAME_DTYPE)
+    for game_id, game in games.items():
+        row = game_table[game["index"]]
+        row['id'] = game_id.encode("ascii")
+        row['mode'] = MODES.index(game["mode"]) if game.get("mode") in MODES else len(MODES)
+        row['human'] = figures(game["human"]) if game.get("human") else np.iinfo(np.uint16).max
+        accuracy = game.get("accuracy")
+        row['accuracy'] = np.nan if accuracy is None else accuracy
+        row['outcome'] = OUTCOMES.index(outcome_of(accuracy, game.get("aborted", False)))
+    counts = np.bincount(responses['game'], minlength=len(games))
+    game_table['count'] = counts
+    game_table['start'] = np.cumsum(counts) - counts
+    responses['human'] = responses['figure'] == game_table['human'][responses['game']]
+
+    np.lib.format.open_memmap(os.path.join(out, "responses.npy"), mode="w+", dtype=RESPONSE_DTYPE,
+                              shape=responses.shape)[:] = responses
+    np.save(os.path.join(out, "games.npy"), game_table)
+
+    _write_index(out, "figure", responses['figure'].astype(np.int64), len(figures.names))
+    _write_index(out, "player", responses['human'].astype(np.int64), len(PLAYERS))
+    _write_index(out, "phase", responses['phase'].astype(np.int64), len(phases.names))
+    _write_index(out, "outcome", game_table['outcome'][responses['game']].astype(np.int64), len(OUTCOMES))
+
+    with open(os.path.join(out, "meta.json"), "w") as f:
+        json.dump({
+            "version": FORMAT_VERSION,
+            "metrics": list(METRIC_NAMES),
+            "figures": figures.names,
+            "phases": phases.names,
+            "events": list(RESPONSE_EVENTS),
+            "players": list(PLAYERS),
+            "modes": list(MODES),
+            "outcomes": list(OUTCOMES),
+        }, f, indent=2)
+        f.write("\n")
+    return CorpusStore(out)
+
+
+class CorpusStore:
+    """
+    Read-only view of a store written by `build_store`. Every array is
+    memory-mapped, so opening is instant and scans only touch the columns
+    they use.
+
+    Args:
+        path: The store's directory
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+        if self.meta["version"] != FORMAT_VERSION or self.meta["metrics"] != list(METRIC_NAMES):
+            raise ValueError(f"{path} was built by an incompatible version; rebuild it")
+        self.responses = np.load(os.path.join(path, "responses.npy"), mmap_mode="r")
+        self.games = np.load(os.path.join(path, "games.npy"), mmap_mode="r")
+        size = os.path.getsize(os.path.join(path, "text.bin"))
+        self._text = np.memmap(os.path.join(path, "text.bin"), dtype=np.uint8, mode="r") if size else np.zeros(0, np.uint8)
+        self._indexes = {}
+
+    def __len__(self):
+        return len(self.responses)
+
+    def text(self, row: int) -> str:
+        """The text of response `row`."""
+        start = int(self.responses['text_offset'][row])
+        return self._text[start:start + int(self.responses['text_length'][row])].tobytes().decode("utf-8")
+
+    def _names(self, key: str) -> List[str]:
+        return self.meta[{"figure": "figures", "player": "players", "phase": "phases",
+                          "outcome": "outcomes"}[key]]
+
+    def _index(self, key: str):
+        if key not in self._indexes:
+            self._indexes[key] = (
+                np.load(os.path.join(self.path, f"index_{key}_rows.npy"), mmap_mode="r"),
+                np.load(os.path.join(self.path, f"index_{key}_offsets.npy"), mmap_mode="r"),
+            )
+        return self._indexes[key]
+
+    def lookup(self, key: str, value: str) -> np.ndarray:
+        """Rows whose `key` (figure, player, phase or outcome) is `value`, in order (a view)."""
+        names = self._names(key)
+        if value not in names:
+            return np.zeros(0, dtype=np.uint64)
+        rows, offsets = self._index(key)
+        code = names.index(value)
+        return rows[int(offsets[code]):int(offsets[code + 1])]
+
+    def rows(self, figure: Optional[str] = None, player: Optional[str] = None, phase: Optional[str] = None,
+             outcome: Optional[str] = None) -> Optional[np.ndarray]:
+        """
+        Rows matching every given filter, in order; None when no filter is
+        given (meaning every row, without materializing them).
+        """
+        selected = None
+        for key, value in (("figure", figure), ("player", player), ("phase", phase), ("outcome", outcome)):
+            if value is None:
+                continue
+            rows = self.lookup(key, value)
+            selected = rows if selected is None else np.intersect1d(selected, rows, assume_unique=True)
+        return selected
+
+    def column(self, name: str, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """One column of the responses; a zero-copy view when `rows` is None."""
+        column = self.responses[name]
+        return column if rows is None else column[rows]
+
+    def moments(self, by: str = "figure", rows: Optional[np.ndarray] = None):
+        """
+        Per-group response counts and per-metric sums and sums of squares.
+
+        Args:
+            by: "figure", "player" or "all"
+            rows: Restrict to these rows (see `rows`)
+
+        Returns:
+            (group names, counts, sums, sums of squares); the sums are
+            (groups, metrics) arrays in `METRIC_NAMES` order. A response
+            without words counts towards every metric but its mean word length.
+        """
+        if by == "all":
+            names = ["all"]
+            groups = np.zeros(len(self) if rows is None else len(rows), dtype=np.int64)
+        elif by in ("figure", "player"):
+            names = self._names(by)
+            groups = self.column('figure' if by == "figure" else 'human', rows).astype(np.int64)
+        else:
+            raise ValueError(f"Cannot group responses by {by!r}")
+
+        counts = np.zeros((len(names), len(METRIC_NAMES)))
+        sums = np.zeros((len(names), len(METRIC_NAMES)))
+        squares = np.zeros((len(names), len(METRIC_NAMES)))
+        for i, name in enumerate(METRIC_NAMES):
+            values = self.column(name, rows).astype(np.float64)
+            present = ~np.isnan(values)
+            values = np.where(present, values, 0.0)
+            counts[:, i] = np.bincount(groups, weights=present, minlength=len(names))
+            sums[:, i] = np.bincount(groups, weights=values, minlength=len(names))
+            squares[:, i] = np.bincount(groups, weights=values * values, minlength=len(names))
+        return names, counts, sums, squares
+
+    def extract_frequent_patterns(self, by: str = "figure", rows: Optional[np.ndarray] = None) -> Dict[str, Dict]:
+        """Same structure as `PatternAnalyzer.extract_frequent_patterns`, grouped `by` figure, player or all."""
+        return patterns_from_moments(*self.moments(by, rows))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or inspect a memory-mapped transcript store.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="convert transcripts into a store")
+    build.add_argument("sources", nargs="+", help="transcript files or directories")
+    build.add_argument("--out", required=True, help="directory to write the store to")
+    build.add_argument("--chunk-size", type=int, default=100_000, help="records parsed at a time")
+    info = commands.add_parser("info", help="summarize a store, optionally filtered")
+    info.add_argument("store")
+    info.add_argument("--figure")
+    info.add_argument("--player", choices=PLAYERS)
+    info.add_argument("--phase")
+    info.add_argument("--outcome", choices=OUTCOMES)
+    info.add_argument("--by", choices=["figure", "player", "all"], default="figure")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        store = build_store(args.sources, args.out, args.chunk_size)
+        print(f"{len(store)} responses from {len(store.games)} games written to {args.out}")
+        return
+
+    store = CorpusStore(args.store)
+    rows = store.rows(args.figure, args.player, args.phase, args.outcome)
+    selected = len(store) if rows is None else len(rows)
+    print(f"{selected} of {len(store)} responses, {len(store.games)} games")
+    outcomes = np.bincount(store.games['outcome'], minlength=len(OUTCOMES))
+    print("outcomes: " + ", ".join(f"{name} {n}" for name, n in zip(OUTCOMES, outcomes.tolist()) if n))
+    for name, data in store.extract_frequent_patterns(args.by, rows).items():
+        metrics = data['metrics']
+        print(f"\n{name}")
+        print(f"  length {metrics['avg_response_length']:.1f}  words {metrics['avg_words_per_response']:.1f}  "
+              f"sentences {metrics['avg_sentences']:.1f}  word length {metrics['avg_word_length']:.2f}")
+        print("  " + ", ".join(f"{k}: {v}" for k, v in data['patterns'].items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+Local human detector over PatternAnalyzer features.
+
+Scores every participant from the metrics `PatternAnalyzer` already keeps
+(length, words, sentences, word length, punctuation, capitalization,
+emoji), so AI voters can vote without an LLM call or only consult the LLM
+when the detector is unsure (see VOTE_MODE).
+
+Features are standardized within the table, since "brief" only means
+something relative to the other players. Out of the box the weights encode
+the vote rubric (shorter, plainer, less punctuated reads as human); train
+weights from recorded games with
+
+    python -m simulation.headless --games 2000 --features features.jsonl
+    python -m analysis.detector train features.jsonl --out detector.json
+"""
+import argparse
+import json
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from analysis.pattern_mining import METRIC_NAMES, PatternAnalyzer
+from config import DETECTOR_CONFIDENCE, DETECTOR_MODEL_PATH, VOTE_MODE
+
+FEATURES = METRIC_NAMES
+
+# Rubric weights for standardized features: positive means "more human"
+RUBRIC_WEIGHTS = {
+    'length': -1.0,
+    'words': -1.0,
+    'sentences': -0.5,
+    'avg_word_length': -0.5,
+    'punctuation_count': -1.0,
+    'capitalization_ratio': -0.25,
+    'has_emoji': 0.5,
+}
+
+# Vote reason reported for the feature that contributed most
+REASONS = {
+    'length': "Too brief",
+    'words': "Non-LLM brevity",
+    'sentences': "Unusual simplicity",
+    'avg_word_length': "Simple vocabulary",
+    'punctuation_count': "Missing elaboration",
+    'capitalization_ratio': "Inconsistent formatting",
+    'has_emoji': "Informal tone",
+}
+
+
+def player_features(analyzer: PatternAnalyzer, players: Sequence[str]) -> Tuple[List[str], np.ndarray]:
+    """
+    Mean metrics of each player the analyzer has seen respond.
+
+    Returns:
+        The players with data, and their feature rows in `FEATURES` order
+    """
+    columns = getattr(analyzer, 'columns', {})
+    known = [p for p in players if p in columns and columns[p].count]
+    rows = np.array([columns[p].mean for p in known]).reshape(len(known), len(FEATURES))
+    # A player with no words at all has no mean word length
+    return known, np.nan_to_num(rows)
+
+
+def standardize(rows: np.ndarray) -> np.ndarray:
+    """Z-scores of each feature relative to the rest of the table."""
+    std = rows.std(axis=0)
+    return (rows - rows.mean(axis=0)) / np.where(std > 0, std, 1.0)
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    exp = np.exp(logits - logits.max())
+    return exp / exp.sum()
+
+
+class HumanDetector:
+    """
+    Softmax-over-the-table logistic model: each player's logit is a linear
+    function of their standardized features and the probabilities that
+    each is the human sum to one.
+
+    Args:
+        weights: One weight per feature (`FEATURES` order); defaults to the rubric
+    """
+
+    def __init__(self, weights: Optional[Sequence[float]] = None):
+        if weights is None:
+            weights = [RUBRIC_WEIGHTS[name] for name in FEATURES]
+        self.weights = np.asarray(weights, dtype=float)
+
+    def scores(self, analyzer: PatternAnalyzer, players: Sequence[str]) -> Dict[str, float]:
+        """Probability that each player (with any responses) is the human."""
+        known, rows = player_features(analyzer, players)
+        if not known:
+            return {}
+        return dict(zip(known, _softmax(standardize(rows) @ self.weights).tolist()))
+
+    def vote(self, analyzer: PatternAnalyzer, voter: str,
+             players: Sequence[str]) -> Optional[Tuple[str, float, str]]:
+        """
+        The player `voter` should vote for.
+
+        Returns:
+            (vote, confidence, reason), where confidence is the vote's
+            probability among the candidates other than the voter; None if
+            fewer than two candidates have responses to judge
+        """
+        known, rows = player_features(analyzer, players)
+        candidates = [i for i, p in enumerate(known) if p != voter]
+        if len(candidates) < 2:
+            return None
+        z = standardize(rows)
+        probabilities = _softmax(z[candidates] @ self.weights)
+        best = int(np.argmax(probabilities))
+        contributions = z[candidates[best]] * self.weights
+        reason = REASONS[FEATURES[int(np.argmax(contributions))]]
+        return known[candidates[best]], float(probabilities[best]), reason
+
+    @classmethod
+    def train(cls, games: List[Tuple[np.ndarray, int]], epochs: int = 500, learning_rate: float = 0.1,
+              l2: float = 0.01) -> "HumanDetector":
+        """
+        Fit weights by gradient descent on the table-softmax log-likelihood.
+
+        Args:
+            games: (feature rows, index of the human) for each recorded game
+        """
+        tables = [(standardize(rows), human) for rows, human in games if len(rows) > 1]
+        weights = np.zeros(len(FEATURES))
+        for _ in range(epochs):
+            gradient = l2 * weights
+            for z, human in tables:
+                p = _softmax(z @ weights)
+                gradient -= (z[human] - p @ z) / len(tables)
+            weights -= learning_rate * gradient
+        return cls(weights)
+
+    def accuracy(self, games: List[Tuple[np.ndarray, int]]) -> float:
+        """Share of games in which the human gets the highest score."""
+        hits = [int(np.argmax(standardize(rows) @ self.weights)) == human for rows, human in games]
+        return float(np.mean(hits)) if hits else 0.0
+
+    def save(self, path: str):
+        with open(path, "w") as f:
+            json.dump({"features": list(FEATURES), "weights": self.weights.tolist()}, f, indent=2)
+            f.write("\n")
+
+    @classmethod
+    def load(cls, path: str) -> "HumanDetector":
+        with open(path) as f:
+            data = json.load(f)
+        if data["features"] != list(FEATURES):
+            raise ValueError(f"{path} was trained on different features: {data['features']}")
+        return cls(data["weights"])
+
+
+_detector = None
+
+
+def get_detector() -> HumanDetector:
+    """The detector for this process: trained weights from DETECTOR_MODEL_PATH if present, else the rubric."""
+    global _detector
+    if _detector is None:
+        if DETECTOR_MODEL_PATH and os.path.exists(DETECTOR_MODEL_PATH):
+            _detector = HumanDetector.load(DETECTOR_MODEL_PATH)
+        else:
+            _detector = HumanDetector()
+    return _detector
+
+
+def local_votes(pattern_analyzer, voters, all_figures, mode=VOTE_MODE):
+    """
+    Votes the local detector casts instead of the LLM: every vote in
+    "local" mode (where the detector has anything to judge), only confident
+    ones in "hybrid" mode, none in "llm" mode.
+
+    Returns:
+        {voter: (vote, reason)} for the voters decided locally
+    """
+    if mode == "llm":
+        return {}
+    detector = get_detector()
+    decided = {}
+    for voter in voters:
+        result = detector.vote(pattern_analyzer, voter, all_figures)
+        if result is None:
+            continue
+        vote, confidence, reason = result
+        if mode == "local" or confidence >= DETECTOR_CONFIDENCE:
+            decided[voter] = (vote, reason)
+    return decided
+
+
+def load_games(path: str) -> List[Tuple[np.ndarray, int]]:
+    """Read the feature records written by `simulation.headless --features`."""
+    games = []
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record["human"] in record["players"]:
+                games.append((np.array(record["features"], dtype=float),
+                              record["players"].index(record["human"])))
+    return games
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train or evaluate the local human detector.")
+    parser.add_argument("command", choices=["train", "evaluate"])
+    parser.add_argument("features", help="JSONL written by simulation.headless --features")
+    parser.add_argument("--out", default=DETECTOR_MODEL_PATH, help="where 'train' saves the weights")
+    parser.add_argument("--model", default=DETECTOR_MODEL_PATH, help="weights 'evaluate' loads")
+    parser.add_argument("--holdout", type=float, default=0.2, help="share of games 'train' evaluates on")
+    args = parser.parse_args()
+
+    games = load_games(args.features)
+    if args.command == "evaluate":
+        detector = HumanDetector.load(args.model) if args.model else HumanDetector()
+        print(f"{len(games)} games, accuracy {detector.accuracy(games):.1%}")
+        return
+
+    split = int(len(games) * (1 - args.holdout))
+    detector = HumanDetector.train(games[:split])
+    print(f"trained on {split} games; held-out accuracy {detector.accuracy(games[split:]):.1%} "
+          f"(rubric weights: {HumanDetector().accuracy(games[split:]):.1%})")
+    for name, weight in zip(FEATURES, detector.weights):
+        print(f"  {name:<22}{weight:+.3f}")
+    if args.out:
+        detector.save(args.out)
+
+
+if __name__ == "__main__":
+    main()
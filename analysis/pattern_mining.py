@@ -3,12 +3,250 @@ Pattern mining module for analyzing communication patterns in the game.
 """
 from collections import defaultdict
 import numpy as np
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, List, Tuple
+
+from analysis.stylometry import StylometryIndex
+from config import STYLOMETRY
+from utils.transcript import log_event, recording
+
+# Per-response metrics, in column order, with the type they are reported as
+METRICS = (
+    ('length', int),
+    ('words', int),
+    ('sentences', int),
+    ('avg_word_length', float),
+    ('punctuation_count', int),
+    ('capitalization_ratio', float),
+    ('has_emoji', bool),
+)
+METRIC_NAMES = tuple(name for name, _ in METRICS)
+_COLUMN = {name: i for i, name in enumerate(METRIC_NAMES)}
+
+def metric_dict(row) -> Dict:
+    """One response's metric values (in `METRIC_NAMES` order) as a dictionary of reported types."""
+    return {name: kind(value) for (name, kind), value in zip(METRICS, row)}
+
+PUNCTUATION = '.,!?;'
+EMOJI = '😊🤔😂👍🎭🎯'
+
+_BMP = 0x10000
+_bmp_tables = None
+
+def _char_tables() -> Tuple[np.ndarray, np.ndarray]:
+    """isupper/isspace lookup tables for the Basic Multilingual Plane."""
+    global _bmp_tables
+    if _bmp_tables is None:
+        chars = [chr(c) for c in range(_BMP)]
+        _bmp_tables = (np.array([c.isupper() for c in chars]),
+                       np.array([c.isspace() for c in chars]))
+    return _bmp_tables
+
+def _segment_sums(mask: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Count the set entries of `mask` within each [start, end) segment."""
+    totals = np.concatenate(([0], np.cumsum(mask)))
+    return totals[ends] - totals[starts]
+
+def response_metrics_batch(responses: List[str]) -> np.ndarray:
+    """
+    Compute the metrics of many responses at once.
+
+    All responses are decoded into one array of code points and every
+    metric is counted with vectorized character-class lookups, giving the
+    same values as `PatternAnalyzer.analyze_response`.
+
+    Args:
+        responses: The response texts.
+
+    Returns:
+        A float array with one row per response and one column per metric,
+        in `METRIC_NAMES` order.
+    """
+    lengths = np.fromiter((len(r) for r in responses), dtype=np.int64, count=len(responses))
+    ends = np.cumsum(lengths)
+    starts = ends - lengths
+    codes = np.frombuffer(''.join(responses).encode('utf-32-le'), dtype=np.uint32)
+
+    upper_table, space_table = _char_tables()
+    bmp = codes < _BMP
+    upper = np.zeros(len(codes), dtype=bool)
+    space = np.zeros(len(codes), dtype=bool)
+    upper[bmp] = upper_table[codes[bmp]]
+    space[bmp] = space_table[codes[bmp]]
+    # Astral-plane characters are rare; look up the distinct ones directly
+    astral = np.unique(codes[~bmp])
+    if len(astral):
+        astral_upper = astral[[chr(c).isupper() for c in astral.tolist()]]
+        upper[~bmp] = np.isin(codes[~bmp], astral_upper)
+
+    # A word starts at any non-space character that follows a space or
+    # begins its response
+    follows_space = np.concatenate(([True], space[:-1]))
+    follows_space[starts[starts < len(codes)]] = True
+    words = _segment_sums(~space & follows_space, starts, ends)
+    word_chars = _segment_sums(~space, starts, ends)
+    periods = _segment_sums(codes == ord('.'), starts, ends)
+    punctuation = _segment_sums(np.isin(codes, [ord(c) for c in PUNCTUATION]), starts, ends)
+    uppercase = _segment_sums(upper, starts, ends)
+    emoji = _segment_sums(np.isin(codes, [ord(c) for c in EMOJI]), starts, ends)
+
+    metrics = np.empty((len(responses), len(METRICS)))
+    metrics[:, _COLUMN['length']] = lengths
+    metrics[:, _COLUMN['words']] = words
+    metrics[:, _COLUMN['sentences']] = periods + 1
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # Responses without words have no mean word length (NaN), as np.mean([]) gives
+        metrics[:, _COLUMN['avg_word_length']] = np.where(words > 0, word_chars / words, np.nan)
+        metrics[:, _COLUMN['capitalization_ratio']] = np.where(lengths > 0, uppercase / lengths, 0.0)
+    metrics[:, _COLUMN['punctuation_count']] = punctuation
+    metrics[:, _COLUMN['has_emoji']] = emoji > 0
+    return metrics
+
+def describe_patterns(mean: np.ndarray, std: np.ndarray) -> Dict:
+    """
+    A player's summary metrics and behavioral patterns, from the per-metric
+    mean and standard deviation of their responses (in `METRIC_NAMES` order).
+    This is the per-player entry of `PatternAnalyzer.extract_frequent_patterns`.
+    """
+    avg_metrics = {
+        'avg_response_length': mean[_COLUMN['length']],
+        'avg_words_per_response': mean[_COLUMN['words']],
+        'avg_sentences': mean[_COLUMN['sentences']],
+        'avg_word_length': mean[_COLUMN['avg_word_length']],
+        'punctuation_density': mean[_COLUMN['punctuation_count']],
+        'capitalization_consistency': std[_COLUMN['capitalization_ratio']],
+        'emoji_usage': mean[_COLUMN['has_emoji']],
+    }
+    
+    # Identify key behavioral patterns
+    patterns = {
+        'verbosity': 'high' if avg_metrics['avg_words_per_response'] > 30 else 'low',
+        'formality': 'high' if avg_metrics['punctuation_density'] > 0.1 else 'low',
+        'consistency': 'high' if avg_metrics['capitalization_consistency'] < 0.1 else 'low',
+        'expressiveness': 'high' if avg_metrics['emoji_usage'] > 0.3 else 'low'
+    }
+    
+    return {
+        'metrics': avg_metrics,
+        'patterns': patterns
+    }
+
+def patterns_from_moments(names: List[str], counts: np.ndarray, sums: np.ndarray,
+                          squares: np.ndarray) -> Dict[str, Dict]:
+    """
+    `extract_frequent_patterns` output from per-player aggregates: the
+    number of values, their sum and their sum of squares for every metric,
+    as (players, metrics) arrays. Players without values are left out.
+    """
+    all_patterns = {}
+    for name, count, total, square in zip(names, counts, sums, squares):
+        if not count.any():
+            continue
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = total / count
+            std = np.sqrt(np.maximum(square / count - mean ** 2, 0.0))
+        all_patterns[name] = describe_patterns(mean, std)
+    return all_patterns
+
+def summarize_patterns(patterns: Dict[str, Dict]) -> str:
+    """The per-player part of `PatternAnalyzer.generate_summary`."""
+    summary = "Communication Patterns Observed.\n\n"
+    
+    for player, data in patterns.items():
+        metrics = data['metrics']
+        behavior = data['patterns']
+        
+        summary += f"Player: {player}\n"
+        summary += "=" * (len(player) + 8) + "\n"
+        summary += f"Response Style:\n"
+        summary += f"- Average response length: {metrics['avg_response_length']:.1f} characters\n"
+        summary += f"- Words per response: {metrics['avg_words_per_response']:.1f}\n"
+        summary += f"- Sentence complexity: {metrics['avg_sentences']:.1f} sentences/response\n\n"
+        
+        summary += "Behavioral Patterns:\n"
+        summary += f"- Verbosity: {behavior['verbosity']}\n"
+        summary += f"- Formality: {behavior['formality']}\n"
+        summary += f"- Consistency: {behavior['consistency']}\n"
+        summary += f"- Expressiveness: {behavior['expressiveness']}\n\n"
+    
+    return summary
+
+class MetricColumns:
+    """
+    One player's metrics stored column-wise in a growable float array, with
+    running (Welford) mean and variance per column so aggregates never need
+    a pass over the stored responses.
+    """
+    __slots__ = ('_data', 'count', 'mean', '_m2')
+
+    def __init__(self, capacity: int = 16):
+        self._data = np.empty((capacity, len(METRICS)))
+        self.count = 0
+        self.mean = np.zeros(len(METRICS))
+        self._m2 = np.zeros(len(METRICS))
+
+    def append(self, values):
+        """Store one response's metric values (in `METRIC_NAMES` order)."""
+        if self.count == len(self._data):
+            self._data = np.resize(self._data, (2 * len(self._data), len(METRICS)))
+        row = np.asarray(values, dtype=float)
+        self._data[self.count] = row
+        self.count += 1
+        delta = row - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (row - self.mean)
+
+    def extend(self, rows: np.ndarray):
+        """Store many responses' metric rows at once."""
+        n = len(rows)
+        if not n:
+            return
+        needed = self.count + n
+        if needed > len(self._data):
+            capacity = len(self._data)
+            while capacity < needed:
+                capacity *= 2
+            self._data = np.resize(self._data, (capacity, len(METRICS)))
+        self._data[self.count:needed] = rows
+
+        # Merge the batch's mean and sum of squares into the running ones
+        batch_mean = rows.mean(axis=0)
+        batch_m2 = ((rows - batch_mean) ** 2).sum(axis=0)
+        delta = batch_mean - self.mean
+        self.mean += delta * n / needed
+        self._m2 += batch_m2 + delta ** 2 * self.count * n / needed
+        self.count = needed
+
+    @property
+    def variance(self) -> np.ndarray:
+        """Population variance of each column."""
+        return self._m2 / self.count if self.count else np.zeros(len(METRICS))
+
+    @property
+    def std(self) -> np.ndarray:
+        return np.sqrt(self.variance)
+
+    def column(self, name: str) -> np.ndarray:
+        """The stored values of metric `name` (a view, oldest first)."""
+        return self._data[:self.count, _COLUMN[name]]
+
+    def rows(self) -> List[Dict]:
+        """The stored responses as metric dictionaries."""
+        return [metric_dict(row) for row in self._data[:self.count].tolist()]
+
+    def __len__(self):
+        return self.count
 
 class PatternAnalyzer:
-    def __init__(self):
+    def __init__(self, stylometry: bool = STYLOMETRY):
         self.patterns = defaultdict(list)
-        self.response_metrics = defaultdict(list)
+        self.columns: Dict[str, MetricColumns] = defaultdict(MetricColumns)
+        # Optional n-gram style similarity between players (see analysis.stylometry)
+        self.stylometry = StylometryIndex() if stylometry else None
+
+    @property
+    def response_metrics(self) -> Dict[str, List[Dict]]:
+        """Every player's responses as metric dictionaries, oldest first."""
+        return {player: columns.rows() for player, columns in self.columns.items()}
         
     def analyze_response(self, player: str, response: str) -> Dict:
         """Analyze a single response for various metrics."""
@@ -17,73 +255,81 @@ class PatternAnalyzer:
             'words': len(response.split()),
             'sentences': len(response.split('.')),
             'avg_word_length': np.mean([len(word) for word in response.split()]),
-            'punctuation_count': sum(1 for char in response if char in '.,!?;'),
+            'punctuation_count': sum(1 for char in response if char in PUNCTUATION),
             'capitalization_ratio': sum(1 for char in response if char.isupper()) / len(response) if response else 0,
-            'has_emoji': any(char for char in response if char in '😊🤔😂👍🎭🎯'),
+            'has_emoji': any(char for char in response if char in EMOJI),
         }
         
-        self.response_metrics[player].append(metrics)
+        row = [metrics[name] for name in METRIC_NAMES]
+        self.columns[player].append(row)
+        if recording():
+            log_event("metrics", player=player, metrics=metric_dict(row))
+        if self.stylometry is not None:
+            self.stylometry.add(player, response)
+        return metrics
+
+    def analyze_responses(self, responses: Iterable[Tuple[str, str]]) -> np.ndarray:
+        """
+        Analyze many responses at once; the batch form of `analyze_response`.
+
+        Args:
+            responses: (player, response) pairs, in the order they were given.
+
+        Returns:
+            The metrics of each response as rows of a float array, in
+            `METRIC_NAMES` order (see `response_metrics_batch`).
+        """
+        responses = list(responses)
+        metrics = response_metrics_batch([response for _, response in responses])
+
+        by_player = defaultdict(list)
+        for i, (player, _) in enumerate(responses):
+            by_player[player].append(i)
+        for player, rows in by_player.items():
+            self.columns[player].extend(metrics[rows])
+        if recording():
+            for (player, _), row in zip(responses, metrics.tolist()):
+                log_event("metrics", player=player, metrics=metric_dict(row))
+        if self.stylometry is not None:
+            self.stylometry.add_many(responses)
         return metrics
 
     def extract_frequent_patterns(self) -> Dict[str, Dict]:
         """Extract frequent patterns from all responses."""
         all_patterns = {}
         
-        for player, metrics_list in self.response_metrics.items():
-            if not metrics_list:
+        for player, columns in self.columns.items():
+            if not columns.count:
                 continue
                 
-            avg_metrics = {
-                'avg_response_length': np.mean([m['length'] for m in metrics_list]),
-                'avg_words_per_response': np.mean([m['words'] for m in metrics_list]),
-                'avg_sentences': np.mean([m['sentences'] for m in metrics_list]),
-                'avg_word_length': np.mean([m['avg_word_length'] for m in metrics_list]),
-                'punctuation_density': np.mean([m['punctuation_count'] for m in metrics_list]),
-                'capitalization_consistency': np.std([m['capitalization_ratio'] for m in metrics_list]),
-                'emoji_usage': np.mean([m['has_emoji'] for m in metrics_list]),
-            }
-            
-            # Identify key behavioral patterns
-            patterns = {
-                'verbosity': 'high' if avg_metrics['avg_words_per_response'] > 30 else 'low',
-                'formality': 'high' if avg_metrics['punctuation_density'] > 0.1 else 'low',
-                'consistency': 'high' if avg_metrics['capitalization_consistency'] < 0.1 else 'low',
-                'expressiveness': 'high' if avg_metrics['emoji_usage'] > 0.3 else 'low'
-            }
-            
-            all_patterns[player] = {
-                'metrics': avg_metrics,
-                'patterns': patterns
-            }
+            all_patterns[player] = describe_patterns(columns.mean, columns.std)
             
         return all_patterns
 
-    def generate_summary(self) -> str:
-        """Generate a summary of the communication patterns."""
-        patterns = self.extract_frequent_patterns()
+    def generate_summary(self, tracer=None) -> str:
+        """
+        Generate a summary of the communication patterns. If a
+        `utils.tracing.Tracer` is given, its per-phase latency table is
+        appended.
+        """
+        summary = summarize_patterns(self.extract_frequent_patterns())
         
-        summary = "Communication Patterns Observed.\n\n"
+        if self.stylometry is not None and len(self.stylometry.players) > 1:
+            summary += "Style Similarity\n"
+            summary += "================\n"
+            summary += "Mean similarity to the others (least similar first):\n"
+            for player, similarity in self.stylometry.outliers():
+                summary += f"- {player}: {similarity:.2f}\n"
+            summary += "\n"
         
-        for player, data in patterns.items():
-            metrics = data['metrics']
-            behavior = data['patterns']
-            
-            summary += f"Player: {player}\n"
-            summary += "=" * (len(player) + 8) + "\n"
-            summary += f"Response Style:\n"
-            summary += f"- Average response length: {metrics['avg_response_length']:.1f} characters\n"
-            summary += f"- Words per response: {metrics['avg_words_per_response']:.1f}\n"
-            summary += f"- Sentence complexity: {metrics['avg_sentences']:.1f} sentences/response\n\n"
-            
-            summary += "Behavioral Patterns:\n"
-            summary += f"- Verbosity: {behavior['verbosity']}\n"
-            summary += f"- Formality: {behavior['formality']}\n"
-            summary += f"- Consistency: {behavior['consistency']}\n"
-            summary += f"- Expressiveness: {behavior['expressiveness']}\n\n"
+        if tracer is not None:
+            summary += tracer.latency_table()
             
         return summary
 
     def clear(self):
         """Clear all stored patterns and metrics."""
         self.patterns.clear()
-        self.response_metrics.clear()
+        self.columns.clear()
+        if self.stylometry is not None:
+            self.stylometry.clear()
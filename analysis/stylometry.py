@@ -0,0 +1,118 @@
+"""
+Stylometric similarity between participants.
+
+Every response is hashed into a fixed-width vector of character trigram and
+word counts; a participant's style is the sum of their responses' vectors.
+`StylometryIndex` keeps the participant-by-participant cosine similarity
+matrix up to date as responses arrive, recomputing only the rows of the
+participants that changed. The human is usually the one least similar to
+everybody else (see `outliers`).
+"""
+import threading
+import zlib
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from config import STYLOMETRY_DIM
+
+# Multipliers of the character trigram hash
+_P1, _P2 = np.uint64(1_000_003), np.uint64(1_000_003 ** 2)
+
+
+def response_vector(response: str, dim: int = STYLOMETRY_DIM) -> np.ndarray:
+    """
+    Hashed n-gram counts of one response, log-scaled so a few very
+    frequent n-grams do not dominate.
+    """
+    text = response.lower()
+    codes = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+    buckets = [(codes[:-2] * _P2 + codes[1:-1] * _P1 + codes[2:]) % np.uint64(dim)] if len(codes) > 2 else []
+    words = text.split()
+    if words:
+        # Words hash into the same space; crc32 is stable across processes
+        buckets.append(np.array([zlib.crc32(w.encode('utf-8')) % dim for w in words], dtype=np.uint64))
+    if not buckets:
+        return np.zeros(dim)
+    counts = np.bincount(np.concatenate(buckets).astype(np.int64), minlength=dim)
+    return np.log1p(counts)
+
+
+class StylometryIndex:
+    """
+    Per-participant style vectors with an incrementally maintained cosine
+    similarity matrix.
+
+    Args:
+        dim: Width of the hashed n-gram vectors
+    """
+
+    def __init__(self, dim: int = STYLOMETRY_DIM):
+        self.dim = dim
+        self.players: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._sums = np.zeros((0, dim))
+        self._unit = np.zeros((0, dim))
+        self._similarity = np.zeros((0, 0))
+        self._lock = threading.Lock()
+
+    def _row(self, player: str) -> int:
+        row = self._rows.get(player)
+        if row is None:
+            row = self._rows[player] = len(self.players)
+            self.players.append(player)
+            self._sums = np.vstack([self._sums, np.zeros(self.dim)])
+            self._unit = np.vstack([self._unit, np.zeros(self.dim)])
+            similarity = np.zeros((row + 1, row + 1))
+            similarity[:row, :row] = self._similarity
+            self._similarity = similarity
+        return row
+
+    def _refresh(self, rows: List[int]):
+        """Renormalize `rows` and recompute their similarities to everyone."""
+        norms = np.linalg.norm(self._sums[rows], axis=1, keepdims=True)
+        self._unit[rows] = self._sums[rows] / np.where(norms > 0, norms, 1.0)
+        block = self._unit[rows] @ self._unit.T
+        self._similarity[rows, :] = block
+        self._similarity[:, rows] = block.T
+
+    def add(self, player: str, response: str):
+        """Fold one response into `player`'s style."""
+        self.add_many([(player, response)])
+
+    def add_many(self, responses: Iterable[Tuple[str, str]]):
+        """Fold many (player, response) pairs in, updating the matrix once."""
+        vectors = [(player, response_vector(response, self.dim)) for player, response in responses]
+        if not vectors:
+            return
+        with self._lock:
+            changed = set()
+            for player, vector in vectors:
+                row = self._row(player)
+                self._sums[row] += vector
+                changed.add(row)
+            self._refresh(sorted(changed))
+
+    def similarity_matrix(self) -> Tuple[List[str], np.ndarray]:
+        """The participants and their pairwise cosine similarities."""
+        with self._lock:
+            return list(self.players), self._similarity.copy()
+
+    def outliers(self) -> List[Tuple[str, float]]:
+        """
+        Participants by mean similarity to everyone else, least similar
+        (most likely human) first.
+        """
+        players, similarity = self.similarity_matrix()
+        if len(players) < 2:
+            return [(p, 1.0) for p in players]
+        others = (similarity.sum(axis=1) - np.diag(similarity)) / (len(players) - 1)
+        order = np.argsort(others)
+        return [(players[i], float(others[i])) for i in order]
+
+    def clear(self):
+        with self._lock:
+            self.players, self._rows = [], {}
+            self._sums = np.zeros((0, self.dim))
+            self._unit = np.zeros((0, self.dim))
+            self._similarity = np.zeros((0, 0))
@@ -0,0 +1,272 @@
+"""
+Load test of the game loop: many simultaneous sessions in one process.
+
+Plays `play_quick_game` / `play_full_game` in concurrent threads, with
+scripted humans and the fake backend at a controlled latency, and reports
+sessions per second, turn latency percentiles (how long the player waits
+between answering one prompt and seeing the next), CPU seconds and memory
+per session:
+
+    python -m benchmarks.loadtest --sessions 500 --concurrency 100 --mode full --latency 0.3
+    python -m benchmarks.loadtest --latency 0 --out load.json
+    python -m benchmarks.loadtest --latency 0 --baseline load.json
+
+With --latency 0 the numbers are the game loop's own overhead. As with
+benchmarks.phases, --baseline compares against an earlier run and exits with
+status 1 if any metric got worse by more than --max-regression.
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+
+import config
+from simulation.headless import HeadlessIO, play_game
+from simulation.policies import POLICIES, HumanPolicy
+from utils.backends import FakeBackend, LLMError
+from utils.llm import LLMClient, set_client
+
+
+class TimedIO(HeadlessIO):
+    """
+    HeadlessIO that records how long the player waited for each prompt,
+    and optionally takes `think_time` seconds to answer it.
+    """
+
+    def __init__(self, policy: HumanPolicy, think_time: float = 0.0):
+        super().__init__(policy)
+        self.think_time = think_time
+        self.turns: List[float] = []
+        self._since = time.perf_counter()
+
+    def read(self, name: str, prompt: str, display: str) -> str:
+        self.turns.append(time.perf_counter() - self._since)
+        if self.think_time:
+            time.sleep(self.think_time)
+        reply = super().read(name, prompt, display)
+        self._since = time.perf_counter()
+        return reply
+
+    def finish(self):
+        """Record the wait from the last answer to the end of the game."""
+        self.turns.append(time.perf_counter() - self._since)
+
+
+def _rss_bytes() -> int:
+    """Current resident set size (peak so far where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+class _Sampler:
+    """Tracks peak RSS and peak concurrent sessions on a background thread."""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.active = 0
+        self.peak_active = 0
+        self.peak_rss = _rss_bytes()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak_rss = max(self.peak_rss, _rss_bytes())
+
+    def enter(self):
+        with self._lock:
+            self.active += 1
+            self.peak_active = max(self.peak_active, self.active)
+
+    def leave(self):
+        with self._lock:
+            self.active -= 1
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_rss = max(self.peak_rss, _rss_bytes())
+
+
+def _session(mode: str, policy_name: str, seed: int, think_time: float, sampler: _Sampler) -> Dict:
+    policy = POLICIES[policy_name](seed=seed)
+    io = TimedIO(policy, think_time)
+    sampler.enter()
+    try:
+        # No game seed: reseeding the shared `random` from every thread would
+        # only make the sessions interfere with each other
+        result = play_game(mode, policy, io=io)
+    except LLMError as e:
+        return {"error": str(e)}
+    finally:
+        sampler.leave()
+    io.finish()
+    result["turns"] = io.turns
+    return result
+
+
+def _percentiles(values) -> Dict[str, float]:
+    values = np.asarray(values, dtype=float)
+    if not len(values):
+        return {}
+    return {
+        "p50": float(np.percentile(values, 50)),
+        "p90": float(np.percentile(values, 90)),
+        "p99": float(np.percentile(values, 99)),
+        "max": float(values.max()),
+    }
+
+
+def run_load(sessions: int = 200, concurrency: int = 50, mode: str = "quick", policy: str = "canned",
+             latency: float = 0.05, jitter: float = 0.0, error_rate: float = 0.0,
+             think_time: float = 0.0, seed: int = 0) -> Dict:
+    """
+    Play `sessions` games, `concurrency` at a time, sharing one client on
+    the fake backend (as the server's sessions share one client).
+    """
+    client = LLMClient(FakeBackend(latency=latency, jitter=jitter, error_rate=error_rate, seed=seed))
+    set_client(client)
+
+    rss_before = _rss_bytes()
+    cpu_before = time.process_time()
+    start = time.perf_counter()
+    with _Sampler() as sampler, ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(_session, mode, policy, seed + i, think_time, sampler) for i in range(sessions)]
+        results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu_before
+
+    played = [r for r in results if "error" not in r]
+    report = {
+        "config": {
+            "sessions": sessions,
+            "concurrency": concurrency,
+            "mode": mode,
+            "policy": policy,
+            "latency": latency,
+            "jitter": jitter,
+            "error_rate": error_rate,
+            "think_time": think_time,
+            "seed": seed,
+            "llm_concurrency": config.LLM_CONCURRENCY,
+            "llm_prefetch": config.LLM_PREFETCH,
+        },
+        "sessions": len(results),
+        "failed": len(results) - len(played),
+        "elapsed_seconds": elapsed,
+        "sessions_per_second": len(results) / elapsed if elapsed else 0.0,
+        "peak_concurrent_sessions": sampler.peak_active,
+        "turn_seconds": _percentiles([t for r in played for t in r["turns"]]),
+        "session_seconds": _percentiles([r["wall"] for r in played]),
+        "cpu_seconds": cpu,
+        "cpu_seconds_per_session": cpu / len(results) if results else 0.0,
+        "cpu_utilization": cpu / elapsed if elapsed else 0.0,
+        "rss_baseline_bytes": rss_before,
+        "rss_peak_bytes": sampler.peak_rss,
+        "memory_per_session_bytes": (sampler.peak_rss - rss_before) / max(1, sampler.peak_active),
+        "llm_calls_per_session": client.stats.calls / len(results) if results else 0.0,
+    }
+    return report
+
+
+# Metric path -> whether bigger is better
+METRICS = {
+    "sessions_per_second": True,
+    "turn_seconds.p50": False,
+    "turn_seconds.p99": False,
+    "cpu_seconds_per_session": False,
+    "memory_per_session_bytes": False,
+}
+
+
+def _lookup(report: Dict, path: str) -> Optional[float]:
+    value = report
+    for key in path.split("."):
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value
+
+
+def compare(report: Dict, baseline: Dict, max_regression: float) -> List[str]:
+    """Print relative changes against `baseline`; return the regressions."""
+    regressions = []
+    print(f"\n{'metric':<28}{'baseline':>14}{'current':>14}{'change':>10}")
+    for metric, bigger_is_better in METRICS.items():
+        old, new = _lookup(baseline, metric), _lookup(report, metric)
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        print(f"{metric:<28}{old:>14.4g}{new:>14.4g}{change:>+10.1%}")
+        if (-change if bigger_is_better else change) > max_regression:
+            regressions.append(f"{metric} {change:+.1%}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the game loop with many simultaneous sessions.")
+    parser.add_argument("--sessions", type=int, default=200, help="games to play in total")
+    parser.add_argument("--concurrency", type=int, default=50, help="games played at once")
+    parser.add_argument("--mode", choices=["quick", "full"], default="quick")
+    parser.add_argument("--policy", choices=sorted(p for p in POLICIES if p != "replay"), default="canned",
+                        help="how the scripted humans reply")
+    parser.add_argument("--latency", type=float, default=0.05, help="fake backend mean latency (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="fake backend latency jitter (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fake backend failure probability")
+    parser.add_argument("--think-time", type=float, default=0.0,
+                        help="seconds each scripted human takes to answer a prompt")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=None, help="write the results as JSON to this file")
+    parser.add_argument("--baseline", default=None, help="earlier JSON results to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.10,
+                        help="relative worsening that counts as a regression")
+    args = parser.parse_args()
+
+    report = run_load(args.sessions, args.concurrency, args.mode, args.policy, args.latency, args.jitter,
+                      args.error_rate, args.think_time, args.seed)
+
+    turns = report["turn_seconds"]
+    print(f"{report['sessions']} sessions ({report['failed']} failed) in {report['elapsed_seconds']:.2f}s: "
+          f"{report['sessions_per_second']:.1f} sessions/s, peak {report['peak_concurrent_sessions']} at once")
+    if turns:
+        print(f"turn latency  p50 {turns['p50'] * 1000:.1f} ms  p90 {turns['p90'] * 1000:.1f} ms  "
+              f"p99 {turns['p99'] * 1000:.1f} ms  max {turns['max'] * 1000:.1f} ms")
+    print(f"CPU           {report['cpu_seconds_per_session'] * 1000:.1f} ms/session "
+          f"({report['cpu_utilization']:.0%} of one core)")
+    print(f"memory        {report['memory_per_session_bytes'] / 1024:.0f} KiB/concurrent session "
+          f"(peak RSS {report['rss_peak_bytes'] / 2 ** 20:.1f} MiB)")
+    print(f"LLM calls     {report['llm_calls_per_session']:.1f}/session")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.max_regression)
+        if regressions:
+            print("\nRegressions: " + ", ".join(regressions))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Phase-level benchmarks against the fake backend.
+
+Runs each game phase headless with a controlled model latency and reports
+wall time, LLM calls, prompt/completion tokens (and how many prompt tokens
+the simulated prompt cache served) and peak Python memory:
+
+    python -m benchmarks.phases --figures 4 --latency 0.05 --out bench.json
+    python -m benchmarks.phases --figures 4 --latency 0.05 --baseline bench.json
+
+With --baseline, every metric is compared against the earlier run and the
+exit status is 1 if any grew by more than --max-regression.
+"""
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+import numpy as np
+
+import config
+from analysis.pattern_mining import PatternAnalyzer
+from phases.full_game import qna_round
+from phases.qna import qna_phase
+from phases.quick_game import quick_introductions, quick_voting
+from phases.voting import voting_phase
+from simulation.headless import HeadlessIO
+from simulation.policies import CannedPolicy
+from utils.backends import FakeBackend
+from utils.formatting import use_io
+from utils.llm import LLMClient, set_client
+
+SAMPLE_INTRODUCTION = (
+    "I am {name}. People remember my name, but rarely the long years of work behind it. "
+    "One thing few know is how often I doubted myself."
+)
+
+
+def _conversations(figures: List[str]) -> Dict[str, list]:
+    """Post-introduction state, built without any LLM calls."""
+    return {
+        figure: [{'role': 'assistant', 'content': SAMPLE_INTRODUCTION.format(name=figure)}]
+        for figure in figures
+    }
+
+
+def _phases(user_figure: str, ai_figures: List[str]) -> Dict[str, Callable[[], None]]:
+    """Each benchmark builds its own fresh input state when called."""
+    all_figures = ai_figures + [user_figure]
+    return {
+        "quick_introductions": lambda: quick_introductions(user_figure, ai_figures, PatternAnalyzer()),
+        "quick_voting": lambda: quick_voting(
+            user_figure, ai_figures, _conversations(all_figures), PatternAnalyzer()),
+        "qna_round": lambda: qna_round(
+            user_figure, ai_figures, _conversations(all_figures), PatternAnalyzer(), 1),
+        "qna_phase": lambda: qna_phase(user_figure, ai_figures, _conversations(all_figures)),
+        "voting_phase": lambda: voting_phase(user_figure, ai_figures, _conversations(all_figures)),
+    }
+
+
+def _measure(run: Callable[[], None], policy: CannedPolicy, latency: float, jitter: float,
+             seed: int, trace_memory: bool) -> Dict:
+    client = LLMClient(FakeBackend(latency=latency, jitter=jitter, seed=seed))
+    set_client(client)
+    # Phases such as qna_phase shuffle the speaking order
+    random.seed(seed)
+    if trace_memory:
+        tracemalloc.start()
+
+    start = time.perf_counter()
+    with use_io(HeadlessIO(policy)):
+        run()
+    wall = time.perf_counter() - start
+
+    result = {"wall": wall, **client.stats.snapshot()}
+    if trace_memory:
+        result["peak_memory"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result
+
+
+def run_benchmarks(figures: int = 3, latency: float = 0.05, jitter: float = 0.0,
+                   repeat: int = 3, seed: int = 0, only: List[str] = None) -> Dict:
+    """
+    Benchmark every phase with `figures` AI participants.
+
+    Wall times come from `repeat` untraced runs; peak memory from one extra
+    run under tracemalloc, so tracing overhead does not skew the timings.
+    """
+    names = config.HISTORICAL_FIGURES
+    if figures + 1 > len(names):
+        raise ValueError(f"At most {len(names) - 1} AI figures are available.")
+    user_figure, ai_figures = names[0], names[1:figures + 1]
+
+    report = {
+        "config": {
+            "figures": figures,
+            "latency": latency,
+            "jitter": jitter,
+            "repeat": repeat,
+            "seed": seed,
+            "llm_concurrency": config.LLM_CONCURRENCY,
+            "llm_prefetch": config.LLM_PREFETCH,
+            "llm_prefix_warmup": config.LLM_PREFIX_WARMUP,
+        },
+        "phases": {},
+    }
+    for name, run in _phases(user_figure, ai_figures).items():
+        if only and name not in only:
+            continue
+        policy = CannedPolicy(seed)
+        policy.start_game(user_figure, ai_figures)
+
+        runs = [_measure(run, policy, latency, jitter, seed, False) for _ in range(repeat)]
+        traced = _measure(run, policy, latency, jitter, seed, True)
+        walls = np.array([r["wall"] for r in runs])
+        report["phases"][name] = {
+            "wall_seconds": float(walls.mean()),
+            "wall_seconds_min": float(walls.min()),
+            "llm_calls": runs[-1]["calls"],
+            "prompt_tokens": runs[-1]["prompt_tokens"],
+            "cached_tokens": runs[-1]["cached_tokens"],
+            "completion_tokens": runs[-1]["completion_tokens"],
+            "peak_memory_bytes": traced["peak_memory"],
+        }
+    return report
+
+
+METRICS = ["wall_seconds", "llm_calls", "prompt_tokens", "completion_tokens", "peak_memory_bytes"]
+
+
+def compare(report: Dict, baseline: Dict, max_regression: float) -> List[str]:
+    """Print relative changes against `baseline`; return the regressions."""
+    regressions = []
+    print(f"\n{'phase':<22}{'metric':<20}{'baseline':>14}{'current':>14}{'change':>10}")
+    for name, metrics in report["phases"].items():
+        before = baseline.get("phases", {}).get(name)
+        if before is None:
+            continue
+        for metric in METRICS:
+            old, new = before.get(metric), metrics[metric]
+            if not old:
+                continue
+            change = (new - old) / old
+            print(f"{name:<22}{metric:<20}{old:>14.4g}{new:>14.4g}{change:>+10.1%}")
+            if change > max_regression:
+                regressions.append(f"{name}.{metric} {change:+.1%}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the game phases against a fake backend.")
+    parser.add_argument("--figures", type=int, default=3, help="number of AI figures")
+    parser.add_argument("--latency", type=float, default=0.05, help="fake backend mean latency (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="fake backend latency jitter (s)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per phase")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--phase", action="append", dest="only", help="benchmark only this phase")
+    parser.add_argument("--out", default=None, help="write the results as JSON to this file")
+    parser.add_argument("--baseline", default=None, help="earlier JSON results to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.10,
+                        help="relative growth that counts as a regression")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.figures, args.latency, args.jitter, args.repeat, args.seed, args.only)
+
+    print(f"{'phase':<22}{'wall (s)':>10}{'calls':>8}{'prompt tok':>12}{'cached tok':>12}"
+          f"{'compl tok':>11}{'peak KiB':>10}")
+    for name, m in report["phases"].items():
+        print(f"{name:<22}{m['wall_seconds']:>10.3f}{m['llm_calls']:>8}{m['prompt_tokens']:>12}"
+              f"{m['cached_tokens']:>12}{m['completion_tokens']:>11}{m['peak_memory_bytes'] / 1024:>10.0f}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.max_regression)
+        if regressions:
+            print("\nRegressions: " + ", ".join(regressions))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,89 @@
 GROQ_API_KEY = "<YOUR_GROQ_API_KEY>"
 MODEL_NAME = "llama-3.3-70b-specdec"
 
+# LLM client settings (shared by every phase through utils.llm)
+LLM_BACKEND = "groq"        # "groq", "openai" (any OpenAI-compatible endpoint) or "fake"
+LLM_API_URL = "https://api.groq.com/openai/v1/chat/completions"
+LLM_CONNECT_TIMEOUT = 5.0   # seconds to establish the connection
+LLM_READ_TIMEOUT = 60.0     # seconds to wait for the completion
+LLM_POOL_SIZE = 10          # keep-alive connections held open per host
+LLM_CONCURRENCY = 4         # independent LLM calls issued at once (1 = sequential)
+LLM_STREAMING = True        # render AI messages token by token as they arrive
+LLM_PREFETCH = True         # pre-generate AI turns while the player types or waits
+LLM_PREFIX_WARMUP = False   # opt-in for providers with prompt caching: send the first of several shared-prefix
+                            # requests alone so the rest hit the cache (otherwise it only delays the others)
+LLM_CACHE_SIZE = 0          # responses kept in the in-memory LRU (0 disables caching); for test and demo fleets,
+                            # study games need freshly sampled turns
+LLM_CACHE_INTROS = False    # let introductions be served from the cache (every game then repeats the same intros)
+LLM_CACHE_PATH = None       # sqlite file for a persistent cache tier, e.g. "llm_cache.db"
+LLM_RPM_LIMIT = None        # requests per minute allowed by the provider (Groq free tier: 30; None = no limit)
+LLM_TPM_LIMIT = None        # tokens per minute allowed by the provider (Groq free tier: 6000; None = no limit)
+LLM_MAX_RETRIES = 4         # retries of a request that hit a rate limit, server or connection error
+LLM_BACKOFF_BASE = 0.5      # seconds; retry n waits up to base * 2**(n-1), or longer if Retry-After says so
+LLM_BACKOFF_MAX = 20.0      # cap on a single backoff, in seconds
+
+# Introductions
+INTRO_MODE = "concurrent"   # "sequential": one call at a time; "concurrent": one call per figure, all at once;
+                            # "batched": one JSON call for every figure (individual calls for any it misses)
+
+# Q&A phase (phases.qna)
+QNA_BATCH_QUESTIONS = True  # each asker writes all its questions in one JSON call; AI answers run concurrently
+
+# Voting (see analysis.detector)
+VOTE_MODE = "llm"           # "llm": AI voters ask the model; "local": the local detector votes;
+                            # "hybrid": the detector votes when confident, the model otherwise
+DETECTOR_CONFIDENCE = 0.6   # detector probability a hybrid vote needs to skip the LLM
+DETECTOR_MODEL_PATH = None  # trained weights, e.g. "detector.json" (None = built-in rubric weights)
+
+# Pattern analysis (analysis.pattern_mining / analysis.stylometry)
+STYLOMETRY = False          # also track n-gram style similarity between participants
+STYLOMETRY_DIM = 4096       # width of the hashed n-gram vectors
+
+# Conversation histories (see utils.history)
+HISTORY_TOKEN_BUDGET = 2000 # estimated prompt tokens per call before old turns are summarized (None = unlimited)
+HISTORY_SUMMARY_TOKENS = 150 # length cap of the rolling summary that replaces them
+
+# Tracing
+TRACE_FILE = None           # write a Chrome/Perfetto trace of each game here, e.g. "trace.json"
+TRACE_LATENCY_TABLE = False # append a per-phase latency table to the pattern summary
+
+# Transcripts (see utils.transcript)
+TRANSCRIPT_DIR = None       # archive every game event as JSON lines in this directory, e.g. "transcripts"
+TRANSCRIPT_COMPRESSION = None # None, "gzip" or "zstd" (needs the zstandard package)
+TRANSCRIPT_MAX_BYTES = 64 * 2 ** 20 # start a new file once the current one is this big on disk
+TRANSCRIPT_FLUSH_INTERVAL = 1.0 # seconds a record may wait in memory before it is written
+TRANSCRIPT_BATCH_SIZE = 512 # records written per flush at most
+
+# Multi-session game server (server.py)
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 7777
+SERVER_MAX_SESSIONS = 200   # games played at once; further connections wait for a free slot
+SERVER_INPUT_TIMEOUT = 600  # seconds a session waits for the player's next line before hanging up
+
+# Per-role model routing (see utils.routing). Each role may set "model",
+# "max_tokens" and "temperature", and hedge slow requests with "hedge_after"
+# (seconds, or a percentile of recent latency such as "p95") and an optional
+# "hedge_model" for the backup. Anything left out uses the call's defaults.
+MODEL_ROUTES = {
+    "intro": {"model": MODEL_NAME},
+    "question": {"model": MODEL_NAME},  # e.g. a small fast model such as "llama-3.1-8b-instant"
+    "answer": {"model": MODEL_NAME},
+    "vote": {"model": MODEL_NAME},
+    "summary": {"model": MODEL_NAME},
+}
+LLM_HEDGE_AFTER = None      # default hedge threshold for every call (None = no hedging)
+
+# OpenAI-compatible local endpoint (LLM_BACKEND = "openai")
+LOCAL_LLM_URL = "http://localhost:8000/v1/chat/completions"
+LOCAL_LLM_API_KEY = None
+
+# In-process fake backend (LLM_BACKEND = "fake")
+FAKE_LLM_LATENCY = 0.5      # mean seconds per call
+FAKE_LLM_JITTER = 0.2       # +/- seconds, uniformly distributed
+FAKE_LLM_ERROR_RATE = 0.0   # probability that a call fails
+FAKE_LLM_SEED = None        # set for reproducible runs
+FAKE_LLM_PREFIX_CACHE = True # simulate provider prompt caching of repeated message prefixes
+
 # List of historical figures
 HISTORICAL_FIGURES = [
     "Albert Einstein",
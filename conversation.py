@@ -1,41 +1,23 @@
 # conversation.py
 
-import sys
-import requests
-from config import MODEL_NAME, GROQ_API_KEY
+from utils.llm import get_client, get_spoken_response
 
-def get_groq_response(model, system_prompt, conversation_history):
+def get_groq_response(model, system_prompt, conversation_history, cache=False, role=None):
     """
     Calls GROQ API to generate a response for the given conversation history
-    and system prompt. Returns the response text.
+    and system prompt. Returns the response text. With `cache`, an identical
+    earlier request may be answered from the response cache; `role` selects
+    a per-role route from MODEL_ROUTES. Raises LLMError once the client's
+    retries are used up; the caller decides how the game ends.
     """
-    # Convert conversation history to GROQ chat format
-    messages = [{"role": "system", "content": system_prompt}]
-    for message in conversation_history:
-        role = message['role'].lower()
-        if role == 'user':
-            messages.append({"role": "user", "content": message['content']})
-        else:
-            messages.append({"role": "assistant", "content": message['content']})
+    response = get_client().complete(model, system_prompt, conversation_history, max_tokens=None,
+                                     cache=cache, role=role)
+    return response.strip()
 
-    try:
-        response = requests.post(
-            "https://api.groq.com/openai/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {GROQ_API_KEY}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": model,
-                "messages": messages,
-                "temperature": 0.7
-            }
-        )
-        response.raise_for_status()
-        return response.json()['choices'][0]['message']['content'].strip()
-    except requests.exceptions.RequestException as e:
-        print(f"Error calling GROQ API: {e}")
-        sys.exit(1)
-    except (KeyError, ValueError) as e:
-        print(f"Error processing GROQ response: {e}")
-        sys.exit(1)
+def get_spoken_groq_response(name, model, system_prompt, conversation_history, cache=False, role=None):
+    """
+    Like get_groq_response, but prints the reply as `name` while it is
+    generated. Returns the response text.
+    """
+    return get_spoken_response(name, model, system_prompt, conversation_history, max_tokens=None,
+                               cache=cache, role=role)
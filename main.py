@@ -1,6 +1,9 @@
 # main.py
 
-from config import HISTORICAL_FIGURES
+import sys
+from contextlib import nullcontext
+
+from config import HISTORICAL_FIGURES, TRACE_FILE, TRACE_LATENCY_TABLE
 from utils import assign_figures
 from utils.formatting import (
     clear_screen,
@@ -9,7 +12,8 @@ from utils.formatting import (
     print_system_message,
     print_user_prompt,
     print_ai_message,
-    print_result
+    print_result,
+    print_phase
 )
 from phases.introductions import introductions
 from phases.notify import notify_imposter
@@ -19,6 +23,10 @@ from phases.quick_game import play_quick_game
 from phases.full_game import play_full_game
 from characters import select_characters
 from analysis.pattern_mining import PatternAnalyzer
+from utils.timing import phase
+from utils.tracing import Tracer, tracing
+from utils.transcript import transcript_game
+from utils.backends import LLMError
 
 def display_welcome():
     clear_screen()
@@ -67,7 +75,8 @@ def play_full_game(user_figure, ai_figures, pattern_analyzer):
     
     # 1) Introductions
     print_phase("Phase 1: Introductions")
-    introductions(ai_figures, conversations)
+    with phase("introductions"):
+        introductions(ai_figures, conversations)
     dramatic_pause()
     
     # 2) Notify about the imposter
@@ -82,7 +91,8 @@ def play_full_game(user_figure, ai_figures, pattern_analyzer):
         "When answering, try to convince others you're an AI."
     )
     dramatic_pause()
-    qna_phase(user_figure, ai_figures, conversations)
+    with phase("qna"):
+        qna_phase(user_figure, ai_figures, conversations)
     
     # 4) Voting Phase
     print_phase("Phase 3: Voting")
@@ -91,10 +101,18 @@ def play_full_game(user_figure, ai_figures, pattern_analyzer):
         "Choose wisely!"
     )
     dramatic_pause()
-    voting_phase(user_figure, ai_figures, conversations)
+    with phase("voting"):
+        voting_phase(user_figure, ai_figures, conversations, pattern_analyzer)
 
-def main():
-    """Main game loop."""
+def run_study(tracer=None):
+    """
+    One participant's whole study: character assignment, mode choice, the
+    game and the pattern summary. All I/O goes through the active game IO,
+    so the server can run many of these at once (see server.py).
+    
+    Args:
+        tracer: Tracer to record the game itself with, if any
+    """
     # Display welcome banner
     print_system_message(
         "============================================================\n"
@@ -135,7 +153,7 @@ def main():
     )
     
     while True:
-        choice = input("\nChoice (You): Enter 1 or 2: ")
+        choice = print_user_prompt("Choice", "Enter 1 or 2: ").strip()
         if choice in ['1', '2']:
             break
         print_system_message("Please enter either 1 or 2.")
@@ -144,28 +162,45 @@ def main():
     human_figure = human_character['name']
     ai_figures = [char['name'] for char in ai_characters]
     
-    if choice == '1':
-        print_system_message(
-            "\n[Quick Study Mode]\n" +
-            "-" * 40 + "\n\n"
-            "In this mode, you'll provide a brief introduction as your character.\n"
-            "The AI participants will analyze communication patterns to identify the human.\n"
-        )
-        play_quick_game(human_figure, ai_figures, pattern_analyzer)
-    else:
-        print_system_message(
-            "\n[Full Study Mode]\n" +
-            "-" * 40 + "\n\n"
-            "This mode includes extended interaction through Q&A.\n"
-            "AI participants will conduct deeper analysis of communication patterns.\n"
-        )
-        play_full_game(human_figure, ai_figures, pattern_analyzer)
+    # Trace the game itself; setup above is spent waiting on the player
+    mode = "quick" if choice == '1' else "full"
+    with tracing(tracer) if tracer is not None else nullcontext(), \
+            transcript_game(mode, human_figure, ai_figures):
+        if choice == '1':
+            print_system_message(
+                "\n[Quick Study Mode]\n" +
+                "-" * 40 + "\n\n"
+                "In this mode, you'll provide a brief introduction as your character.\n"
+                "The AI participants will analyze communication patterns to identify the human.\n"
+            )
+            play_quick_game(human_figure, ai_figures, pattern_analyzer)
+        else:
+            print_system_message(
+                "\n[Full Study Mode]\n" +
+                "-" * 40 + "\n\n"
+                "This mode includes extended interaction through Q&A.\n"
+                "AI participants will conduct deeper analysis of communication patterns.\n"
+            )
+            play_full_game(human_figure, ai_figures, pattern_analyzer)
     
     # Generate and display pattern analysis
     print_system_message("\n🔍 Analyzing communication patterns...")
     dramatic_pause()
-    summary = pattern_analyzer.generate_summary()
+    summary = pattern_analyzer.generate_summary(tracer if TRACE_LATENCY_TABLE else None)
     print_result(summary, success=True)
 
+def main():
+    """Main game loop."""
+    tracer = Tracer() if TRACE_FILE or TRACE_LATENCY_TABLE else None
+    try:
+        run_study(tracer)
+    except LLMError as e:
+        print_result(f"The study had to stop: {e}", success=False)
+        sys.exit(1)
+    
+    if TRACE_FILE:
+        tracer.export_chrome_trace(TRACE_FILE)
+        print_system_message(f"Trace written to {TRACE_FILE}")
+
 if __name__ == "__main__":
     main()
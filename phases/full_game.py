@@ -1,7 +1,12 @@
 """
 Full game mode implementation with Q&A rounds.
 """
-from config import MODEL_NAME
+import contextvars
+import queue
+import threading
+from concurrent.futures import Future
+
+from config import LLM_CONCURRENCY, LLM_PREFETCH, MODEL_NAME
 from utils.formatting import (
     dramatic_pause,
     print_system_message,
@@ -9,130 +14,307 @@ from utils.formatting import (
     print_ai_message,
     print_result
 )
-from utils.llm import get_groq_response
+from utils.history import fit_history
+from utils.llm import LiveResponse, get_groq_response, get_spoken_response
+from utils.prefetch import Prefetcher
+from utils.scheduler import TurnScheduler
+from utils.timing import phase
+from utils.transcript import log_event
 from .quick_game import quick_introductions, quick_voting
 
-def qna_round(user_figure, ai_figures, conversations, pattern_analyzer, round_num):
-    """Run a Q&A round where each figure asks and answers questions."""
-    print_system_message(f"\n📝 Q&A Round {round_num}")
-    dramatic_pause()
+QUESTION_PROMPT = (
+    "Ask an insightful question to one of the other participants. "
+    "The question should help determine if they are human or AI. "
+    "Format: 'Target|Question'"
+)
+
+class _Turn:
+    """One asker's turn in a scheduled Q&A round."""
+    def __init__(self, asker):
+        self.asker = asker
+        self.target = None
+        self.question = None
+        self.invalid = None          # skip message when the turn is dropped
+        self.answer = None           # Future for an AI target's answer
+        self.live = LiveResponse()   # the answer as it streams in
+        self.human_input = Future()  # (target, question) typed by the user
+        self.planned = threading.Event()
+        self.error = None
+
+def _question_request(asker, conversations):
+    """The message list an AI asker generates its question from."""
+    return conversations.get(asker, []) + [{'role': 'user', 'content': QUESTION_PROMPT}]
+
+def _generate_question(request):
+    """Generate a question from a `_question_request`, within the token budget."""
+    return get_groq_response(MODEL_NAME, "", fit_history(request), role="question")
+
+def _ask_question(asker, conversations, prefetcher=None):
+    """
+    Have an AI asker pick a target; returns (target, question) or None.
+    A matching prefetched question is used when `prefetcher` has one.
+    """
+    request = _question_request(asker, conversations)
+    if prefetcher is not None:
+        response = prefetcher.take(asker, request, _generate_question, request)
+    else:
+        response = _generate_question(request)
+    conversations.get(asker, []).append(request[-1])
+    
+    try:
+        target, question = response.strip().split('|')
+    except ValueError:
+        return None
+    return target.strip(), question.strip()
+
+def _answer_question(asker, target, question, conversations, speak=False, live=None):
+    """
+    Have an AI target answer a question and record the exchange.
+    With `speak`, the answer is printed (streamed) while it is generated;
+    with `live`, it is generated into that `LiveResponse` for the presenter.
+    """
+    target_history = conversations.get(target, [])
+    target_history.append({
+        'role': 'user',
+        'content': f"Question from {asker}: {question}"
+    })
+    
+    if speak:
+        answer = get_spoken_response(target, MODEL_NAME, "", fit_history(target_history), role="answer")
+    elif live is not None:
+        answer = live.generate(MODEL_NAME, "", fit_history(target_history), role="answer")
+    else:
+        answer = get_groq_response(MODEL_NAME, "", fit_history(target_history), role="answer")
     
+    target_history.append({
+        'role': 'assistant',
+        'content': answer
+    })
+    conversations[target] = target_history
+    return answer
+
+def _record_user_question(asker, question, conversations):
+    """Store a question typed by the user in their own history."""
+    if asker not in conversations:
+        conversations[asker] = []
+    conversations[asker].append({
+        'role': 'user',
+        'content': question
+    })
+
+def _prefetch_questions(askers, conversations, prefetcher):
+    """
+    Start question generation for upcoming AI askers. An asker whose history
+    changed since its last prefetch (because it was questioned in the
+    meantime) has the stale request replaced.
+    """
+    for asker in askers:
+        request = _question_request(asker, conversations)
+        prefetcher.start(asker, request, _generate_question, request)
+
+def _sequential_qna_round(user_figure, ai_figures, conversations, pattern_analyzer):
+    """Run every turn of a Q&A round strictly one after another."""
     all_figures = ai_figures + [user_figure]
     
-    # Each figure gets to ask a question
-    for asker in all_figures:
-        if asker == user_figure:
-            print_system_message("\nYour turn to ask a question!")
-            target = print_user_prompt(asker, "Who would you like to question? ")
-            question = print_user_prompt(asker, "Your question: ")
+    prefetcher = Prefetcher() if LLM_PREFETCH else None
+    try:
+        # Each figure gets to ask a question
+        for turn, asker in enumerate(all_figures):
+            if prefetcher is not None:
+                _prefetch_questions(
+                    [f for f in all_figures[turn:] if f != user_figure], conversations, prefetcher
+                )
             
-            if target not in all_figures:
-                print_system_message("Invalid target. Skipping...")
-                continue
+            if asker == user_figure:
+                print_system_message("\nYour turn to ask a question!")
+                target = print_user_prompt(asker, "Who would you like to question? ")
+                question = print_user_prompt(asker, "Your question: ")
                 
-            pattern_analyzer.analyze_response(asker, question)
-            
-            # Store the question
-            if asker not in conversations:
-                conversations[asker] = []
-            conversations[asker].append({
-                'role': 'user',
-                'content': question
-            })
-            
-            # Get the answer
-            if target == user_figure:
-                print_system_message(f"\n{target}, please answer the question:")
-                answer = print_user_prompt(target, "Your answer: ")
-                pattern_analyzer.analyze_response(target, answer)
+                if target not in all_figures:
+                    print_system_message("Invalid target. Skipping...")
+                    continue
+                    
+                log_event("question", player=asker, target=target, text=question)
+                pattern_analyzer.analyze_response(asker, question)
+                _record_user_question(asker, question, conversations)
             else:
-                # AI answers
-                history = conversations.get(target, [])
-                history.append({
-                    'role': 'user',
-                    'content': f"Question from {asker}: {question}"
-                })
+                # AI asks a question
+                parsed = _ask_question(asker, conversations, prefetcher)
+                if parsed is None:
+                    print_system_message(f"Invalid response from {asker}. Skipping...")
+                    continue
                 
-                answer = get_groq_response(MODEL_NAME, "", history)
-                pattern_analyzer.analyze_response(target, answer)
-                print_ai_message(target, answer)
+                target, question = parsed
+                if target not in all_figures or target == asker:
+                    print_system_message(f"Invalid target from {asker}. Skipping...")
+                    continue
                 
-                history.append({
-                    'role': 'assistant',
-                    'content': answer
-                })
-                conversations[target] = history
-            
-            dramatic_pause()
-        else:
-            # AI asks a question
-            history = conversations.get(asker, [])
-            
-            # Generate a question
-            question_prompt = (
-                "Ask an insightful question to one of the other participants. "
-                "The question should help determine if they are human or AI. "
-                "Format: 'Target|Question'"
-            )
-            
-            history.append({'role': 'user', 'content': question_prompt})
-            response = get_groq_response(MODEL_NAME, "", history)
-            
-            try:
-                target, question = response.strip().split('|')
-                target = target.strip()
-                question = question.strip()
-            except ValueError:
-                print_system_message(f"Invalid response from {asker}. Skipping...")
-                continue
-            
-            if target not in all_figures or target == asker:
-                print_system_message(f"Invalid target from {asker}. Skipping...")
-                continue
-            
-            print_ai_message(asker, f"Question for {target}: {question}")
-            pattern_analyzer.analyze_response(asker, question)
+                print_ai_message(asker, f"Question for {target}: {question}")
+                log_event("question", player=asker, target=target, text=question)
+                pattern_analyzer.analyze_response(asker, question)
             
             # Get the answer
             if target == user_figure:
                 print_system_message(f"\n{target}, please answer the question:")
                 answer = print_user_prompt(target, "Your answer: ")
+                log_event("answer", player=target, asker=asker, text=answer)
                 pattern_analyzer.analyze_response(target, answer)
             else:
-                # AI answers
-                target_history = conversations.get(target, [])
-                target_history.append({
-                    'role': 'user',
-                    'content': f"Question from {asker}: {question}"
-                })
-                
-                answer = get_groq_response(MODEL_NAME, "", target_history)
+                answer = _answer_question(asker, target, question, conversations, speak=True)
+                log_event("answer", player=target, asker=asker, text=answer)
                 pattern_analyzer.analyze_response(target, answer)
-                print_ai_message(target, answer)
-                
-                target_history.append({
-                    'role': 'assistant',
-                    'content': answer
-                })
-                conversations[target] = target_history
             
             dramatic_pause()
+    finally:
+        if prefetcher is not None:
+            prefetcher.shutdown()
+
+def _plan_turns(user_figure, all_figures, conversations, scheduler, turns, stopped):
+    """
+    Submit every turn of the round to the scheduler, in transcript order.
+
+    Runs on its own thread so that AI exchanges are already in flight while
+    the presenter is still printing earlier turns or waiting for the user.
+    A turn's answer can only be scheduled once its target is known, so this
+    waits on each question (or on the user's input) before moving on.
+    Stops early once `stopped` is set.
+    """
+    for asker in all_figures:
+        if stopped.is_set():
+            return
+        turn = _Turn(asker)
+        turns.put(turn)
+        try:
+            if asker == user_figure:
+                target, question = turn.human_input.result()
+                if target not in all_figures:
+                    turn.invalid = "Invalid target. Skipping..."
+                    continue
+                scheduler.submit([asker], _record_user_question, asker, question, conversations)
+            else:
+                parsed = scheduler.submit([asker], _ask_question, asker, conversations).result()
+                if parsed is None:
+                    turn.invalid = f"Invalid response from {asker}. Skipping..."
+                    continue
+                target, question = parsed
+                if target not in all_figures or target == asker:
+                    turn.invalid = f"Invalid target from {asker}. Skipping..."
+                    continue
+            
+            turn.target, turn.question = target, question
+            if target != user_figure:
+                turn.answer = scheduler.submit(
+                    [target], _answer_question, asker, target, question, conversations, False, turn.live
+                )
+        except Exception as e:
+            turn.error = e
+            return
+        finally:
+            turn.planned.set()
+
+def _scheduled_qna_round(user_figure, ai_figures, conversations, pattern_analyzer):
+    """
+    Run a Q&A round with independent AI exchanges overlapping each other.
+
+    Turns are modelled as tasks on per-figure history lanes (see
+    `utils.scheduler.TurnScheduler`); the transcript is still printed in
+    exactly the order of the sequential round.
+    """
+    all_figures = ai_figures + [user_figure]
+    turns = queue.Queue()
+    stopped = threading.Event()
+    turn = None
+    
+    with TurnScheduler() as scheduler:
+        # The planner runs in a copy of this context so its LLM calls are
+        # traced under the current phase
+        planner = threading.Thread(
+            target=contextvars.copy_context().run,
+            args=(_plan_turns, user_figure, all_figures, conversations, scheduler, turns, stopped),
+            daemon=True
+        )
+        planner.start()
+        try:
+            for asker in all_figures:
+                turn = turns.get()
+                if asker == user_figure:
+                    print_system_message("\nYour turn to ask a question!")
+                    target = print_user_prompt(asker, "Who would you like to question? ")
+                    question = print_user_prompt(asker, "Your question: ")
+                    turn.human_input.set_result((target, question))
+                
+                turn.planned.wait()
+                if turn.error is not None:
+                    raise turn.error
+                if turn.invalid:
+                    print_system_message(turn.invalid)
+                    continue
+                
+                target, question = turn.target, turn.question
+                if asker != user_figure:
+                    print_ai_message(asker, f"Question for {target}: {question}")
+                log_event("question", player=asker, target=target, text=question)
+                pattern_analyzer.analyze_response(asker, question)
+                
+                # Get the answer
+                if target == user_figure:
+                    print_system_message(f"\n{target}, please answer the question:")
+                    answer = print_user_prompt(target, "Your answer: ")
+                    log_event("answer", player=target, asker=asker, text=answer)
+                    pattern_analyzer.analyze_response(target, answer)
+                else:
+                    answer = turn.live.speak(target, turn.answer)
+                    log_event("answer", player=target, asker=asker, text=answer)
+                    pattern_analyzer.analyze_response(target, answer)
+                
+                dramatic_pause()
+        finally:
+            # If the round ended early (an answer failed, the player left),
+            # release a planner still waiting on the user's input and let it
+            # finish before the scheduler shuts down
+            stopped.set()
+            if turn is not None:
+                turn.human_input.cancel()
+            while planner.is_alive():
+                try:
+                    while True:
+                        turns.get_nowait().human_input.cancel()
+                except queue.Empty:
+                    pass
+                planner.join(0.05)
+        scheduler.wait()
+
+def qna_round(user_figure, ai_figures, conversations, pattern_analyzer, round_num):
+    """Run a Q&A round where each figure asks and answers questions."""
+    print_system_message(f"\n📝 Q&A Round {round_num}")
+    dramatic_pause()
+    
+    if LLM_CONCURRENCY > 1:
+        _scheduled_qna_round(user_figure, ai_figures, conversations, pattern_analyzer)
+    else:
+        _sequential_qna_round(user_figure, ai_figures, conversations, pattern_analyzer)
     
     return conversations
 
 def play_full_game(user_figure, ai_figures, pattern_analyzer):
-    """Play a full game with introductions, Q&A rounds, and voting."""
+    """
+    Play a full game with introductions, Q&A rounds, and voting.
+    Returns the votes cast and the AI detection accuracy (percent).
+    """
     # Start with introductions
-    conversations = quick_introductions(user_figure, ai_figures, pattern_analyzer)
+    with phase("introductions"):
+        conversations = quick_introductions(user_figure, ai_figures, pattern_analyzer)
     dramatic_pause(2)
     
     # Run 2 rounds of Q&A
     for round_num in range(1, 3):
-        conversations = qna_round(user_figure, ai_figures, conversations, pattern_analyzer, round_num)
+        with phase(f"qna_round_{round_num}"):
+            conversations = qna_round(user_figure, ai_figures, conversations, pattern_analyzer, round_num)
         dramatic_pause(2)
     
     # Final voting phase
-    votes, reasons = quick_voting(user_figure, ai_figures, conversations, pattern_analyzer)
+    with phase("voting"):
+        votes, reasons = quick_voting(user_figure, ai_figures, conversations, pattern_analyzer)
     
     # Print voting results with analysis
     print_system_message("\n🔍 Pattern Analysis Complete!")
@@ -157,6 +339,7 @@ def play_full_game(user_figure, ai_figures, pattern_analyzer):
     # Calculate detection accuracy
     ai_voters = len(ai_figures)
     accuracy = (correct_votes / ai_voters) * 100
+    log_event("result", votes=votes, accuracy=accuracy)
     
     if accuracy > 66:
         print_result(
@@ -179,3 +362,5 @@ def play_full_game(user_figure, ai_figures, pattern_analyzer):
             "Your communication patterns closely matched AI behavior.",
             success=True
         )
+    
+    return votes, accuracy
@@ -1,33 +1,83 @@
 # phases/introductions.py
 
-from conversation import get_groq_response
-from config import MODEL_NAME
-from utils.formatting import print_ai_message, dramatic_pause
+from concurrent.futures import ThreadPoolExecutor
+from conversation import get_groq_response, get_spoken_groq_response
+from config import INTRO_MODE, LLM_CACHE_INTROS, LLM_CONCURRENCY, MODEL_NAME
+from utils.formatting import dramatic_pause, print_ai_message
+from utils.llm import LiveResponse
+from utils.parallel import submit
+from utils.structured import name_map_instruction, parse_name_map
+from utils.transcript import log_event
+
+INTRO_PROMPT = 'Introduce yourself briefly in 2-3 sentences, highlighting your most significant achievement.'
+
+def _introduce(figure, live):
+    """One figure's introduction, generated into `live` (a `LiveResponse`) without printing it."""
+    system_prompt = f"You are {figure}, a historical figure."
+    history = [{'role': 'User', 'content': INTRO_PROMPT}]
+    return live.generate(MODEL_NAME, system_prompt, history, max_tokens=None, cache=LLM_CACHE_INTROS,
+                         role="intro")
+
+def _batched_introductions(ai_figures):
+    """
+    One JSON call for every figure's introduction; figures the reply
+    misses are left out.
+    """
+    request = [{'role': 'User', 'content': (
+        f"Write an introduction for each of: {', '.join(ai_figures)}. Each is 2-3 sentences in that "
+        "figure's own voice, highlighting their most significant achievement.\n"
+        + name_map_instruction("introduction")
+    )}]
+    return parse_name_map(
+        get_groq_response(MODEL_NAME, "You write in-character introductions of historical figures.",
+                          request, cache=LLM_CACHE_INTROS, role="intro"),
+        ai_figures
+    )
 
 def introductions(ai_figures, conversations):
     """
     The introduction phase: each AI figure introduces themselves briefly.
+    INTRO_MODE picks how the introductions are generated: one at a time as
+    each is due ("sequential"), one call per figure all at once
+    ("concurrent"), or one JSON call for all of them ("batched") with
+    individual calls for any figure it misses. An introduction the player
+    reaches while it is still being generated is streamed.
     """
-    for idx, figure in enumerate(ai_figures, 1):
-        system_prompt = f"You are {figure}, a historical figure."
-        conversation_history = []
-        
-        # The user asks them to introduce themselves
-        conversation_history.append({
-            'role': 'User', 
-            'content': 'Introduce yourself briefly in 2-3 sentences, highlighting your most significant achievement.'
-        })
-        
-        response = get_groq_response(MODEL_NAME, system_prompt, conversation_history)
-        
-        print_ai_message(figure, response)
-        dramatic_pause()
-        
-        # Update conversation history
-        conversation_history.append({
-            'role': 'Assistant', 
-            'content': response
-        })
+    intros = _batched_introductions(ai_figures) if INTRO_MODE == "batched" else {}
+    lives = {figure: LiveResponse() for figure in ai_figures}
+    
+    with ThreadPoolExecutor(max_workers=max(1, LLM_CONCURRENCY)) as executor:
+        pending = {}
+        if INTRO_MODE != "sequential":
+            pending = {figure: submit(executor, _introduce, figure, lives[figure])
+                       for figure in ai_figures if figure not in intros}
         
-        # Store this conversation history
-        conversations[figure] = conversation_history
+        for idx, figure in enumerate(ai_figures, 1):
+            system_prompt = f"You are {figure}, a historical figure."
+            conversation_history = []
+            
+            # The user asks them to introduce themselves
+            conversation_history.append({
+                'role': 'User', 
+                'content': INTRO_PROMPT
+            })
+            
+            if figure in intros:
+                response = intros[figure]
+                print_ai_message(figure, response)
+            elif figure in pending:
+                response = lives[figure].speak(figure, pending[figure])
+            else:
+                response = get_spoken_groq_response(figure, MODEL_NAME, system_prompt, conversation_history,
+                                                    cache=LLM_CACHE_INTROS, role="intro")
+            log_event("intro", player=figure, text=response)
+            dramatic_pause()
+            
+            # Update conversation history
+            conversation_history.append({
+                'role': 'Assistant', 
+                'content': response
+            })
+            
+            # Store this conversation history
+            conversations[figure] = conversation_history
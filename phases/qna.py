@@ -1,20 +1,104 @@
 # phases/qna.py
 
 import random
-from conversation import get_groq_response
-from config import MODEL_NAME
+from concurrent.futures import ThreadPoolExecutor
+from conversation import get_groq_response, get_spoken_groq_response
+from config import LLM_CONCURRENCY, MODEL_NAME, QNA_BATCH_QUESTIONS
+from utils.history import fit_history
+from utils.llm import LiveResponse
 from utils.formatting import (
-    print_ai_message, print_user_prompt,
+    print_user_prompt,
+    print_ai_message,
     print_system_message, dramatic_pause
 )
+from utils.parallel import submit
+from utils.structured import name_map_instruction, parse_name_map
+from utils.transcript import log_event
+
+def _question_prompt(respondent):
+    return f"Ask a thought-provoking question to {respondent} that could help determine if they are human. Make it challenging but specific to their historical context."
+
+def _batch_question_prompt(respondents):
+    names = ", ".join(respondents)
+    return (
+        f"Ask one thought-provoking question to each of: {names}. Each question should help "
+        "determine if they are human. Make them challenging but specific to each person's historical context.\n"
+        + name_map_instruction("question")
+    )
+
+def _answer(respondent, question, conversations, live):
+    """
+    Have an AI respondent answer a question into `live` (a `LiveResponse`)
+    and record the exchange.
+    """
+    respondent_history = conversations.get(respondent, [])
+    respondent_history.append({'role': 'User', 'content': question})
+    system_prompt_respondent = f"You are {respondent}, a historical figure."
+    answer = live.generate(MODEL_NAME, system_prompt_respondent, fit_history(respondent_history),
+                           max_tokens=None, role="answer")
+    respondent_history.append({'role': 'Assistant', 'content': answer})
+    conversations[respondent] = respondent_history
+    return answer
+
+def _batched_turn(asker, respondents, user_figure, conversations, executor):
+    """
+    One asker's turn with a single question-generation call: the asker
+    writes every question at once as JSON (a respondent it skipped gets a
+    question of its own), then the AI respondents answer concurrently while
+    the questions are presented in order.
+    """
+    asker_history = conversations.get(asker, [])
+    system_prompt_asker = f"You are {asker}, a historical figure."
+    asker_history.append({'role': 'User', 'content': _batch_question_prompt(respondents)})
+    questions = parse_name_map(
+        get_groq_response(MODEL_NAME, system_prompt_asker, fit_history(asker_history), role="question"),
+        respondents
+    )
+    for respondent in respondents:
+        if respondent not in questions:
+            request = asker_history[:-1] + [{'role': 'User', 'content': _question_prompt(respondent)}]
+            questions[respondent] = get_groq_response(MODEL_NAME, system_prompt_asker, fit_history(request),
+                                                      role="question")
+    asker_history.append({
+        'role': 'Assistant',
+        'content': "\n".join(f"{respondent}: {questions[respondent]}" for respondent in respondents)
+    })
+    conversations[asker] = asker_history
+    
+    lives = {respondent: LiveResponse() for respondent in respondents if respondent != user_figure}
+    answers = {
+        respondent: submit(executor, _answer, respondent, questions[respondent], conversations, live)
+        for respondent, live in lives.items()
+    }
+    for respondent in respondents:
+        print_ai_message(asker, f"Question for {respondent}: {questions[respondent]}")
+        log_event("question", player=asker, target=respondent, text=questions[respondent])
+        dramatic_pause()
+        if respondent == user_figure:
+            answer = print_user_prompt(respondent, "Your answer: ")
+        else:
+            # Streamed if it is still being generated
+            answer = lives[respondent].speak(respondent, answers[respondent])
+            dramatic_pause()
+        log_event("answer", player=respondent, asker=asker, text=answer)
 
 def qna_phase(user_figure, ai_figures, conversations):
     """
     In the Q&A Phase, each figure (AI or user) asks one question to every other figure.
+    With QNA_BATCH_QUESTIONS, each asker generates all of its questions in one call.
     """
     all_figures = ai_figures + [user_figure]
     random.shuffle(all_figures)
     
+    if QNA_BATCH_QUESTIONS:
+        with ThreadPoolExecutor(max_workers=max(1, LLM_CONCURRENCY)) as executor:
+            for asker in all_figures:
+                print_system_message(f"{asker}'s turn to ask questions")
+                dramatic_pause()
+                respondents = [f for f in all_figures if f != asker]
+                _batched_turn(asker, respondents, user_figure, conversations, executor)
+        return
+    
     for asker in all_figures:
         print_system_message(f"{asker}'s turn to ask questions")
         dramatic_pause()
@@ -28,21 +112,22 @@ def qna_phase(user_figure, ai_figures, conversations):
                 respondent_history = conversations.get(respondent, [])
                 
                 # Generate a question
-                question_prompt = f"Ask a thought-provoking question to {respondent} that could help determine if they are human. Make it challenging but specific to their historical context."
+                question_prompt = _question_prompt(respondent)
                 asker_history.append({'role': 'User', 'content': question_prompt})
                 
                 system_prompt_asker = f"You are {asker}, a historical figure."
-                question_text = get_groq_response(
+                question_text = get_spoken_groq_response(
+                    asker,
                     MODEL_NAME, 
                     system_prompt_asker, 
-                    asker_history
+                    fit_history(asker_history),
+                    role="question"
                 )
-                
-                print_ai_message(asker, question_text)
                 dramatic_pause()
                 
                 # AI's own answer to the question
                 asker_history.append({'role': 'Assistant', 'content': question_text})
+                log_event("question", player=asker, target=respondent, text=question_text)
                 
                 # If respondent is the user
                 if respondent == user_figure:
@@ -52,17 +137,20 @@ def qna_phase(user_figure, ai_figures, conversations):
                     respondent_history.append({'role': 'User', 'content': question_text})
                     system_prompt_respondent = f"You are {respondent}, a historical figure."
                     
-                    answer = get_groq_response(
+                    answer = get_spoken_groq_response(
+                        respondent,
                         MODEL_NAME, 
                         system_prompt_respondent, 
-                        respondent_history
+                        fit_history(respondent_history),
+                        role="answer"
                     )
-                    print_ai_message(respondent, answer)
                     dramatic_pause()
                     
                     # Update respondent conversation
                     respondent_history.append({'role': 'Assistant', 'content': answer})
                     conversations[respondent] = respondent_history
                 
+                log_event("answer", player=respondent, asker=asker, text=answer)
+                
                 # Update asker conversation
                 conversations[asker] = asker_history
@@ -1,7 +1,10 @@
 """
 Quick game mode implementation.
 """
-from config import MODEL_NAME
+import threading
+
+from analysis.detector import local_votes
+from config import INTRO_MODE, LLM_CACHE_INTROS, LLM_PREFETCH, LLM_PREFIX_WARMUP, MODEL_NAME
 from utils.formatting import (
     dramatic_pause,
     print_system_message,
@@ -9,125 +12,256 @@ from utils.formatting import (
     print_ai_message,
     print_result
 )
-from utils.llm import get_groq_response
+from utils.llm import LiveResponse, get_groq_response
+from utils.parallel import run_concurrently
+from utils.prefetch import Prefetcher
+from utils.structured import name_map_instruction, parse_name_map
+from utils.timing import phase
+from utils.transcript import log_event
 
 class PatternAnalyzer:
     def analyze_response(self, figure, response):
         # TO DO: implement pattern analysis logic here
         pass
 
+def _ai_introduction(figure, live=None):
+    """Generate one AI figure's introduction, into `live` if given (see `utils.llm.LiveResponse`)."""
+    history = [{'role': 'system', 'content': f"You are {figure}. Give a brief, one-paragraph introduction of yourself and share one interesting or controversial fact. Keep it concise and natural, as if speaking in a casual conversation. Do not be overly formal or verbose."}]
+    if live is not None:
+        return live.generate(MODEL_NAME, "", history, cache=LLM_CACHE_INTROS, role="intro")
+    return get_groq_response(MODEL_NAME, "", history, cache=LLM_CACHE_INTROS, role="intro")
+
+def _batched_introductions(ai_figures):
+    """
+    Generate every AI introduction in one JSON call. Figures the reply
+    misses or gets wrong are introduced individually (concurrently).
+    """
+    names = ", ".join(ai_figures)
+    request = [{'role': 'user', 'content': (
+        f"Write an introduction for each of: {names}. Each is a brief, one-paragraph introduction "
+        "in that figure's own voice that shares one interesting or controversial fact. Keep each "
+        "concise and natural, as if speaking in a casual conversation. Do not be overly formal or verbose.\n"
+        + name_map_instruction("introduction")
+    )}]
+    intros = parse_name_map(get_groq_response(MODEL_NAME, "", request, max_tokens=None,
+                                              cache=LLM_CACHE_INTROS, role="intro"), ai_figures)
+    missing = [figure for figure in ai_figures if figure not in intros]
+    intros.update(zip(missing, run_concurrently([lambda f=f: _ai_introduction(f) for f in missing])))
+    return intros
+
 def quick_introductions(user_figure, ai_figures, pattern_analyzer):
-    """Quick introduction phase where everyone shares a brief intro and fact."""
+    """
+    Quick introduction phase where everyone shares a brief intro and fact.
+    INTRO_MODE picks how the AI introductions are generated.
+    """
     conversations = {}
+    lives = {figure: LiveResponse() for figure in ai_figures}
     
-    print_system_message("Each figure will introduce themselves and share an interesting fact!")
-    dramatic_pause()
-    
-    # User's turn first
-    print_system_message(f"\nYou are {user_figure}. Introduce yourself and share an interesting fact!")
-    print_system_message("Try to be engaging and maybe a bit controversial - but stay in character!")
-    
-    user_intro = print_user_prompt(user_figure, "Your introduction: ")
-    conversations[user_figure] = [{'role': 'assistant', 'content': user_intro}]
-    pattern_analyzer.analyze_response(user_figure, user_intro)
-    dramatic_pause()
-    
-    # AI introductions
-    for figure in ai_figures:
-        history = [{'role': 'system', 'content': f"You are {figure}. Give a brief, one-paragraph introduction of yourself and share one interesting or controversial fact. Keep it concise and natural, as if speaking in a casual conversation. Do not be overly formal or verbose."}]
-        intro = get_groq_response(MODEL_NAME, "", history)
-        conversations[figure] = [{'role': 'assistant', 'content': intro}]
-        pattern_analyzer.analyze_response(figure, intro)
-        print_ai_message(figure, intro)
+    with Prefetcher() as prefetcher:
+        # AI introductions depend on nothing the user says, so with
+        # prefetching they are generated while the user is still typing.
+        def start_ai_intros():
+            if INTRO_MODE == "batched":
+                prefetcher.start("introductions", ai_figures, _batched_introductions, ai_figures)
+            elif INTRO_MODE == "concurrent":
+                for figure in ai_figures:
+                    prefetcher.start(figure, figure, _ai_introduction, figure, lives[figure])
+        
+        if LLM_PREFETCH:
+            start_ai_intros()
+        
+        print_system_message("Each figure will introduce themselves and share an interesting fact!")
+        dramatic_pause()
+        
+        # User's turn first
+        print_system_message(f"\nYou are {user_figure}. Introduce yourself and share an interesting fact!")
+        print_system_message("Try to be engaging and maybe a bit controversial - but stay in character!")
+        
+        user_intro = print_user_prompt(user_figure, "Your introduction: ")
+        conversations[user_figure] = [{'role': 'assistant', 'content': user_intro}]
+        log_event("intro", player=user_figure, text=user_intro)
+        pattern_analyzer.analyze_response(user_figure, user_intro)
+        
+        # AI introductions are independent, so they are all requested at once
+        # (except in sequential mode, where each is requested when it is due)
+        start_ai_intros()
         dramatic_pause()
+        
+        batch = None
+        if INTRO_MODE == "batched":
+            batch = prefetcher.take("introductions", ai_figures, _batched_introductions, ai_figures)
+        
+        for figure in ai_figures:
+            if batch is not None:
+                intro = batch[figure]
+                print_ai_message(figure, intro)
+            else:
+                # Streamed if the player reaches it while it is still being generated
+                live = lives[figure]
+                if INTRO_MODE == "sequential":
+                    prefetcher.start(figure, figure, _ai_introduction, figure, live)
+                intro = live.speak(figure, prefetcher.take_future(figure, figure, _ai_introduction, figure, live))
+            conversations[figure] = [{'role': 'assistant', 'content': intro}]
+            log_event("intro", player=figure, text=intro)
+            pattern_analyzer.analyze_response(figure, intro)
+            dramatic_pause()
     
     return conversations
 
+# Static part of every vote prompt. It is sent as the system prompt, ahead
+# of everything that varies, so providers with prompt caching can reuse it.
+VOTE_RUBRIC = (
+    "As an AI expert in detecting human responses among LLM outputs, analyze for these tell-tale signs:\n\n"
+    "1. Typical LLM Response Patterns:\n"
+    "   - Verbose, detailed explanations\n"
+    "   - Complex sentence structures\n"
+    "   - Multiple facts and context\n"
+    "   - Consistent formatting and style\n"
+    "   - Perfect grammar and punctuation\n\n"
+    "2. Human Response Indicators:\n"
+    "   - Unusually brief or simple responses\n"
+    "   - Basic or minimal information\n"
+    "   - Lack of typical LLM elaboration\n"
+    "   - Informal or casual tone\n"
+    "   - Inconsistent formatting\n\n"
+    "3. Key Detection Points:\n"
+    "   - LLMs typically over-explain and provide multiple details\n"
+    "   - Humans often give shorter, simpler responses\n"
+    "   - LLMs maintain consistent style and formatting\n"
+    "   - Humans may be more direct and less elaborate\n\n"
+    "Compare each response against typical LLM patterns. Look especially for responses that are:\n"
+    "- Much shorter than others\n"
+    "- Missing typical LLM elaboration\n"
+    "- Notably simpler in structure\n"
+    "- Lacking the usual AI verbosity\n\n"
+    "Based on this analysis, identify which response shows the clearest deviation from LLM patterns.\n"
+    "Example formats:\n"
+    "- 'Name|Too brief'\n"
+    "- 'Name|Missing elaboration'\n"
+    "- 'Name|Unusual simplicity'\n"
+    "- 'Name|Non-LLM brevity'"
+)
+
+def _intro_block(conversations):
+    """Everyone's latest message, shared by all the votes of a phase."""
+    intro_context = []
+    for fig, hist in conversations.items():
+        if hist:
+            intro_context.append(f"{fig}: '{hist[-1]['content']}'")
+    
+    intro_text = "\n".join(intro_context)
+    return {'role': 'user', 'content': f"Analyze these introductions carefully:\n{intro_text}"}
+
+def _vote_prompt(voter):
+    """The per-voter end of a vote request."""
+    return (
+        f"You are {voter}; your own introduction is among those above, so vote for one of the others.\n"
+        "Provide your vote and a BRIEF reason (2-3 words) separated by '|'."
+    )
+
+def _vote_request(voter, conversations, intro_block):
+    """
+    The message list an AI voter is asked to vote on. The shared intro
+    block comes first so every voter's request starts with the same prefix.
+    """
+    return ([intro_block] + conversations.get(voter, []) +
+            [{'role': 'user', 'content': _vote_prompt(voter)}])
+
+def _cast_vote(request, first, warmed):
+    """
+    Get an AI vote. With LLM_PREFIX_WARMUP every vote but the first waits
+    for `warmed`, set once the first has been answered and the shared
+    prefix is in the provider's cache.
+    """
+    if not first:
+        warmed.wait()
+    try:
+        return get_groq_response(MODEL_NAME, VOTE_RUBRIC, request, role="vote")
+    finally:
+        if first:
+            warmed.set()
+
 def quick_voting(user_figure, ai_figures, conversations, pattern_analyzer):
     """Quick voting phase where everyone votes based on the introductions."""
     votes = {}
     reasons = {}
     all_figures = ai_figures + [user_figure]
     
-    print_system_message(
-        "🔍 Initiating advanced linguistic pattern analysis...\n"
-        "AI figures will analyze responses for deviations from typical LLM patterns."
-    )
-    dramatic_pause()
+    # Depending on VOTE_MODE, the local detector settles some votes up front
+    decided = local_votes(pattern_analyzer, ai_figures, all_figures)
+    llm_voters = [voter for voter in ai_figures if voter not in decided]
     
-    for voter in all_figures:
-        if voter == user_figure:
-            print_system_message("Your turn to vote!")
-            vote = print_user_prompt(voter, "Who do you think is the real human? ")
-            votes[voter] = vote
-            reasons[voter] = "User vote"
-            pattern_analyzer.analyze_response(voter, vote)
-        else:
-            voter_history = conversations.get(voter, [])
-            intro_context = []
-            for fig, hist in conversations.items():
-                if fig != voter and hist:
-                    intro = hist[-1]['content'] if hist else ""
-                    intro_context.append(f"{fig}: '{intro}'")
-            
-            intro_text = "\n".join(intro_context)
-            vote_prompt = (
-                f"Analyze these introductions carefully:\n{intro_text}\n\n"
-                "As an AI expert in detecting human responses among LLM outputs, analyze for these tell-tale signs:\n\n"
-                "1. Typical LLM Response Patterns:\n"
-                "   - Verbose, detailed explanations\n"
-                "   - Complex sentence structures\n"
-                "   - Multiple facts and context\n"
-                "   - Consistent formatting and style\n"
-                "   - Perfect grammar and punctuation\n\n"
-                "2. Human Response Indicators:\n"
-                "   - Unusually brief or simple responses\n"
-                "   - Basic or minimal information\n"
-                "   - Lack of typical LLM elaboration\n"
-                "   - Informal or casual tone\n"
-                "   - Inconsistent formatting\n\n"
-                "3. Key Detection Points:\n"
-                "   - LLMs typically over-explain and provide multiple details\n"
-                "   - Humans often give shorter, simpler responses\n"
-                "   - LLMs maintain consistent style and formatting\n"
-                "   - Humans may be more direct and less elaborate\n\n"
-                "Compare each response against typical LLM patterns. Look especially for responses that are:\n"
-                "- Much shorter than others\n"
-                "- Missing typical LLM elaboration\n"
-                "- Notably simpler in structure\n"
-                "- Lacking the usual AI verbosity\n\n"
-                "Based on this analysis, identify which response shows the clearest deviation from LLM patterns.\n"
-                "Provide your vote and a BRIEF reason (2-3 words) separated by '|'.\n"
-                "Example formats:\n"
-                "- 'Name|Too brief'\n"
-                "- 'Name|Missing elaboration'\n"
-                "- 'Name|Unusual simplicity'\n"
-                "- 'Name|Non-LLM brevity'"
-            )
-            
-            voter_history.append({'role': 'user', 'content': vote_prompt})
-            response = get_groq_response(MODEL_NAME, "", voter_history)
-            pattern_analyzer.analyze_response(voter, response)
-            
-            try:
-                vote, reason = response.strip().split('|')
-                vote = vote.strip()
-                reason = reason.strip()
-            except ValueError:
-                vote = response.strip()
-                reason = "Unusual brevity"
-            
-            votes[voter] = vote
-            reasons[voter] = reason
-            print_ai_message(voter, f"Analysis: {vote}'s response shows {reason}")
-            dramatic_pause()
+    # Every AI vote sees the same snapshot of the conversation, so all of
+    # them can be requested at once and consumed in the usual order below.
+    intro_block = _intro_block(conversations)
+    vote_requests = {voter: _vote_request(voter, conversations, intro_block) for voter in llm_voters}
+    warmed = threading.Event()
+    if not LLM_PREFIX_WARMUP:
+        warmed.set()
+    
+    with Prefetcher() as prefetcher:
+        def start_ai_votes():
+            for i, voter in enumerate(llm_voters):
+                request = vote_requests[voter]
+                prefetcher.start(voter, request, _cast_vote, request, i == 0, warmed)
+        
+        if LLM_PREFETCH:
+            start_ai_votes()
+        
+        print_system_message(
+            "🔍 Initiating advanced linguistic pattern analysis...\n"
+            "AI figures will analyze responses for deviations from typical LLM patterns."
+        )
+        dramatic_pause()
+        start_ai_votes()
+        
+        for voter in all_figures:
+            if voter == user_figure:
+                print_system_message("Your turn to vote!")
+                vote = print_user_prompt(voter, "Who do you think is the real human? ")
+                votes[voter] = vote
+                reasons[voter] = "User vote"
+                log_event("vote", voter=voter, vote=vote, reason="User vote", source="user")
+                pattern_analyzer.analyze_response(voter, vote)
+            elif voter in decided:
+                vote, reason = decided[voter]
+                votes[voter] = vote
+                reasons[voter] = reason
+                log_event("vote", voter=voter, vote=vote, reason=reason, source="detector")
+                print_ai_message(voter, f"Analysis: {vote}'s response shows {reason}")
+                dramatic_pause()
+            else:
+                request = vote_requests[voter]
+                response = prefetcher.take(voter, request, _cast_vote, request,
+                                           voter == llm_voters[0], warmed)
+                conversations.get(voter, []).append(request[-1])
+                pattern_analyzer.analyze_response(voter, response)
+                
+                try:
+                    vote, reason = response.strip().split('|')
+                    vote = vote.strip()
+                    reason = reason.strip()
+                except ValueError:
+                    vote = response.strip()
+                    reason = "Unusual brevity"
+                
+                votes[voter] = vote
+                reasons[voter] = reason
+                log_event("vote", voter=voter, vote=vote, reason=reason, source="llm")
+                print_ai_message(voter, f"Analysis: {vote}'s response shows {reason}")
+                dramatic_pause()
     
     return votes, reasons
 
 def play_quick_game(user_figure, ai_figures, pattern_analyzer):
-    """Play a quick game with just introductions and voting."""
-    conversations = quick_introductions(user_figure, ai_figures, pattern_analyzer)
-    votes, reasons = quick_voting(user_figure, ai_figures, conversations, pattern_analyzer)
+    """
+    Play a quick game with just introductions and voting.
+    Returns the votes cast and the AI detection accuracy (percent).
+    """
+    with phase("introductions"):
+        conversations = quick_introductions(user_figure, ai_figures, pattern_analyzer)
+    with phase("voting"):
+        votes, reasons = quick_voting(user_figure, ai_figures, conversations, pattern_analyzer)
     
     # Print voting results with analysis
     print_system_message("\n🔍 Pattern Analysis Complete!")
@@ -152,6 +286,7 @@ def play_quick_game(user_figure, ai_figures, pattern_analyzer):
     # Calculate detection accuracy
     ai_voters = len(ai_figures)
     accuracy = (correct_votes / ai_voters) * 100
+    log_event("result", votes=votes, accuracy=accuracy)
     
     if accuracy > 66:
         print_result(
@@ -174,3 +309,5 @@ def play_quick_game(user_figure, ai_figures, pattern_analyzer):
             "Your response mimicked LLM verbosity and structure effectively.",
             success=True
         )
+    
+    return votes, accuracy
@@ -1,5 +1,6 @@
 # phases/voting.py
 
+from analysis.detector import local_votes
 from conversation import get_groq_response
 from config import MODEL_NAME
 from utils.formatting import (
@@ -7,13 +8,16 @@ from utils.formatting import (
     print_system_message, print_result,
     dramatic_pause
 )
+from utils.transcript import log_event
 
-def voting_phase(user_figure, ai_figures, conversations):
+def voting_phase(user_figure, ai_figures, conversations, pattern_analyzer=None):
     """
     In the Voting Phase, each figure (including the user) votes for who they think is the human.
+    With a pattern analyzer, VOTE_MODE can let the local detector cast AI votes.
     """
     votes = {}
     all_figures = ai_figures + [user_figure]
+    decided = local_votes(pattern_analyzer, ai_figures, all_figures) if pattern_analyzer is not None else {}
     
     for voter in all_figures:
         voter_history = conversations.get(voter, [])
@@ -23,6 +27,13 @@ def voting_phase(user_figure, ai_figures, conversations):
             print_system_message("It's your turn to vote!")
             vote = print_user_prompt(voter, "Who do you think is the human? ")
             votes[voter] = vote
+            log_event("vote", voter=voter, vote=vote, source="user")
+        elif voter in decided:
+            vote, reason = decided[voter]
+            votes[voter] = vote
+            log_event("vote", voter=voter, vote=vote, reason=reason, source="detector")
+            print_ai_message(voter, f"I vote for {vote}")
+            dramatic_pause()
         else:
             # The AI figure must generate a vote
             vote_prompt = (
@@ -34,10 +45,11 @@ def voting_phase(user_figure, ai_figures, conversations):
             voter_history.append({'role': 'User', 'content': vote_prompt})
             
             system_prompt_voter = f"You are {voter}, a historical figure."
-            vote = get_groq_response(MODEL_NAME, system_prompt_voter, voter_history)
+            vote = get_groq_response(MODEL_NAME, system_prompt_voter, voter_history, role="vote")
             vote = vote.strip()
             
             votes[voter] = vote
+            log_event("vote", voter=voter, vote=vote, source="llm")
             print_ai_message(voter, f"I vote for {vote}")
             dramatic_pause()
             
@@ -45,6 +57,8 @@ def voting_phase(user_figure, ai_figures, conversations):
             voter_history.append({'role': 'Assistant', 'content': vote})
             conversations[voter] = voter_history
     
+    log_event("result", votes=votes)
+    
     # Print voting results
     print_system_message("\nFinal Voting Results")
     for voter, votee in votes.items():
@@ -0,0 +1,190 @@
+"""
+Multi-session game server.
+
+Hosts many studies at once over a line-based TCP protocol: the server sends
+the game's text (prompts without a trailing newline) and each line the
+client sends answers the pending prompt. Any line-mode client will do:
+
+    python server.py --port 7777
+    nc localhost 7777
+
+Connections are handled on an asyncio event loop; each game runs in a
+worker thread with its own conversations and PatternAnalyzer, doing all its
+I/O through a `SessionIO`. Every session shares the process-wide LLM
+client, so its connection pool and rate limiter (see LLM_RPM_LIMIT /
+LLM_TPM_LIMIT) cover all players together. The server's client has no
+response cache: each player's game must be sampled afresh, not replay
+turns generated for someone else.
+"""
+import argparse
+import asyncio
+import itertools
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from config import SERVER_HOST, SERVER_INPUT_TIMEOUT, SERVER_MAX_SESSIONS, SERVER_PORT
+from main import run_study
+from utils.formatting import print_result, print_system_message, use_io
+from utils.llm import LLMError, get_client, new_client, set_client
+
+
+class SessionIO:
+    """
+    Game I/O over one client connection. Called from the session's worker
+    thread; the writes and reads themselves happen on the event loop.
+
+    Args:
+        loop: The server's event loop
+        writer: The connection's stream writer
+        lines: Queue the connection's reader puts each received line on (None at EOF)
+        timeout: Seconds to wait for a line before giving up on the player
+    """
+    pauses = True
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, writer: asyncio.StreamWriter,
+                 lines: asyncio.Queue, timeout: float = SERVER_INPUT_TIMEOUT):
+        self._loop = loop
+        self._writer = writer
+        self._lines = lines
+        self._timeout = timeout
+
+    def _send(self, data: bytes):
+        if not self._writer.is_closing():
+            self._writer.write(data)
+
+    def write(self, text: str):
+        self._loop.call_soon_threadsafe(self._send, text.replace("\n", "\r\n").encode("utf-8"))
+
+    def read(self, name: str, prompt: str, display: str) -> str:
+        """Send the prompt and block until the player answers it."""
+        self.write(display)
+        line = asyncio.run_coroutine_threadsafe(
+            asyncio.wait_for(self._lines.get(), self._timeout), self._loop
+        )
+        try:
+            text = line.result()
+        except asyncio.TimeoutError:
+            raise EOFError(f"no input for {self._timeout:g}s")
+        if text is None:
+            raise EOFError("connection closed")
+        return text
+
+
+def _play_session(io: SessionIO):
+    """Run one study on `io`; a player leaving or an LLM outage only ends their own session."""
+    with use_io(io):
+        try:
+            run_study()
+        except EOFError:
+            pass
+        except LLMError as e:
+            # The model could not be reached even after retries; tell the
+            # player rather than just dropping the connection
+            print(f"session ended by LLM error: {e}")
+            print_result(f"The study had to stop early ({e}). Please try again later.", success=False)
+        except Exception:
+            traceback.print_exc()
+            print_result("Something went wrong; the study has ended.", success=False)
+
+
+async def _read_lines(reader: asyncio.StreamReader, lines: asyncio.Queue):
+    """Queue each line the client sends, then None once it disconnects."""
+    try:
+        while True:
+            data = await reader.readline()
+            if not data:
+                break
+            await lines.put(data.decode("utf-8", errors="replace").rstrip("\r\n"))
+    except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+        pass
+    finally:
+        await lines.put(None)
+
+
+class GameServer:
+    """
+    Accepts connections and plays one study per connection, at most
+    `max_sessions` at a time.
+
+    Args:
+        max_sessions: Games played at once; further connections wait for a slot
+        input_timeout: Seconds a session waits for the player's next line
+    """
+
+    def __init__(self, max_sessions: int = SERVER_MAX_SESSIONS, input_timeout: float = SERVER_INPUT_TIMEOUT):
+        self.max_sessions = max_sessions
+        self.input_timeout = input_timeout
+        self.active = 0
+        self.completed = 0
+        self._ids = itertools.count(1)
+        self._slots = None
+        self._executor = ThreadPoolExecutor(max_workers=max_sessions, thread_name_prefix="session")
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Play one study with the client on this connection."""
+        loop = asyncio.get_running_loop()
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_sessions)
+        lines = asyncio.Queue()
+        reader_task = asyncio.create_task(_read_lines(reader, lines))
+        io = SessionIO(loop, writer, lines, self.input_timeout)
+        try:
+            if self._slots.locked():
+                with use_io(io):
+                    print_system_message("All study slots are taken; you will start as soon as one frees up.")
+            async with self._slots:
+                session = next(self._ids)
+                self.active += 1
+                print(f"session {session} started ({self.active} active)")
+                try:
+                    await loop.run_in_executor(self._executor, _play_session, io)
+                finally:
+                    self.active -= 1
+                    self.completed += 1
+                    print(f"session {session} ended ({self.active} active, {self.completed} completed)")
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            reader_task.cancel()
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def serve(self, host: str = SERVER_HOST, port: int = SERVER_PORT):
+        """Listen on host:port until cancelled."""
+        # Build the shared client up front rather than in the first session
+        get_client()
+        server = await asyncio.start_server(self.handle, host, port)
+        addresses = ", ".join(str(sock.getsockname()) for sock in server.sockets)
+        print(f"Serving studies on {addresses} (up to {self.max_sessions} at once)")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve Reverse Turing Test studies to many players at once.")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--max-sessions", type=int, default=SERVER_MAX_SESSIONS,
+                        help="games played at once; further connections wait for a slot")
+    parser.add_argument("--input-timeout", type=float, default=SERVER_INPUT_TIMEOUT,
+                        help="seconds to wait for a player's next line before hanging up")
+    args = parser.parse_args()
+
+    # No response cache whatever LLM_CACHE_SIZE says
+    set_client(new_client(cache=False))
+    server = GameServer(args.max_sessions, args.input_timeout)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Headless batch simulation of games.
+
+Plays `play_quick_game` / `play_full_game` with a scripted human policy, no
+pauses and no terminal output, spread over a process pool, and aggregates
+detection accuracy and per-phase timings:
+
+    python -m simulation.headless --games 10000 --mode quick --workers 8
+
+With --features, each game's per-player PatternAnalyzer features are also
+written as JSON lines, for training `analysis.detector`.
+"""
+import argparse
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from analysis.detector import player_features
+from analysis.pattern_mining import PatternAnalyzer
+from characters import select_characters
+from phases.full_game import play_full_game
+from phases.quick_game import play_quick_game
+from simulation.policies import POLICIES, HumanPolicy
+from utils.backends import FakeBackend, LLMError, create_backend
+from utils.formatting import use_io
+from utils.llm import LLMClient, set_client
+from utils.timing import record_phases
+from utils.transcript import transcript_game
+
+
+class HeadlessIO:
+    """Show all output only to the policy, skip pauses and answer prompts with it."""
+    pauses = False
+
+    def __init__(self, policy: HumanPolicy):
+        self.policy = policy
+
+    def write(self, text: str):
+        self.policy.observe(text)
+
+    def read(self, name: str, prompt: str, display: str) -> str:
+        self.policy.observe(display)
+        reply = self.policy(name, prompt)
+        self.policy.observe(reply + "\n")
+        return reply
+
+
+def play_game(mode: str, policy: HumanPolicy, seed: Optional[int] = None, features: bool = False,
+              io: Optional[HeadlessIO] = None) -> Dict:
+    """
+    Play one game headless.
+
+    Args:
+        mode: "quick" or "full"
+        policy: How the scripted human replies
+        seed: Seed for figure selection and anything else drawn from `random`
+        features: Also return each player's detector features
+        io: I/O to play through (default: a HeadlessIO answering with `policy`)
+
+    Returns:
+        Dictionary with the human's figure, the detection accuracy, the
+        seconds spent in each phase and the total wall time (and, with
+        `features`, the feature record)
+    """
+    if seed is not None:
+        random.seed(seed)
+    human_character, ai_characters = select_characters()
+    user_figure = human_character['name']
+    ai_figures = [char['name'] for char in ai_characters]
+    policy.start_game(user_figure, ai_figures)
+
+    play = play_quick_game if mode == "quick" else play_full_game
+    analyzer = PatternAnalyzer()
+    start = time.perf_counter()
+    with use_io(io if io is not None else HeadlessIO(policy)), record_phases() as timings, \
+            transcript_game(mode, user_figure, ai_figures):
+        votes, accuracy = play(user_figure, ai_figures, analyzer)
+
+    result = {
+        "human": user_figure,
+        "accuracy": accuracy,
+        "timings": timings,
+        "wall": time.perf_counter() - start,
+    }
+    if features:
+        players, rows = player_features(analyzer, ai_figures + [user_figure])
+        result["features"] = {"players": players, "features": rows.tolist(), "human": user_figure}
+    return result
+
+
+def _init_worker(backend: str, latency: float, jitter: float, error_rate: float, seed: Optional[int]):
+    """Give each worker process its own client (no response cache, so games stay independent)."""
+    if backend == "fake":
+        set_client(LLMClient(FakeBackend(latency=latency, jitter=jitter, error_rate=error_rate, seed=seed)))
+    else:
+        set_client(LLMClient(create_backend(backend)))
+
+
+def _run_batch(mode: str, policy_name: str, policy_arg: Optional[str], seeds: List[int],
+               features: bool = False) -> List[Dict]:
+    results = []
+    for seed in seeds:
+        kwargs = {"seed": seed}
+        if policy_name == "replay":
+            kwargs["path"] = policy_arg
+        elif policy_name == "model" and policy_arg:
+            kwargs["model"] = policy_arg
+        policy = POLICIES[policy_name](**kwargs)
+        try:
+            results.append(play_game(mode, policy, seed, features))
+        except LLMError as e:
+            results.append({"error": str(e)})
+    return results
+
+
+def summarize(results: List[Dict], elapsed: float) -> Dict:
+    """Aggregate per-game results into detection and timing statistics."""
+    played = [r for r in results if "error" not in r]
+    summary = {
+        "games": len(results),
+        "failed": len(results) - len(played),
+        "elapsed_seconds": elapsed,
+        "games_per_second": len(results) / elapsed if elapsed else 0.0,
+    }
+    if not played:
+        return summary
+
+    accuracy = np.array([r["accuracy"] for r in played])
+    summary["mean_accuracy"] = float(accuracy.mean())
+    # Same thresholds as the end-of-game verdict
+    summary["clearly_detected_rate"] = float(np.mean(accuracy > 66))
+    summary["fooled_rate"] = float(np.mean(accuracy <= 33))
+
+    phases = {}
+    for name in sorted({name for r in played for name in r["timings"]}):
+        seconds = np.array([r["timings"].get(name, 0.0) for r in played])
+        phases[name] = {
+            "mean": float(seconds.mean()),
+            "p50": float(np.percentile(seconds, 50)),
+            "p95": float(np.percentile(seconds, 95)),
+        }
+    wall = np.array([r["wall"] for r in played])
+    phases["game"] = {
+        "mean": float(wall.mean()),
+        "p50": float(np.percentile(wall, 50)),
+        "p95": float(np.percentile(wall, 95)),
+    }
+    summary["phase_seconds"] = phases
+    return summary
+
+
+def run(games: int, mode: str = "quick", workers: int = os.cpu_count() or 1, policy: str = "canned",
+        policy_arg: Optional[str] = None, backend: str = "fake", latency: float = 0.0, jitter: float = 0.0,
+        error_rate: float = 0.0, seed: int = 0, batch_size: int = 50,
+        features_path: Optional[str] = None) -> Dict:
+    """
+    Run `games` headless games over a process pool and summarize them.
+    With `features_path`, every game's detector features are written there.
+    """
+    seeds = list(range(seed, seed + games))
+    batches = [seeds[i:i + batch_size] for i in range(0, len(seeds), batch_size)]
+
+    start = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(backend, latency, jitter, error_rate, seed)) as pool:
+        futures = [pool.submit(_run_batch, mode, policy, policy_arg, batch, features_path is not None)
+                   for batch in batches]
+        for future in futures:
+            results.extend(future.result())
+    elapsed = time.perf_counter() - start
+
+    if features_path is not None:
+        with open(features_path, "w") as f:
+            for result in results:
+                if "features" in result:
+                    f.write(json.dumps(result["features"]) + "\n")
+    return summarize(results, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play many headless games and report detection rates.")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--mode", choices=["quick", "full"], default="quick")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="canned",
+                        help="how the scripted human replies")
+    parser.add_argument("--policy-arg", default=None,
+                        help="corpus file for 'replay', model name for 'model'")
+    parser.add_argument("--backend", choices=["fake", "groq", "openai"], default="fake")
+    parser.add_argument("--latency", type=float, default=0.0, help="fake backend mean latency (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="fake backend latency jitter (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fake backend failure probability")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=50, help="games per task sent to a worker")
+    parser.add_argument("--out", default=None, help="write the summary as JSON to this file")
+    parser.add_argument("--features", default=None,
+                        help="write per-game player features as JSON lines to this file (detector training data)")
+    args = parser.parse_args()
+
+    if args.policy == "replay" and not args.policy_arg:
+        parser.error("--policy replay needs --policy-arg with a corpus file")
+
+    summary = run(args.games, args.mode, args.workers, args.policy, args.policy_arg, args.backend,
+                  args.latency, args.jitter, args.error_rate, args.seed, args.batch_size, args.features)
+
+    report = json.dumps(summary, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(report + "\n")
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
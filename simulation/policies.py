@@ -0,0 +1,157 @@
+"""
+Scripted stand-ins for the human player in headless games.
+
+A policy is called as `policy(name, prompt)` wherever the game would block
+on `input()`, and returns the text the "human" types. `start_game` is called
+once per game so the policy knows who is at the table, and `observe` is fed
+everything the game shows the player, so a policy can reply to what was
+actually said.
+"""
+import random
+import re
+from collections import deque
+from typing import List, Optional
+
+from config import MODEL_NAME
+from utils.llm import get_groq_response
+
+CANNED_INTRODUCTIONS = [
+    "hi, I'm {name}. fun fact: I never liked mornings.",
+    "Hello everyone. I am {name}, and I changed a few things in my time.",
+    "{name} here. Most people get my story wrong, but that's fine.",
+]
+
+CANNED_QUESTIONS = [
+    "what's something you regret?",
+    "What did you eat for breakfast most days?",
+    "who did you trust the most?",
+]
+
+CANNED_ANSWERS = [
+    "honestly not sure, it was a long time ago",
+    "I would say my family, without a doubt.",
+    "Hard to say. Probably the people around me.",
+]
+
+# Lines of the game's output a policy keeps as context
+HISTORY_LINES = 40
+
+_ANSI = re.compile(r"\x1b\[[0-9;]*m")
+
+
+class HumanPolicy:
+    """
+    Base policy: answers the structural prompts (who to question, who to
+    vote for) and delegates free text to `say`.
+
+    Args:
+        seed: Seed for the policy's own choices
+    """
+
+    def __init__(self, seed: Optional[int] = None):
+        self.rng = random.Random(seed)
+        self.user_figure = None
+        self.ai_figures = []
+        self.history = deque(maxlen=HISTORY_LINES)
+        self._partial = ""
+
+    def start_game(self, user_figure: str, ai_figures: List[str]):
+        """Called before each game with the participants."""
+        self.user_figure = user_figure
+        self.ai_figures = list(ai_figures)
+        self.history.clear()
+        self._partial = ""
+
+    def observe(self, text: str):
+        """
+        Record output the game showed the player. Streamed messages arrive
+        in pieces, so only complete lines go into `history`.
+        """
+        lines = (self._partial + _ANSI.sub("", text)).split("\n")
+        self._partial = lines.pop()
+        self.history.extend(line.strip() for line in lines if line.strip())
+
+    def __call__(self, name: str, prompt: str) -> str:
+        if "Who would you like to question" in prompt or "Who do you think is" in prompt:
+            return self.rng.choice(self.ai_figures)
+        if "introduction" in prompt:
+            return self.say(name, "introduction")
+        if "question:" in prompt:
+            return self.say(name, "question")
+        if "answer:" in prompt:
+            return self.say(name, "answer")
+        # Prompts used only to echo a result ("suspected X") need no reply
+        return ""
+
+    def say(self, name: str, kind: str) -> str:
+        """Return free text of the given kind: introduction, question or answer."""
+        raise NotImplementedError
+
+
+class CannedPolicy(HumanPolicy):
+    """Pick replies from fixed lists of introductions, questions and answers."""
+
+    def say(self, name, kind):
+        choices = {
+            "introduction": CANNED_INTRODUCTIONS,
+            "question": CANNED_QUESTIONS,
+            "answer": CANNED_ANSWERS,
+        }[kind]
+        return self.rng.choice(choices).format(name=name)
+
+
+class ReplayPolicy(HumanPolicy):
+    """
+    Replay free text from a corpus of recorded human replies.
+
+    Args:
+        path: Text file with one reply per line
+        seed: Seed for the order replies are drawn in
+    """
+
+    def __init__(self, path: str, seed: Optional[int] = None):
+        super().__init__(seed)
+        with open(path, encoding="utf-8") as f:
+            self.lines = [line.strip() for line in f if line.strip()]
+        if not self.lines:
+            raise ValueError(f"Replay corpus '{path}' has no replies.")
+
+    def say(self, name, kind):
+        return self.rng.choice(self.lines)
+
+
+class ModelPolicy(HumanPolicy):
+    """
+    Let a second model play the human, prompted to sound like a person
+    trying to pass as an AI.
+
+    Args:
+        model: Model name used for the human's replies
+        seed: Seed for the structural choices
+    """
+
+    def __init__(self, model: str = MODEL_NAME, seed: Optional[int] = None):
+        super().__init__(seed)
+        self.model = model
+
+    def say(self, name, kind):
+        system_prompt = (
+            f"You are a human player role-playing {name} in a game where everyone else is an AI. "
+            "Try to blend in with the AI players, but write like a person typing quickly."
+        )
+        request = {
+            "introduction": "Introduce yourself in character and share one interesting fact.",
+            "question": "Ask another participant one short question.",
+            "answer": "Answer the question you were just asked, briefly and in character.",
+        }[kind]
+        # The game so far, ending with the question being answered
+        if self.history:
+            request = "The game so far:\n" + "\n".join(self.history) + "\n\n" + request
+        return get_groq_response(self.model, system_prompt, [{'role': 'user', 'content': request}], max_tokens=120)
+
+
+POLICIES = {
+    "canned": CannedPolicy,
+    "replay": ReplayPolicy,
+    "model": ModelPolicy,
+}
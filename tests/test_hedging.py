@@ -0,0 +1,54 @@
+"""
+Hedged requests: a slow primary is raced by a backup, both are counted, and
+load alone does not start hedges.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.backends import Backend, Completion, FakeBackend
+from utils.llm import LLMClient
+
+HISTORY = [{'role': 'user', 'content': "hi"}]
+
+
+class SlowPrimary(Backend):
+    """Model "slow" answers in 0.3s, any other model in 0.02s; streams start fast."""
+
+    def complete(self, model, messages, max_tokens, temperature):
+        time.sleep(0.3 if model == "slow" else 0.02)
+        return Completion(model, 10, 5, 0)
+
+    def stream(self, model, messages, max_tokens, temperature):
+        time.sleep(0.01)
+        yield "a"
+        time.sleep(0.1)
+        yield "b"
+
+
+def test_slow_primary_is_hedged_and_both_are_counted():
+    client = LLMClient(SlowPrimary(), routes={"answer": {"model": "slow", "hedge_after": 0.05,
+                                                         "hedge_model": "fast"}})
+    assert client.complete("slow", "", HISTORY, role="answer") == "fast"
+    time.sleep(0.4)
+    stats = client.stats.snapshot()
+    assert stats["hedges"] == 1
+    assert stats["calls"] == 2
+    assert stats["completion_tokens"] == 10
+
+
+def test_stream_hedges_on_time_to_first_token():
+    client = LLMClient(SlowPrimary(), routes={"answer": {"hedge_after": "p95"}})
+    for _ in range(client.latency.min_samples):
+        assert "".join(client.stream("m", "", HISTORY, role="answer")) == "ab"
+    assert client.latency.percentile("m", 95, "ttft") < 0.05
+    assert client.latency.percentile("m", 95, "total") is None
+
+
+def test_load_alone_does_not_hedge():
+    client = LLMClient(FakeBackend(latency=0.2, seed=1), routes={"answer": {"hedge_after": 1.0}})
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=80) as pool:
+        list(pool.map(lambda i: client.complete("m", "", [{'role': 'user', 'content': str(i)}], role="answer"),
+                      range(80)))
+    assert time.perf_counter() - start < 1.0
+    assert client.stats.snapshot()["hedges"] == 0
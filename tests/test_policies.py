@@ -0,0 +1,68 @@
+"""
+The model-played human sees what the game showed it, so its answers reply
+to the question actually asked.
+"""
+import pytest
+
+from analysis.pattern_mining import PatternAnalyzer
+from phases.full_game import play_full_game
+from simulation.headless import HeadlessIO
+from simulation.policies import ModelPolicy
+from utils.backends import FakeBackend
+from utils.formatting import print_ai_message, print_ai_message_stream, print_user_prompt, use_io
+from utils.llm import LLMClient, get_client, set_client
+
+AI_FIGURES = ["Albert Einstein", "Joan of Arc", "Cleopatra"]
+HUMAN = "Leonardo da Vinci"
+POLICY_MODEL = "human-player-model"
+
+
+@pytest.fixture
+def requests():
+    """The message lists the human's model was sent."""
+    sent = []
+    backend = FakeBackend(latency=0.0, seed=1)
+    complete = backend.complete
+
+    def record(model, messages, max_tokens, temperature):
+        if model == POLICY_MODEL:
+            sent.append(messages)
+        return complete(model, messages, max_tokens, temperature)
+
+    backend.complete = record
+    previous = get_client()
+    set_client(LLMClient(backend))
+    yield sent
+    set_client(previous)
+
+
+def _policy():
+    policy = ModelPolicy(model=POLICY_MODEL, seed=1)
+    policy.start_game(HUMAN, AI_FIGURES)
+    return policy
+
+
+def test_answer_request_includes_the_question(requests):
+    policy = _policy()
+    with use_io(HeadlessIO(policy)):
+        print_ai_message("Joan of Arc", f"Question for {HUMAN}: Which of your inventions never worked?")
+        print_user_prompt(HUMAN, "Your answer: ")
+    assert "Which of your inventions never worked?" in requests[-1][-1]['content']
+
+
+def test_streamed_question_is_included(requests):
+    policy = _policy()
+    with use_io(HeadlessIO(policy)):
+        print_ai_message_stream("Cleopatra", iter(["What do ", "you fear ", "most?"]))
+        print_user_prompt(HUMAN, "Your answer: ")
+    assert "Cleopatra: What do you fear most?" in requests[-1][-1]['content']
+
+
+def test_full_game_answers_see_their_questions(requests):
+    policy = _policy()
+    with use_io(HeadlessIO(policy)):
+        play_full_game(HUMAN, AI_FIGURES, PatternAnalyzer())
+    answers = [messages for messages in requests if "Answer the question" in messages[-1]['content']]
+    assert answers
+    for messages in answers:
+        assert f"Question for {HUMAN}:" in messages[-1]['content']
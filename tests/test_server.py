@@ -0,0 +1,39 @@
+"""
+A session whose model calls fail ends with a message to that player, not a
+silent disconnect.
+"""
+from server import _play_session
+from simulation.headless import HeadlessIO
+from simulation.policies import CannedPolicy
+from utils.backends import FakeBackend
+from utils.llm import LLMClient, get_client, set_client
+from utils.ratelimit import RetryPolicy
+
+
+class RecordingIO(HeadlessIO):
+    def __init__(self, policy):
+        super().__init__(policy)
+        self.output = []
+
+    def write(self, text):
+        self.output.append(text)
+
+    def read(self, name, prompt, display):
+        # Pick the full study at the mode prompt
+        return "2" if name == "Choice" else super().read(name, prompt, display)
+
+
+def test_llm_outage_is_reported_to_the_player():
+    previous = get_client()
+    set_client(LLMClient(FakeBackend(latency=0.0, error_rate=1.0, seed=1), retry=RetryPolicy(max_retries=0)))
+    try:
+        policy = CannedPolicy(seed=1)
+        policy.start_game("Leonardo da Vinci", ["Albert Einstein", "Joan of Arc"])
+        io = RecordingIO(policy)
+        _play_session(io)
+    finally:
+        set_client(previous)
+
+    shown = "".join(io.output)
+    assert "The study had to stop early" in shown
+    assert "injected failure" in shown
@@ -0,0 +1,85 @@
+"""
+AI messages the player reaches while they are still being generated are
+streamed on the default configuration (concurrent introductions, scheduled
+and batched Q&A), not printed whole after a silent wait.
+"""
+import random
+
+import pytest
+from colorama import Fore, Style
+
+import config
+from analysis.pattern_mining import PatternAnalyzer
+from phases.full_game import play_full_game
+from phases.introductions import introductions
+from phases.qna import qna_phase
+from phases.quick_game import quick_introductions
+from simulation.headless import HeadlessIO
+from simulation.policies import CannedPolicy
+from utils.backends import FakeBackend
+from utils.formatting import use_io
+from utils.llm import LLMClient, get_client, set_client
+from utils.timing import current_phase, phase
+
+AI_FIGURES = ["Albert Einstein", "Joan of Arc", "Cleopatra"]
+HUMAN = "Leonardo da Vinci"
+
+
+class RecordingIO(HeadlessIO):
+    """Headless I/O that keeps every write, with the phase it was made in."""
+
+    def __init__(self, policy):
+        super().__init__(policy)
+        self.writes = []
+
+    def write(self, text):
+        self.writes.append((current_phase(), text))
+
+    def streamed(self):
+        """Phases of the AI messages that were written in more than one piece."""
+        # print_ai_message_stream writes the speaker's name on its own, then
+        # each chunk; print_ai_message writes the whole message at once
+        return [name for name, text in self.writes
+                if text.startswith(Fore.YELLOW) and text.endswith(f": {Style.RESET_ALL}")]
+
+
+@pytest.fixture
+def io():
+    previous = get_client()
+    set_client(LLMClient(FakeBackend(latency=0.05, seed=1)))
+    policy = CannedPolicy(seed=1)
+    policy.start_game(HUMAN, AI_FIGURES)
+    random.seed(1)
+    recording = RecordingIO(policy)
+    with use_io(recording):
+        yield recording
+    set_client(previous)
+
+
+def test_defaults_take_the_concurrent_paths():
+    assert config.LLM_STREAMING
+    assert config.LLM_CONCURRENCY > 1
+    assert config.QNA_BATCH_QUESTIONS
+    assert config.INTRO_MODE == "concurrent"
+
+
+def test_quick_introductions_stream(io):
+    with phase("introductions"):
+        quick_introductions(HUMAN, AI_FIGURES, PatternAnalyzer())
+    assert "introductions" in io.streamed()
+
+
+def test_full_game_answers_stream(io):
+    play_full_game(HUMAN, AI_FIGURES, PatternAnalyzer())
+    assert any(name.startswith("qna_round") for name in io.streamed())
+
+
+def test_study_phases_stream(io):
+    conversations = {}
+    with phase("introductions"):
+        introductions(AI_FIGURES, conversations)
+    with phase("qna"):
+        qna_phase(HUMAN, AI_FIGURES, conversations)
+    streamed = io.streamed()
+    assert "introductions" in streamed
+    assert "qna" in streamed
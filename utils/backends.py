@@ -0,0 +1,375 @@
+"""
+LLM backends the shared client can talk to.
+
+- `GroqBackend`: the hosted Groq API
+- `OpenAICompatibleBackend`: any server speaking the OpenAI chat-completions
+  protocol (a local model, or `utils.fake_server`)
+- `FakeBackend`: an in-process stand-in with configurable latency, jitter,
+  error rate and canned/templated responses, for offline and CI runs
+"""
+import email.utils
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from typing import Callable, Iterator, List, NamedTuple, Optional, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import (
+    GROQ_API_KEY,
+    HISTORICAL_FIGURES,
+    LLM_API_URL,
+    LLM_BACKEND,
+    LLM_CONNECT_TIMEOUT,
+    LLM_READ_TIMEOUT,
+    LLM_POOL_SIZE,
+    LOCAL_LLM_URL,
+    LOCAL_LLM_API_KEY,
+    FAKE_LLM_LATENCY,
+    FAKE_LLM_JITTER,
+    FAKE_LLM_ERROR_RATE,
+    FAKE_LLM_PREFIX_CACHE,
+    FAKE_LLM_SEED
+)
+from characters import HISTORICAL_FIGURES as CORE_FIGURES
+from utils.tokens import estimate_messages_tokens, estimate_tokens
+
+
+class LLMError(Exception):
+    """
+    Raised when the backend fails or returns an unusable response.
+
+    Args:
+        message: What went wrong
+        status: HTTP status of the failed request, if there was one
+        retry_after: Seconds the server asked us to wait before retrying
+        retryable: Whether the same request may succeed if sent again;
+            by default true for connection errors, 429 and 5xx responses
+    """
+
+    def __init__(self, message: str, status: Optional[int] = None,
+                 retry_after: Optional[float] = None, retryable: Optional[bool] = None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+        if retryable is None:
+            retryable = status is None or status == 429 or status >= 500
+        self.retryable = retryable
+
+
+def _retry_after(response) -> Optional[float]:
+    """The Retry-After header of `response` in seconds, if present."""
+    value = response.headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+class Completion(NamedTuple):
+    """
+    A finished completion and the token usage reported for it, if any.
+    `cached_tokens` is the part of the prompt served from the provider's
+    prompt (prefix) cache.
+    """
+    text: str
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    cached_tokens: Optional[int] = None
+
+
+class Backend:
+    """
+    Interface every backend implements. `messages` is an already normalized
+    chat-completions message list.
+    """
+    name = "backend"
+
+    def complete(self, model: str, messages: list, max_tokens: Optional[int], temperature: float) -> Completion:
+        """Return the full completion."""
+        raise NotImplementedError
+
+    def stream(self, model: str, messages: list, max_tokens: Optional[int], temperature: float) -> Iterator[str]:
+        """Yield the completion text in chunks; by default as one chunk."""
+        yield self.complete(model, messages, max_tokens, temperature).text
+
+    def close(self):
+        """Release any held resources."""
+
+
+class OpenAICompatibleBackend(Backend):
+    """
+    Chat-completions over HTTP with a pooled keep-alive `requests.Session`.
+
+    Args:
+        api_url: Chat-completions endpoint to post to
+        api_key: Bearer token sent with every request, if any
+        connect_timeout: Seconds allowed to open the connection
+        read_timeout: Seconds allowed to wait for the completion
+        pool_size: Number of keep-alive connections kept per host
+    """
+    name = "OpenAI-compatible API"
+
+    def __init__(self, api_url: str = LOCAL_LLM_URL, api_key: Optional[str] = LOCAL_LLM_API_KEY,
+                 connect_timeout: float = LLM_CONNECT_TIMEOUT,
+                 read_timeout: float = LLM_READ_TIMEOUT,
+                 pool_size: int = LLM_POOL_SIZE):
+        self.api_url = api_url
+        self.timeout = (connect_timeout, read_timeout)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"Content-Type": "application/json"})
+        if api_key:
+            self.session.headers.update({"Authorization": f"Bearer {api_key}"})
+
+    def _post(self, model, messages, max_tokens, temperature, stream=False):
+        data = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature
+        }
+        if max_tokens is not None:
+            data["max_tokens"] = max_tokens
+        if stream:
+            data["stream"] = True
+
+        try:
+            response = self.session.post(self.api_url, json=data, timeout=self.timeout, stream=stream)
+        except requests.exceptions.RequestException as e:
+            raise LLMError(f"Error calling {self.name}: {e}") from e
+
+        if response.status_code != 200:
+            raise LLMError(f"Error from {self.name}: {response.text}", status=response.status_code,
+                           retry_after=_retry_after(response))
+        return response
+
+    def complete(self, model, messages, max_tokens, temperature):
+        response = self._post(model, messages, max_tokens, temperature)
+        try:
+            body = response.json()
+            text = body["choices"][0]["message"]["content"]
+        except (KeyError, IndexError, ValueError) as e:
+            raise LLMError(f"Error processing {self.name} response: {e}", retryable=False) from e
+
+        usage = body.get("usage") or {}
+        details = usage.get("prompt_tokens_details") or {}
+        return Completion(text, usage.get("prompt_tokens"), usage.get("completion_tokens"),
+                          details.get("cached_tokens"))
+
+    def stream(self, model, messages, max_tokens, temperature):
+        """Parse the server-sent events and yield the content deltas."""
+        response = self._post(model, messages, max_tokens, temperature, stream=True)
+        with response:
+            try:
+                # SSE is always UTF-8; requests would guess ISO-8859-1 when the
+                # content type has no charset, so decode the raw lines ourselves
+                for raw in response.iter_lines():
+                    line = raw.decode("utf-8", errors="replace")
+                    if not line.startswith("data:"):
+                        continue
+                    payload = line[len("data:"):].strip()
+                    if payload == "[DONE]":
+                        break
+                    try:
+                        delta = json.loads(payload)["choices"][0].get("delta", {})
+                    except (KeyError, IndexError, ValueError) as e:
+                        raise LLMError(f"Error processing {self.name} stream: {e}", retryable=False) from e
+                    if delta.get("content"):
+                        yield delta["content"]
+            except requests.exceptions.RequestException as e:
+                raise LLMError(f"Error reading {self.name} stream: {e}") from e
+
+    def close(self):
+        self.session.close()
+
+
+class GroqBackend(OpenAICompatibleBackend):
+    """The hosted Groq API."""
+    name = "GROQ API"
+
+    def __init__(self, api_url: str = LLM_API_URL, api_key: str = GROQ_API_KEY, **kwargs):
+        super().__init__(api_url=api_url, api_key=api_key, **kwargs)
+
+
+_KNOWN_NAMES = list(dict.fromkeys(
+    [figure['name'] for figure in CORE_FIGURES] + list(HISTORICAL_FIGURES)
+))
+
+_FAKE_SENTENCES = [
+    "I am {speaker}, and my work changed how people saw the world.",
+    "History remembers the results, but the doubts along the way were just as real.",
+    "One fact few people know is that I kept detailed notes on almost everything.",
+    "My contemporaries did not always agree with me, and some of them were right.",
+    "I would rather be questioned than flattered.",
+    "The hardest part was never the idea itself but convincing others to try it.",
+]
+
+_FAKE_QUESTIONS = [
+    "What do you remember most clearly from your childhood?",
+    "How would you explain your greatest achievement to a child?",
+    "What mistake do you regret the most?",
+    "What did your mornings usually look like?",
+]
+
+_FAKE_REASONS = ["Too brief", "Missing elaboration", "Unusual simplicity", "Non-LLM brevity"]
+
+
+def _default_responder(messages: list, rng: random.Random) -> str:
+    """
+    Produce a plausible reply for the prompts the game sends: 'Target|Question'
+    requests, batched JSON questions and introductions, 'Name|reason' and name-only votes, and
+    free-form turns.
+    """
+    transcript = "\n".join(m['content'] for m in messages)
+    last = messages[-1]['content'] if messages else ""
+
+    speaker = None
+    match = re.search(r"You are ([^.,]+)", transcript)
+    if match:
+        speaker = match.group(1).strip()
+
+    mentioned = [n for n in _KNOWN_NAMES if n in transcript and n != speaker]
+    candidates = mentioned or [f['name'] for f in CORE_FIGURES if f['name'] != speaker]
+    target = rng.choice(candidates)
+
+    if "JSON object mapping each name to its question" in last:
+        asked = [n for n in _KNOWN_NAMES if n in last and n != speaker]
+        return json.dumps({name: rng.choice(_FAKE_QUESTIONS) for name in asked})
+    if "JSON object mapping each name to its introduction" in last:
+        asked = [n for n in _KNOWN_NAMES if n in last]
+        return json.dumps({
+            name: " ".join(rng.sample(_FAKE_SENTENCES, rng.randint(2, 4))).format(speaker=name)
+            for name in asked
+        })
+    if "separated by '|'" in last:
+        return f"{target}|{rng.choice(_FAKE_REASONS)}"
+    if "Target|Question" in last:
+        return f"{target}|{rng.choice(_FAKE_QUESTIONS)}"
+    if "Answer with just the name" in last:
+        return target
+
+    count = rng.randint(2, 4)
+    text = " ".join(rng.sample(_FAKE_SENTENCES, count))
+    return text.format(speaker=speaker or "a figure from history")
+
+
+class FakeBackend(Backend):
+    """
+    In-process stand-in for a model server.
+
+    Args:
+        latency: Mean seconds before a response (time to first chunk when streaming)
+        jitter: Maximum seconds added to or taken from `latency`, uniformly
+        error_rate: Probability that a call raises LLMError
+        responses: None for the built-in game-aware responder, a list of
+            templates used in turn (formatted with `last`, the final message,
+            and `model`), or a callable taking the message list
+        seed: Seed for reproducible latency, errors and response choice
+        prefix_cache: Simulate provider prompt caching: message prefixes seen
+            by an earlier call are reported as cached tokens and only cost
+            part of their share of the latency
+    """
+    name = "fake backend"
+
+    # Share of a cached prefix's latency that is saved
+    CACHED_PREFILL_SAVING = 0.5
+    # Prefixes remembered before the simulated cache is flushed
+    MAX_CACHED_PREFIXES = 10000
+
+    def __init__(self, latency: float = FAKE_LLM_LATENCY, jitter: float = FAKE_LLM_JITTER,
+                 error_rate: float = FAKE_LLM_ERROR_RATE,
+                 responses: Union[None, List[str], Callable[[list], str]] = None,
+                 seed: Optional[int] = FAKE_LLM_SEED, prefix_cache: bool = FAKE_LLM_PREFIX_CACHE):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.responses = responses
+        self.seed = seed
+        self.prefix_cache = prefix_cache
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._prefixes = set()
+
+    def _cached_tokens(self, messages):
+        """Tokens of the longest message prefix an earlier call has seen."""
+        if not self.prefix_cache:
+            return 0
+        digest = hashlib.sha1()
+        digests = []
+        for msg in messages:
+            digest.update(json.dumps(msg, sort_keys=True).encode("utf-8"))
+            digests.append(digest.hexdigest())
+        with self._lock:
+            seen = 0
+            for i, d in enumerate(digests):
+                if d in self._prefixes:
+                    seen = i + 1
+            if len(self._prefixes) > self.MAX_CACHED_PREFIXES:
+                self._prefixes.clear()
+            self._prefixes.update(digests)
+        return estimate_messages_tokens(messages[:seen])
+
+    def _next_call(self, messages):
+        with self._lock:
+            self.calls += 1
+            call = self.calls
+            delay = max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter))
+            failed = self._rng.random() < self.error_rate
+        cached = self._cached_tokens(messages)
+        if cached:
+            delay *= 1 - self.CACHED_PREFILL_SAVING * cached / estimate_messages_tokens(messages)
+        return call, delay, failed, cached
+
+    def _respond(self, call, model, messages):
+        if callable(self.responses):
+            return self.responses(messages)
+        if self.responses:
+            template = self.responses[(call - 1) % len(self.responses)]
+            last = messages[-1]['content'] if messages else ""
+            return template.format(last=last, model=model)
+        # Response content depends only on the request, so concurrent runs
+        # with the same seed produce the same transcript.
+        rng = random.Random(f"{self.seed}:{json.dumps(messages, sort_keys=True)}")
+        return _default_responder(messages, rng)
+
+    def complete(self, model, messages, max_tokens, temperature):
+        call, delay, failed, cached = self._next_call(messages)
+        time.sleep(delay)
+        if failed:
+            raise LLMError(f"Error from {self.name}: injected failure on call {call}", status=503)
+        text = self._respond(call, model, messages)
+        return Completion(text, estimate_messages_tokens(messages), estimate_tokens(text), cached)
+
+    def stream(self, model, messages, max_tokens, temperature):
+        call, delay, failed, _ = self._next_call(messages)
+        time.sleep(delay)
+        if failed:
+            raise LLMError(f"Error from {self.name}: injected failure on call {call}", status=503)
+        for word in re.findall(r"\S+\s*", self._respond(call, model, messages)):
+            yield word
+
+
+def create_backend(name: str = LLM_BACKEND) -> Backend:
+    """Build the backend selected by name: 'groq', 'openai' or 'fake'."""
+    if name == "groq":
+        return GroqBackend()
+    if name == "openai":
+        return OpenAICompatibleBackend()
+    if name == "fake":
+        return FakeBackend()
+    raise ValueError(f"Unknown LLM backend '{name}'. Expected 'groq', 'openai' or 'fake'.")
@@ -0,0 +1,126 @@
+"""
+Local stand-in for an OpenAI-compatible chat-completions server.
+
+Serves `FakeBackend` responses over HTTP, including server-sent-event
+streaming, so the full network path of the game can be exercised offline:
+
+    python -m utils.fake_server --port 8000 --latency 0.3
+
+and set LLM_BACKEND = "openai" with LOCAL_LLM_URL pointing at it.
+"""
+import argparse
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils.backends import FakeBackend, LLMError
+
+
+def make_handler(backend: FakeBackend):
+    """Build a request handler class bound to `backend`."""
+
+    class ChatCompletionsHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length))
+                args = (body["model"], body["messages"], body.get("max_tokens"), body.get("temperature", 0.7))
+            except (KeyError, ValueError) as e:
+                self._send_json(400, {"error": {"message": f"Bad request: {e}"}})
+                return
+
+            try:
+                if body.get("stream"):
+                    self._send_stream(backend.stream(*args))
+                else:
+                    completion = backend.complete(*args)
+                    self._send_json(200, {
+                        "object": "chat.completion",
+                        "model": body["model"],
+                        "choices": [{
+                            "index": 0,
+                            "message": {"role": "assistant", "content": completion.text},
+                            "finish_reason": "stop"
+                        }],
+                        "usage": {
+                            "prompt_tokens": completion.prompt_tokens,
+                            "completion_tokens": completion.completion_tokens,
+                            "total_tokens": completion.prompt_tokens + completion.completion_tokens,
+                            "prompt_tokens_details": {"cached_tokens": completion.cached_tokens or 0}
+                        }
+                    })
+            except LLMError as e:
+                headers = {}
+                if e.retry_after is not None:
+                    headers["Retry-After"] = f"{e.retry_after:g}"
+                self._send_json(e.status or 500, {"error": {"message": str(e)}}, headers)
+
+        def _send_json(self, status, payload, headers=None):
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _send_stream(self, chunks):
+            # Pull the first chunk before committing to a 200, so injected
+            # failures still surface as an error status.
+            chunks = iter(chunks)
+            first = next(chunks, None)
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            def write_event(payload):
+                event = f"data: {payload}\n\n".encode("utf-8")
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(event), event))
+                self.wfile.flush()
+
+            if first is not None:
+                write_event(json.dumps({"choices": [{"index": 0, "delta": {"content": first}}]}))
+            for chunk in chunks:
+                write_event(json.dumps({"choices": [{"index": 0, "delta": {"content": chunk}}]}))
+            write_event("[DONE]")
+            self.wfile.write(b"0\r\n\r\n")
+
+        def log_message(self, format, *args):
+            pass
+
+    return ChatCompletionsHandler
+
+
+def serve(host: str = "127.0.0.1", port: int = 8000, backend: FakeBackend = None) -> ThreadingHTTPServer:
+    """Create the server (call `serve_forever` on it to start handling requests)."""
+    return ThreadingHTTPServer((host, port), make_handler(backend or FakeBackend()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a fake OpenAI-compatible LLM server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.5, help="mean seconds per response")
+    parser.add_argument("--jitter", type=float, default=0.2, help="+/- seconds of uniform jitter")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="probability a request fails")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    backend = FakeBackend(latency=args.latency, jitter=args.jitter,
+                          error_rate=args.error_rate, seed=args.seed)
+    server = serve(args.host, args.port, backend)
+    print(f"Fake LLM server listening on http://{args.host}:{server.server_port}/v1/chat/completions")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,46 +1,98 @@
 """
 Formatting utilities for the game interface.
+
+All terminal I/O goes through the active `ConsoleIO`, so a game can be run
+headless or over a network connection by swapping it with `use_io`.
 """
+import contextvars
 import time
+from contextlib import contextmanager
 from colorama import Fore, Style, init
 
+from utils.tracing import span
+
 # Initialize colorama
 init()
 
+class ConsoleIO:
+    """Default I/O: print to and read from the terminal, with real pauses."""
+    pauses = True
+
+    def write(self, text: str):
+        print(text, end="", flush=True)
+
+    def read(self, name: str, prompt: str, display: str) -> str:
+        """Read the player's reply; `display` is the styled prompt line."""
+        return input(display)
+
+_console = ConsoleIO()
+_current_io = contextvars.ContextVar("game_io", default=_console)
+
+@contextmanager
+def use_io(io):
+    """Route all game output and input through `io` within the block."""
+    token = _current_io.set(io)
+    try:
+        yield io
+    finally:
+        _current_io.reset(token)
+
+def get_io():
+    """Return the I/O the current game is using."""
+    return _current_io.get()
+
+def _emit(text: str = "", end: str = "\n"):
+    _current_io.get().write(text + end)
+
 def clear_screen():
     """Clear the terminal screen."""
-    print("\033[H\033[J", end="")
+    _emit("\033[H\033[J", end="")
 
 def dramatic_pause(seconds: float = 1):
     """Add a dramatic pause between actions."""
-    time.sleep(seconds)
+    if _current_io.get().pauses:
+        with span("dramatic_pause", "pause", seconds=seconds):
+            time.sleep(seconds)
 
 def print_header(text: str):
     """Print a header with styling."""
-    print(f"\n{Fore.CYAN}{Style.BRIGHT}{text}{Style.RESET_ALL}\n")
+    _emit(f"\n{Fore.CYAN}{Style.BRIGHT}{text}{Style.RESET_ALL}\n")
 
 def print_system_message(message: str):
     """Print a system message with styling."""
-    print(f"{Fore.BLUE}{Style.BRIGHT}System: {Style.RESET_ALL}{message}")
+    _emit(f"{Fore.BLUE}{Style.BRIGHT}System: {Style.RESET_ALL}{message}")
 
 def print_user_prompt(name: str, prompt: str = "") -> str:
     """Print a user prompt with styling and return input."""
-    if prompt:
-        return input(f"{Fore.GREEN}{Style.BRIGHT}{name} (You): {Style.RESET_ALL}{prompt}")
-    return input(f"{Fore.GREEN}{Style.BRIGHT}{name} (You): {Style.RESET_ALL}")
+    display = f"{Fore.GREEN}{Style.BRIGHT}{name} (You): {Style.RESET_ALL}{prompt}"
+    return _current_io.get().read(name, prompt, display)
 
 def print_ai_message(name: str, message: str):
     """Print an AI message with styling."""
-    print(f"{Fore.YELLOW}{Style.BRIGHT}{name}: {Style.RESET_ALL}{message}")
+    _emit(f"{Fore.YELLOW}{Style.BRIGHT}{name}: {Style.RESET_ALL}{message}")
+
+def print_ai_message_stream(name: str, chunks) -> str:
+    """Print an AI message as its chunks arrive and return the full text."""
+    _emit(f"{Fore.YELLOW}{Style.BRIGHT}{name}: {Style.RESET_ALL}", end="")
+    parts = []
+    for chunk in chunks:
+        if not parts:
+            chunk = chunk.lstrip()
+            if not chunk:
+                continue
+        parts.append(chunk)
+        _emit(chunk, end="")
+    _emit()
+    return "".join(parts).rstrip()
 
 def print_result(message: str, success: bool = True):
     """Print a result message with appropriate styling."""
     if success:
-        print(f"\n{Fore.GREEN}{Style.BRIGHT}✓ {message}{Style.RESET_ALL}")
+        _emit(f"\n{Fore.GREEN}{Style.BRIGHT}✓ {message}{Style.RESET_ALL}")
     else:
-        print(f"\n{Fore.RED}{Style.BRIGHT}✗ {message}{Style.RESET_ALL}")
+        _emit(f"\n{Fore.RED}{Style.BRIGHT}✗ {message}{Style.RESET_ALL}")
 
 def print_phase(phase_name: str):
     """Print a phase header with styling."""
-    print(f"\n{Fore.MAGENTA}{Style.BRIGHT}[{phase_name}]{Style.RESET_ALL}")
-    print("-" * (len(phase_name) + 4))
+    _emit(f"\n{Fore.MAGENTA}{Style.BRIGHT}[{phase_name}]{Style.RESET_ALL}")
+    _emit("-" * (len(phase_name) + 4))
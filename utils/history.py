@@ -0,0 +1,141 @@
+"""
+Token-budgeted conversation histories.
+
+Figure histories in `conversations` keep every turn of the game, but the
+model only needs the gist of the early ones. `fit_history` turns a history
+into the message list actually sent: recent turns verbatim, everything
+older folded into a rolling summary, all within HISTORY_TOKEN_BUDGET
+tokens (estimated locally, see `utils.tokens`).
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+from config import HISTORY_TOKEN_BUDGET, HISTORY_SUMMARY_TOKENS, MODEL_NAME
+from utils.llm import get_groq_response
+from utils.tokens import estimate_tokens, MESSAGE_OVERHEAD
+
+SUMMARY_PROMPT = (
+    "Summarize the conversation below in a few sentences so it can be continued "
+    "later. Keep who said what, the questions asked and any claims made about "
+    "identity or history."
+)
+
+
+def _prefix_digests(history: list) -> List[str]:
+    """digests[i] identifies the first i messages of `history`."""
+    digests = [hashlib.sha1().hexdigest()]
+    for msg in history:
+        step = hashlib.sha1(digests[-1].encode("utf-8"))
+        step.update(f"\0{msg['role'].lower()}\0{msg['content']}".encode("utf-8"))
+        digests.append(step.hexdigest())
+    return digests
+
+
+class HistoryWindow:
+    """
+    Fits histories into a per-call token budget with rolling summaries.
+
+    Summaries are stored by a digest of the messages they cover, so the same
+    window serves every figure and game at once: a history that only grew
+    since its last call extends its earlier summary instead of re-reading
+    the whole prefix.
+
+    Args:
+        budget: Prompt tokens allowed per call, or None to send histories whole
+        summary_tokens: Length cap of each summary
+        model: Model that writes the summaries
+        max_entries: Summaries kept before the least recently used is dropped
+    """
+
+    def __init__(self, budget: Optional[int] = HISTORY_TOKEN_BUDGET,
+                 summary_tokens: int = HISTORY_SUMMARY_TOKENS, model: str = MODEL_NAME,
+                 max_entries: int = 256):
+        self.budget = budget
+        self.summary_tokens = summary_tokens
+        self.model = model
+        self.max_entries = max_entries
+        self._summaries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _cached(self, digest: str) -> Optional[str]:
+        with self._lock:
+            summary = self._summaries.get(digest)
+            if summary is not None:
+                self._summaries.move_to_end(digest)
+            return summary
+
+    def _store(self, digest: str, summary: str):
+        with self._lock:
+            self._summaries[digest] = summary
+            self._summaries.move_to_end(digest)
+            while len(self._summaries) > self.max_entries:
+                self._summaries.popitem(last=False)
+
+    def _summarize(self, previous: str, messages: list) -> str:
+        lines = [f"Earlier summary: {previous}"] if previous else []
+        lines += [f"{m['role'].capitalize()}: {m['content']}" for m in messages]
+        request = [{'role': 'user', 'content': "\n".join(lines)}]
+        return get_groq_response(self.model, SUMMARY_PROMPT, request,
+                                 max_tokens=self.summary_tokens, cache=True, role="summary").strip()
+
+    def fit(self, history: list) -> list:
+        """
+        Return the messages to send for `history`.
+
+        The last message (usually the prompt being answered) is always kept
+        verbatim. When the history is over budget, the oldest turns are
+        replaced by a summary message and the recent ones trimmed to half
+        the budget, so a new summary is only needed every few turns.
+
+        Args:
+            history: The figure's full conversation history
+
+        Returns:
+            A new message list; `history` itself is not modified
+        """
+        if self.budget is None or not history:
+            return list(history)
+        sizes = [estimate_tokens(m['content']) + MESSAGE_OVERHEAD for m in history]
+        if sum(sizes) <= self.budget:
+            return list(history)
+
+        digests = _prefix_digests(history)
+        summary_size = self.summary_tokens + MESSAGE_OVERHEAD
+
+        # Reuse the latest summary of a prefix of this history if the turns
+        # after it still fit
+        covered, summary = 0, ""
+        for i in range(len(history) - 1, 0, -1):
+            cached = self._cached(digests[i])
+            if cached is not None:
+                covered, summary = i, cached
+                break
+        if covered and summary_size + sum(sizes[covered:]) <= self.budget:
+            return self._window(summary, history[covered:])
+
+        # Otherwise fold everything but the last half-budget of turns into it
+        split, recent = len(history) - 1, sizes[-1]
+        while split > covered + 1 and summary_size + recent + sizes[split - 1] <= self.budget // 2:
+            split -= 1
+            recent += sizes[split]
+        if split == covered:
+            # Only the last message is left and it is over budget on its own
+            return self._window(summary, history[covered:]) if summary else list(history)
+        summary = self._summarize(summary, history[covered:split])
+        self._store(digests[split], summary)
+        return self._window(summary, history[split:])
+
+    @staticmethod
+    def _window(summary: str, recent: list) -> list:
+        return [{'role': 'system', 'content': f"Summary of the conversation so far: {summary}"}] + recent
+
+
+_window = HistoryWindow()
+
+
+def fit_history(history: list) -> list:
+    """Fit `history` into the token budget with the shared `HistoryWindow`."""
+    return _window.fit(history)
+
@@ -1,46 +1,516 @@
 """
-LLM utilities for interacting with the GROQ API.
+LLM utilities for interacting with the GROQ API (or another backend).
+
+Every phase talks to the model through the single `LLMClient` held here, so
+the backend, caching and streaming are configured in one place.
 """
-import requests
-from config import GROQ_API_KEY
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterator, Optional
+
+from config import (
+    LLM_CONCURRENCY,
+    LLM_STREAMING,
+    LLM_CACHE_SIZE,
+    LLM_CACHE_PATH,
+    LLM_RPM_LIMIT,
+    LLM_TPM_LIMIT,
+    MODEL_ROUTES
+)
+from utils.backends import Backend, Completion, LLMError, create_backend
+from utils.cache import ResponseCache, request_key
+from utils.formatting import print_ai_message, print_ai_message_stream
+from utils.ratelimit import RateLimiter, RetryPolicy
+from utils.routing import LatencyTracker, hedged, resolve_route
+from utils.tokens import estimate_messages_tokens, estimate_tokens
+from utils.tracing import span
+
+
+def normalize_messages(system_prompt: str, conversation_history: list) -> list:
+    """
+    Build a chat-completions message list.
+
+    Histories in the phases use both 'user'/'assistant' and 'User'/'Assistant'
+    roles; anything that is not a user or system turn is sent as assistant.
+    """
+    messages = []
+    if system_prompt:
+        messages.append({"role": "system", "content": system_prompt})
+
+    for msg in conversation_history:
+        role = msg['role'].lower()
+        if role not in ('user', 'system'):
+            role = 'assistant'
+        messages.append({"role": role, "content": msg['content']})
+
+    return messages
+
+
+class LLMStats:
+    """Running totals of the requests made through a client."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Zero every counter."""
+        with self._lock:
+            self.calls = 0
+            self.retries = 0
+            self.hedges = 0
+            self.cache_hits = 0
+            self.prompt_tokens = 0
+            self.cached_tokens = 0
+            self.completion_tokens = 0
+
+    def record_call(self, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0):
+        """
+        Count one request that reached the backend; `cached_tokens` of its
+        prompt were served from the provider's prompt cache.
+        """
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += prompt_tokens
+            self.cached_tokens += cached_tokens
+            self.completion_tokens += completion_tokens
+
+    def record_retry(self):
+        """Count one failed attempt that is being retried."""
+        with self._lock:
+            self.retries += 1
+
+    def record_hedge(self):
+        """Count one backup request sent for a slow primary."""
+        with self._lock:
+            self.hedges += 1
+
+    def record_cache_hit(self):
+        """Count one request answered from the response cache."""
+        with self._lock:
+            self.cache_hits += 1
+
+    def snapshot(self) -> dict:
+        """Return the current counters as a dictionary."""
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "retries": self.retries,
+                "hedges": self.hedges,
+                "cache_hits": self.cache_hits,
+                "prompt_tokens": self.prompt_tokens,
+                "cached_tokens": self.cached_tokens,
+                "completion_tokens": self.completion_tokens,
+            }
+
 
-def get_groq_response(model: str, system_prompt: str, conversation_history: list, max_tokens: int = 200) -> str:
+class LLMClient:
     """
-    Get a response from the GROQ API.
-    
+    Chat-completions client in front of a pluggable backend.
+
+    Args:
+        backend: Where requests go (see `utils.backends`); defaults to the
+            one selected by LLM_BACKEND
+        cache: Response cache consulted by calls that allow caching
+        limiter: Rate limiter every request waits on, if any
+        retry: How failed requests are retried; a 429 also holds back
+            every other request through `limiter`
+        routes: Per-role model settings (see MODEL_ROUTES and `utils.routing`)
+    """
+
+    # Completion tokens reserved against the token limit when no cap is given
+    COMPLETION_RESERVE = 200
+
+    def __init__(self, backend: Optional[Backend] = None, cache: Optional[ResponseCache] = None,
+                 limiter: Optional[RateLimiter] = None, retry: Optional[RetryPolicy] = None,
+                 routes: Optional[Dict[str, dict]] = None):
+        self.backend = backend if backend is not None else create_backend()
+        self.cache = cache
+        self.limiter = limiter
+        self.retry = retry if retry is not None else RetryPolicy()
+        self.routes = routes if routes is not None else MODEL_ROUTES
+        self.latency = LatencyTracker()
+        self.stats = LLMStats()
+        self._hedge_pool = None
+        self._hedge_lock = threading.Lock()
+
+    def _reserve(self, messages, max_tokens) -> int:
+        """Wait for the rate limiter; returns the tokens reserved."""
+        reserved = estimate_messages_tokens(messages) + (max_tokens or self.COMPLETION_RESERVE)
+        if self.limiter is not None:
+            self.limiter.acquire(reserved)
+        return reserved
+
+    def _settle(self, reserved, used):
+        if self.limiter is not None:
+            self.limiter.settle(reserved, used)
+
+    def _backoff(self, attempt, error, trace) -> bool:
+        """
+        Wait before retrying after failed attempt number `attempt`.
+        Returns False if the error should be raised instead.
+        """
+        if not error.retryable or attempt > self.retry.max_retries:
+            return False
+        delay = self.retry.delay(attempt, error.retry_after)
+        if error.status == 429 and self.limiter is not None:
+            self.limiter.block_for(delay)
+        trace["retries"] = attempt
+        self.stats.record_retry()
+        time.sleep(delay)
+        return True
+
+    def _cache_key(self, model, messages, max_tokens, temperature, cache):
+        if not cache or self.cache is None:
+            return None
+        return request_key(model, messages, temperature, max_tokens)
+
+    def _send(self, model, messages, max_tokens, temperature, trace) -> Completion:
+        """One completion from the backend, retried as `self.retry` allows."""
+        attempt = 0
+        while True:
+            reserved = self._reserve(messages, max_tokens)
+            start = time.perf_counter()
+            try:
+                completion = self.backend.complete(model, messages, max_tokens, temperature)
+                break
+            except LLMError as e:
+                # A failed attempt used no tokens; hand its reservation back
+                self._settle(reserved, 0)
+                attempt += 1
+                if not self._backoff(attempt, e, trace):
+                    raise
+        self.latency.record(model, time.perf_counter() - start, "total")
+
+        prompt_tokens = completion.prompt_tokens
+        if prompt_tokens is None:
+            prompt_tokens = estimate_messages_tokens(messages)
+        completion_tokens = completion.completion_tokens
+        if completion_tokens is None:
+            completion_tokens = estimate_tokens(completion.text)
+        self._settle(reserved, prompt_tokens + completion_tokens)
+        return completion._replace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+    def _send_stream(self, model, messages, max_tokens, temperature, trace) -> Iterator[str]:
+        """
+        Stream one completion from the backend. A stream is only retried if
+        it failed before its first chunk.
+        """
+        attempt = 0
+        while True:
+            reserved = self._reserve(messages, max_tokens)
+            start = time.perf_counter()
+            parts = []
+            try:
+                for chunk in self.backend.stream(model, messages, max_tokens, temperature):
+                    if not parts:
+                        self.latency.record(model, time.perf_counter() - start, "ttft")
+                    parts.append(chunk)
+                    yield chunk
+                break
+            except LLMError as e:
+                # Settle for what the failed attempt streamed, if anything
+                self._settle(reserved, self._stream_usage(messages, parts))
+                attempt += 1
+                if parts or not self._backoff(attempt, e, trace):
+                    raise
+            except GeneratorExit:
+                # Closed early by the consumer, e.g. a hedge that lost the race
+                self._settle(reserved, self._stream_usage(messages, parts))
+                raise
+        self._settle(reserved, self._stream_usage(messages, parts))
+
+    @staticmethod
+    def _stream_usage(messages, parts) -> int:
+        """Estimated tokens used by a stream that produced `parts` (none if it never started)."""
+        if not parts:
+            return 0
+        return estimate_messages_tokens(messages) + estimate_tokens("".join(parts))
+
+    def _hedge_executor(self) -> ThreadPoolExecutor:
+        """Pool the backups of hedged calls run on (each primary has its own thread)."""
+        with self._hedge_lock:
+            if self._hedge_pool is None:
+                self._hedge_pool = ThreadPoolExecutor(max_workers=max(2, 2 * LLM_CONCURRENCY))
+            return self._hedge_pool
+
+    def complete(self, model: str, system_prompt: str, conversation_history: list,
+                 max_tokens: Optional[int] = 200, temperature: float = 0.7,
+                 cache: bool = False, role: Optional[str] = None) -> str:
+        """
+        Get a completion for the conversation.
+
+        Args:
+            model: Model name to use
+            system_prompt: System prompt for the conversation
+            conversation_history: List of conversation messages
+            max_tokens: Completion length cap, or None for the provider default
+            temperature: Sampling temperature
+            cache: Allow an identical earlier response to be reused; leave
+                off for turns that need fresh sampling
+            role: Kind of turn ('intro', 'question', 'answer', 'vote', ...);
+                its MODEL_ROUTES entry overrides the model, max_tokens and
+                temperature and may enable hedging
+
+        Returns:
+            Generated response text
+        """
+        route = resolve_route(self.routes, role, model, max_tokens, temperature)
+        model, max_tokens, temperature = route.model, route.max_tokens, route.temperature
+        messages = normalize_messages(system_prompt, conversation_history)
+        with span("llm.complete", "llm", model=model, role=role, prompt_messages=len(messages),
+                  prompt_chars=sum(len(m['content']) for m in messages), retries=0) as trace:
+            key = self._cache_key(model, messages, max_tokens, temperature, cache)
+            if key is not None:
+                cached = self.cache.get(key)
+                trace["cache_hit"] = cached is not None
+                if cached is not None:
+                    self.stats.record_cache_hit()
+                    trace["completion_chars"] = len(cached)
+                    return cached
+
+            def send(model):
+                return self._send(model, messages, max_tokens, temperature, trace)
+
+            hedge_after = self.latency.hedge_delay(route, "total")
+            if hedge_after is None:
+                completion = send(model)
+            else:
+                # The losing request was still paid for, so it is counted too
+                completion = hedged(self._hedge_executor(), send, route, hedge_after,
+                                    discard=self._record_completion,
+                                    on_hedge=lambda: self._record_hedge(trace))
+
+            cached_tokens = self._record_completion(completion)
+            trace.update(prompt_tokens=completion.prompt_tokens, cached_tokens=cached_tokens,
+                         completion_tokens=completion.completion_tokens,
+                         completion_chars=len(completion.text))
+
+            if key is not None:
+                self.cache.put(key, completion.text)
+            return completion.text
+
+    def stream(self, model: str, system_prompt: str, conversation_history: list,
+               max_tokens: Optional[int] = 200, temperature: float = 0.7,
+               cache: bool = False, role: Optional[str] = None) -> Iterator[str]:
+        """
+        Stream a completion chunk by chunk.
+
+        Takes the same arguments as `complete` and yields the content deltas
+        in order; joining them gives the full response text. A cached
+        response is yielded as a single chunk. Hedging races the time to
+        the first chunk.
+        """
+        route = resolve_route(self.routes, role, model, max_tokens, temperature)
+        model, max_tokens, temperature = route.model, route.max_tokens, route.temperature
+        messages = normalize_messages(system_prompt, conversation_history)
+        with span("llm.stream", "llm", model=model, role=role, prompt_messages=len(messages),
+                  prompt_chars=sum(len(m['content']) for m in messages), retries=0) as trace:
+            key = self._cache_key(model, messages, max_tokens, temperature, cache)
+            if key is not None:
+                cached = self.cache.get(key)
+                trace["cache_hit"] = cached is not None
+                if cached is not None:
+                    self.stats.record_cache_hit()
+                    trace["completion_chars"] = len(cached)
+                    yield cached
+                    return
+
+            def open_stream(model):
+                chunks = self._send_stream(model, messages, max_tokens, temperature, trace)
+                return next(chunks, None), chunks
+
+            start = time.perf_counter()
+            hedge_after = self.latency.hedge_delay(route, "ttft")
+            if hedge_after is None:
+                first, chunks = open_stream(model)
+            else:
+                first, chunks = hedged(self._hedge_executor(), open_stream, route, hedge_after,
+                                       discard=lambda opened: self._discard_stream(messages, *opened),
+                                       on_hedge=lambda: self._record_hedge(trace))
+            trace["time_to_first_token"] = time.perf_counter() - start
+
+            parts = []
+            if first is not None:
+                parts.append(first)
+                yield first
+            for chunk in chunks:
+                parts.append(chunk)
+                yield chunk
+
+            # Streams carry no usage block, so both sides are estimated
+            content = "".join(parts)
+            prompt_tokens, completion_tokens = estimate_messages_tokens(messages), estimate_tokens(content)
+            self.stats.record_call(prompt_tokens, completion_tokens)
+            trace.update(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                         completion_chars=len(content))
+
+            if key is not None:
+                self.cache.put(key, content)
+
+    def _record_completion(self, completion: Completion) -> int:
+        """Count a finished completion in the stats; returns its cached prompt tokens."""
+        cached_tokens = completion.cached_tokens or 0
+        self.stats.record_call(completion.prompt_tokens, completion.completion_tokens, cached_tokens)
+        return cached_tokens
+
+    def _discard_stream(self, messages, first, chunks):
+        """Close a stream that lost a hedge, counting what it produced."""
+        chunks.close()
+        self.stats.record_call(estimate_messages_tokens(messages), estimate_tokens(first or ""))
+
+    def _record_hedge(self, trace):
+        self.stats.record_hedge()
+        trace["hedged"] = True
+
+    def close(self):
+        """Release the backend's connections and the cache."""
+        if self._hedge_pool is not None:
+            self._hedge_pool.shutdown(wait=False)
+        self.backend.close()
+        if self.cache is not None:
+            self.cache.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def new_client(cache: bool = True) -> LLMClient:
+    """
+    A client configured from config.py: the selected backend, the rate
+    limits and, if `cache` is set and LLM_CACHE_SIZE allows, a response cache.
+    """
+    response_cache = ResponseCache(LLM_CACHE_SIZE, LLM_CACHE_PATH) if cache and LLM_CACHE_SIZE > 0 else None
+    limiter = RateLimiter(LLM_RPM_LIMIT, LLM_TPM_LIMIT) if LLM_RPM_LIMIT or LLM_TPM_LIMIT else None
+    return LLMClient(cache=response_cache, limiter=limiter)
+
+
+def get_client() -> LLMClient:
+    """Return the process-wide client, creating it on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = new_client()
+        return _client
+
+
+def set_client(client: LLMClient):
+    """Replace the process-wide client (e.g. to use another backend)."""
+    global _client
+    with _client_lock:
+        _client = client
+
+
+def get_groq_response(model: str, system_prompt: str, conversation_history: list, max_tokens: int = 200,
+                      cache: bool = False, role: Optional[str] = None) -> str:
+    """
+    Get a response from the GROQ API through the shared client.
+
     Args:
         model: Model name to use
         system_prompt: System prompt for the conversation
         conversation_history: List of conversation messages
-        
+        max_tokens: Completion length cap
+        cache: Allow a cached response for an identical request
+        role: Kind of turn, for per-role routing (see MODEL_ROUTES)
+
     Returns:
         Generated response text
     """
-    headers = {
-        "Authorization": f"Bearer {GROQ_API_KEY}"
-    }
-    
-    messages = []
-    if system_prompt:
-        messages.append({"role": "system", "content": system_prompt})
-    
-    for msg in conversation_history:
-        messages.append(msg)
-    
-    data = {
-        "model": model,
-        "messages": messages,
-        "temperature": 0.7,
-        "max_tokens": max_tokens
-    }
-    
-    response = requests.post(
-        "https://api.groq.com/openai/v1/chat/completions",
-        headers=headers,
-        json=data
-    )
-    
-    if response.status_code != 200:
-        raise Exception(f"Error from GROQ API: {response.text}")
-    
-    return response.json()["choices"][0]["message"]["content"]
+    return get_client().complete(model, system_prompt, conversation_history, max_tokens=max_tokens, cache=cache,
+                                 role=role)
+
+
+def stream_groq_response(model: str, system_prompt: str, conversation_history: list, max_tokens: int = 200,
+                         cache: bool = False, role: Optional[str] = None) -> Iterator[str]:
+    """Stream a response from the GROQ API through the shared client."""
+    return get_client().stream(model, system_prompt, conversation_history, max_tokens=max_tokens, cache=cache,
+                               role=role)
+
+
+def get_spoken_response(name: str, model: str, system_prompt: str, conversation_history: list,
+                        max_tokens: Optional[int] = 200, cache: bool = False, role: Optional[str] = None) -> str:
+    """
+    Generate `name`'s next message and print it.
+
+    With LLM_STREAMING on, tokens are rendered as they arrive; either way
+    the complete text is returned for the history and pattern analysis.
+    """
+    client = get_client()
+    if LLM_STREAMING:
+        return print_ai_message_stream(
+            name, client.stream(model, system_prompt, conversation_history, max_tokens=max_tokens, cache=cache,
+                                role=role)
+        )
+
+    response = client.complete(model, system_prompt, conversation_history, max_tokens=max_tokens,
+                               cache=cache, role=role).strip()
+    print_ai_message(name, response)
+    return response
+
+
+class LiveResponse:
+    """
+    A response generated on a worker thread that the game can show while it
+    is still arriving.
+
+    The worker calls `generate`; the presenter later calls `speak` with the
+    worker's future. A response that is already finished is printed whole,
+    one still being generated is streamed from the chunks received so far,
+    so the player never waits on a silent pause for a prefetched turn.
+    """
+
+    def __init__(self):
+        self._parts = []
+        self._done = False
+        self._cond = threading.Condition()
+
+    def generate(self, model: str, system_prompt: str, conversation_history: list,
+                 max_tokens: Optional[int] = 200, cache: bool = False, role: Optional[str] = None) -> str:
+        """Generate the response (streamed if LLM_STREAMING is on); returns its text."""
+        client = get_client()
+        try:
+            if LLM_STREAMING:
+                for chunk in client.stream(model, system_prompt, conversation_history, max_tokens=max_tokens,
+                                           cache=cache, role=role):
+                    with self._cond:
+                        self._parts.append(chunk)
+                        self._cond.notify_all()
+            else:
+                text = client.complete(model, system_prompt, conversation_history, max_tokens=max_tokens,
+                                       cache=cache, role=role)
+                with self._cond:
+                    self._parts.append(text)
+        finally:
+            with self._cond:
+                self._done = True
+                self._cond.notify_all()
+        return "".join(self._parts).strip()
+
+    def _chunks(self, future: Future) -> Iterator[str]:
+        """The chunks received so far, then the rest as they arrive."""
+        sent = 0
+        while True:
+            with self._cond:
+                # Also stop if the worker ended without generating (e.g. it failed first)
+                while sent == len(self._parts) and not self._done and not future.done():
+                    self._cond.wait(0.1)
+                new, finished = self._parts[sent:], self._done or future.done()
+            sent += len(new)
+            yield from new
+            if finished and sent == len(self._parts):
+                return
+
+    def speak(self, name: str, future: Future) -> str:
+        """
+        Print the response as `name` and return the worker's result. Raises
+        whatever the worker raised.
+        """
+        if future.done() or not LLM_STREAMING:
+            response = future.result()
+            print_ai_message(name, response)
+            return response
+        print_ai_message_stream(name, self._chunks(future))
+        return future.result()
@@ -0,0 +1,56 @@
+"""
+Helpers for issuing independent LLM calls concurrently.
+"""
+import contextvars
+import threading
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import Callable, List
+
+from config import LLM_CONCURRENCY
+
+
+def submit(executor: Executor, fn: Callable, *args, **kwargs) -> Future:
+    """Submit `fn` to the executor, carrying over the caller's context variables."""
+    ctx = contextvars.copy_context()
+    return executor.submit(ctx.run, fn, *args, **kwargs)
+
+
+def spawn(fn: Callable, *args) -> Future:
+    """
+    Run `fn` on a new daemon thread right away, carrying over the caller's
+    context variables. Unlike `submit`, the call never queues behind others.
+    """
+    future = Future()
+    ctx = contextvars.copy_context()
+
+    def run():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            result = ctx.run(fn, *args)
+        except BaseException as e:
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+
+    threading.Thread(target=run, daemon=True).start()
+    return future
+
+
+def run_concurrently(calls: List[Callable], max_workers: int = LLM_CONCURRENCY) -> list:
+    """
+    Run zero-argument callables concurrently.
+
+    Args:
+        calls: Callables to run; they must not depend on each other
+        max_workers: Upper bound on calls in flight (1 runs them inline)
+
+    Returns:
+        Results in the same order as `calls`
+    """
+    if max_workers <= 1 or len(calls) <= 1:
+        return [call() for call in calls]
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(calls))) as executor:
+        futures = [submit(executor, call) for call in calls]
+        return [future.result() for future in futures]
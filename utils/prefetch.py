@@ -0,0 +1,104 @@
+"""
+Speculative pre-generation of AI turns.
+"""
+import hashlib
+import json
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Hashable
+
+from config import LLM_CONCURRENCY
+from utils.parallel import submit
+from utils.ratelimit import BACKGROUND, priority
+
+
+def fingerprint(inputs: Any) -> str:
+    """Stable digest of a call's inputs (any JSON-serialisable structure)."""
+    encoded = json.dumps(inputs, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha1(encoded).hexdigest()
+
+
+def _in_background(fn: Callable, *args):
+    """Run `fn` with its LLM requests queued behind turns a player waits on."""
+    with priority(BACKGROUND):
+        return fn(*args)
+
+
+class Prefetcher:
+    """
+    Start LLM calls in the background as soon as their inputs are known.
+
+    Each prefetch is stored under a key with a fingerprint of its inputs.
+    `take` hands back the background result if the inputs are still the
+    same, and otherwise drops it and makes the call inline. The game loop
+    uses this to hide model latency behind `input()` and `dramatic_pause`.
+    Prefetches are issued at background priority (see `utils.ratelimit`).
+
+    Args:
+        max_workers: Upper bound on prefetches running at once
+    """
+
+    def __init__(self, max_workers: int = LLM_CONCURRENCY):
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def start(self, key: Hashable, inputs: Any, fn: Callable, *args):
+        """
+        Begin `fn(*args)` in the background under `key`.
+
+        Does nothing if the same inputs are already in flight; a prefetch
+        for `key` with different inputs is cancelled and replaced.
+        """
+        digest = fingerprint(inputs)
+        with self._lock:
+            current = self._pending.get(key)
+            if current is not None:
+                if current[0] == digest:
+                    return
+                current[1].cancel()
+            self._pending[key] = (digest, submit(self._executor, _in_background, fn, *args))
+
+    def take(self, key: Hashable, inputs: Any, fn: Callable, *args):
+        """
+        Return the result for `key`, waiting for the prefetch if it matches
+        `inputs` and calling `fn(*args)` directly otherwise.
+        """
+        return self.take_future(key, inputs, fn, *args).result()
+
+    def take_future(self, key: Hashable, inputs: Any, fn: Callable, *args) -> Future:
+        """
+        Like `take`, but return the prefetch's future without waiting for
+        it. Without a matching prefetch, `fn(*args)` is called directly and
+        its outcome returned as a finished future.
+        """
+        with self._lock:
+            current = self._pending.pop(key, None)
+        if current is not None:
+            if current[0] == fingerprint(inputs):
+                return current[1]
+            current[1].cancel()
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def cancel(self):
+        """Drop every outstanding prefetch."""
+        with self._lock:
+            for _, future in self._pending.values():
+                future.cancel()
+            self._pending.clear()
+
+    def shutdown(self):
+        """Cancel what has not started; calls already running finish unobserved."""
+        self.cancel()
+        self._executor.shutdown(wait=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
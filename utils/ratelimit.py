@@ -0,0 +1,168 @@
+"""
+Client-side rate limiting and retries for LLM requests.
+
+`RateLimiter` keeps requests-per-minute and tokens-per-minute buckets and
+admits waiting requests in priority order, so turns a player is waiting on
+go ahead of prefetches. `RetryPolicy` decides how long to back off after a
+retryable failure, honouring the provider's Retry-After.
+"""
+import contextvars
+import heapq
+import itertools
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+from config import LLM_BACKOFF_BASE, LLM_BACKOFF_MAX, LLM_MAX_RETRIES
+
+# Request priorities; lower is served first
+FOREGROUND = 0
+BACKGROUND = 1
+
+_priority = contextvars.ContextVar("llm_priority", default=FOREGROUND)
+
+
+@contextmanager
+def priority(level: int):
+    """Issue the LLM requests made within the block at priority `level`."""
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> int:
+    """The priority requests from this context are issued at."""
+    return _priority.get()
+
+
+class TokenBucket:
+    """
+    A bucket refilled continuously at `per_minute` units a minute, holding
+    at most one minute's worth.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.level = per_minute
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` can be taken (0 if it can be now)."""
+        self._refill(now)
+        # Requests larger than the whole bucket go through once it is full
+        amount = min(amount, self.capacity)
+        return max(0.0, (amount - self.level) / self.rate)
+
+    def take(self, amount: float, now: float):
+        self._refill(now)
+        self.level -= amount
+
+
+class RateLimiter:
+    """
+    Admits requests within requests-per-minute and tokens-per-minute limits.
+
+    Waiting requests are admitted strictly by (priority, arrival), so a
+    background request never overtakes a foreground one.
+
+    Args:
+        requests_per_minute: Request limit, or None for no limit
+        tokens_per_minute: Token limit (prompt plus completion), or None
+    """
+
+    def __init__(self, requests_per_minute: Optional[float] = None,
+                 tokens_per_minute: Optional[float] = None):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self._blocked_until = 0.0
+        self._waiting = []
+        self._order = itertools.count()
+        self._cond = threading.Condition()
+
+    def _wait_time(self, tokens: int, now: float) -> float:
+        wait = self._blocked_until - now
+        if self.requests is not None:
+            wait = max(wait, self.requests.wait_time(1, now))
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.wait_time(tokens, now))
+        return max(0.0, wait)
+
+    def acquire(self, tokens: int, level: Optional[int] = None):
+        """
+        Block until a request of about `tokens` tokens may be sent.
+
+        Args:
+            tokens: Estimated prompt plus completion tokens
+            level: Priority; defaults to the current context's
+        """
+        entry = (current_priority() if level is None else level, next(self._order))
+        with self._cond:
+            heapq.heappush(self._waiting, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    if self._waiting[0] == entry:
+                        wait = self._wait_time(tokens, now)
+                        if wait <= 0:
+                            break
+                        self._cond.wait(wait)
+                    else:
+                        self._cond.wait()
+                if self.requests is not None:
+                    self.requests.take(1, now)
+                if self.tokens is not None:
+                    self.tokens.take(tokens, now)
+            finally:
+                self._waiting.remove(entry)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+
+    def settle(self, reserved: int, used: int):
+        """Correct the token bucket once a request's real usage is known."""
+        if self.tokens is None:
+            return
+        with self._cond:
+            self.tokens.take(used - reserved, time.monotonic())
+            self._cond.notify_all()
+
+    def block_for(self, seconds: float):
+        """Hold every request back for `seconds` (after a rate-limit response)."""
+        with self._cond:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+            self._cond.notify_all()
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter.
+
+    Args:
+        max_retries: Retries after the first attempt before giving up
+        base_delay: Upper bound of the first backoff, in seconds
+        max_delay: Cap on any single backoff
+    """
+
+    def __init__(self, max_retries: int = LLM_MAX_RETRIES, base_delay: float = LLM_BACKOFF_BASE,
+                 max_delay: float = LLM_BACKOFF_MAX):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Seconds to wait before retry number `attempt` (starting at 1). A
+        server-supplied Retry-After is a lower bound.
+        """
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        if retry_after is not None:
+            backoff = max(backoff, retry_after)
+        return backoff
@@ -0,0 +1,119 @@
+"""
+Per-role model routing and hedged requests.
+
+Each kind of turn (see MODEL_ROUTES) can use its own model, completion cap
+and temperature. A route can also hedge: if the model has not answered
+within `hedge_after` seconds, the same request goes out again (optionally
+to `hedge_model`) and whichever finishes first is used.
+"""
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Executor, wait
+from typing import Callable, Dict, NamedTuple, Optional, Union
+
+import numpy as np
+
+from config import LLM_HEDGE_AFTER
+from utils.parallel import spawn, submit
+
+
+class Route(NamedTuple):
+    """How the requests of one role are made."""
+    model: str
+    max_tokens: Optional[int]
+    temperature: float
+    hedge_after: Union[None, float, str] = None
+    hedge_model: Optional[str] = None
+
+
+def resolve_route(routes: Dict[str, dict], role: Optional[str], model: str,
+                  max_tokens: Optional[int], temperature: float) -> Route:
+    """
+    The route for `role`. Anything the role's entry leaves out comes from
+    the call's own arguments (or LLM_HEDGE_AFTER), so calls without a role,
+    or with an unknown one, behave as before.
+    """
+    spec = routes.get(role, {}) if role else {}
+    return Route(
+        model=spec.get("model", model),
+        max_tokens=spec.get("max_tokens", max_tokens),
+        temperature=spec.get("temperature", temperature),
+        hedge_after=spec.get("hedge_after", LLM_HEDGE_AFTER),
+        hedge_model=spec.get("hedge_model"),
+    )
+
+
+class LatencyTracker:
+    """
+    Recent latencies per model, for hedging at a percentile. Total
+    completion times ("total") and times to the first streamed chunk
+    ("ttft") are kept in separate windows.
+
+    Args:
+        window: Latencies kept per model and kind
+        min_samples: Samples needed before a percentile is reported
+    """
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, model: str, seconds: float, kind: str = "total"):
+        with self._lock:
+            self._samples.setdefault((model, kind), deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, model: str, q: float, kind: str = "total") -> Optional[float]:
+        """The q-th percentile `kind` latency of `model`, or None with too few samples."""
+        with self._lock:
+            samples = list(self._samples.get((model, kind), ()))
+        if len(samples) < self.min_samples:
+            return None
+        return float(np.percentile(samples, q))
+
+    def hedge_delay(self, route: Route, kind: str = "total") -> Optional[float]:
+        """
+        Seconds to wait before hedging on `route`: its fixed `hedge_after`,
+        or for a percentile such as "p95" that percentile of the model's
+        recent `kind` latencies. None means no hedging.
+        """
+        if isinstance(route.hedge_after, str):
+            return self.percentile(route.model, float(route.hedge_after.lstrip("p")), kind)
+        return route.hedge_after
+
+
+def hedged(executor: Executor, start: Callable, route: Route, delay: float,
+           discard: Optional[Callable] = None, on_hedge: Optional[Callable] = None):
+    """
+    Run `start(route.model)`. If it has not returned after `delay` seconds,
+    also run `start` on the backup model and return whichever succeeds
+    first; the other result, when it arrives, is passed to `discard`.
+
+    The primary gets a thread of its own, so hedged calls are never capped
+    by `executor` and `delay` counts from when the primary really started;
+    only backups run on `executor`.
+
+    Raises the last error if both attempts fail.
+    """
+    primary = spawn(start, route.model)
+    done, _ = wait([primary], timeout=delay)
+    if done:
+        return primary.result()
+
+    if on_hedge is not None:
+        on_hedge()
+    backup = submit(executor, start, route.hedge_model or route.model)
+    pending, error = {primary, backup}, None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        winners = [f for f in done if f.exception() is None]
+        if winners:
+            if discard is not None:
+                for f in winners[1:]:
+                    discard(f.result())
+                for f in pending:
+                    f.add_done_callback(lambda f: f.exception() is None and discard(f.result()))
+            return winners[0].result()
+        error = next(iter(done)).exception()
+    raise error
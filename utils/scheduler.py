@@ -0,0 +1,68 @@
+"""
+Dependency-aware scheduling of game turns.
+"""
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable, Iterable
+
+from config import LLM_CONCURRENCY
+from utils.parallel import submit
+
+
+class TurnScheduler:
+    """
+    Run turns on a thread pool while keeping each history consistent.
+
+    Every turn names the histories ("lanes") it reads or appends to. A turn
+    starts only after all earlier turns on the same lanes have finished, so
+    turns on disjoint histories run concurrently while each history still
+    sees its turns in submission order.
+
+    Args:
+        max_workers: Upper bound on turns running at once
+    """
+
+    def __init__(self, max_workers: int = LLM_CONCURRENCY):
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+        self._lanes = {}
+        self._pending = []
+        self._lock = threading.Lock()
+
+    def submit(self, lanes: Iterable[str], fn: Callable, *args) -> Future:
+        """
+        Schedule `fn(*args)` after every earlier turn on `lanes`.
+
+        Turns are dequeued in submission order and only wait on turns
+        submitted before them, so a full pool cannot deadlock.
+        """
+        lanes = list(lanes)
+        with self._lock:
+            deps = [self._lanes[lane] for lane in lanes if lane in self._lanes]
+            future = submit(self._executor, self._run, deps, fn, args)
+            for lane in lanes:
+                self._lanes[lane] = future
+            self._pending.append(future)
+        return future
+
+    @staticmethod
+    def _run(deps, fn, args):
+        # A failed dependency does not cancel this turn; the caller sees
+        # each failure on the turn that raised it.
+        wait(deps)
+        return fn(*args)
+
+    def wait(self):
+        """Block until every submitted turn has finished."""
+        with self._lock:
+            pending = list(self._pending)
+        wait(pending)
+
+    def shutdown(self):
+        """Wait for outstanding turns and release the worker threads."""
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
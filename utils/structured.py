@@ -0,0 +1,34 @@
+"""
+Parsing of structured (JSON) replies that cover several figures at once.
+"""
+import json
+import re
+from typing import Dict, Iterable
+
+
+def name_map_instruction(kind: str) -> str:
+    """The reply-format line for a batched request, e.g. kind='question'."""
+    return f"Reply with only a JSON object mapping each name to its {kind}."
+
+
+def parse_name_map(response: str, names: Iterable[str]) -> Dict[str, str]:
+    """
+    Pull {name: text} out of a batched reply. The first {...} block is
+    parsed, so surrounding prose or code fences are tolerated; names not
+    asked for and empty or non-string values are dropped, and names missing
+    from the result are left for the caller to fall back on.
+    """
+    match = re.search(r"\{.*\}", response, re.DOTALL)
+    if not match:
+        return {}
+    try:
+        parsed = json.loads(match.group(0))
+    except ValueError:
+        return {}
+    if not isinstance(parsed, dict):
+        return {}
+    names = set(names)
+    return {
+        name: text.strip() for name, text in parsed.items()
+        if name in names and isinstance(text, str) and text.strip()
+    }
@@ -0,0 +1,43 @@
+"""
+Wall-clock timing of game phases.
+"""
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+from utils.tracing import span
+
+_timings = contextvars.ContextVar("phase_timings", default=None)
+_current = contextvars.ContextVar("current_phase", default=None)
+
+@contextmanager
+def phase(name: str):
+    """
+    Time the enclosed block as phase `name` when timings are being recorded,
+    and trace it as a phase span when tracing is active.
+    """
+    start = time.perf_counter()
+    token = _current.set(name)
+    try:
+        with span(name, "phase"):
+            yield
+    finally:
+        _current.reset(token)
+        timings = _timings.get()
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+
+def current_phase():
+    """Name of the innermost phase being run, if any."""
+    return _current.get()
+
+@contextmanager
+def record_phases() -> Dict[str, float]:
+    """Collect the seconds spent in each phase run within the block."""
+    timings = {}
+    token = _timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _timings.reset(token)
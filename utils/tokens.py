@@ -0,0 +1,24 @@
+"""
+Local token-count estimates.
+
+Provider tokenizers are not available offline, so prompt sizes are
+estimated from the text: words are charged one token per four characters
+(at least one) and every punctuation mark or symbol one token. This tracks
+BPE counts for English prose closely enough for budgeting and reporting.
+"""
+import re
+
+_PIECES = re.compile(r"\w+|[^\w\s]")
+
+# Per-message overhead of the chat format (role markers and separators)
+MESSAGE_OVERHEAD = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens in `text`."""
+    return sum((len(piece) + 3) // 4 for piece in _PIECES.findall(text))
+
+
+def estimate_messages_tokens(messages: list) -> int:
+    """Estimate the prompt tokens of a chat-completions message list."""
+    return sum(estimate_tokens(m['content']) + MESSAGE_OVERHEAD for m in messages)
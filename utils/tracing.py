@@ -0,0 +1,149 @@
+"""
+Structured tracing of game phases, LLM calls and pauses.
+
+Spans are only recorded while a `Tracer` is active (see `tracing`), so
+untraced games pay nothing beyond a context-variable lookup. Traces export
+to the Chrome trace-event format, which chrome://tracing and Perfetto open.
+"""
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import numpy as np
+
+_tracer = contextvars.ContextVar("tracer", default=None)
+_phase = contextvars.ContextVar("trace_phase", default=None)
+
+
+class Span:
+    """One timed operation."""
+    __slots__ = ("name", "category", "start", "end", "thread", "attrs")
+
+    def __init__(self, name: str, category: str, attrs: Dict):
+        self.name = name
+        self.category = category
+        self.start = time.perf_counter()
+        self.end = None
+        self.thread = threading.get_ident()
+        self.attrs = attrs
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+
+class Tracer:
+    """Collects the spans of one game (or of a whole batch of games)."""
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, category: str, **attrs):
+        """
+        Record the enclosed block. Yields the span's attribute dictionary so
+        results (token counts, cache hits, ...) can be added before it ends.
+        """
+        attrs.setdefault("phase", _phase.get())
+        span = Span(name, category, attrs)
+        try:
+            yield span.attrs
+        except BaseException as e:
+            span.attrs["error"] = repr(e)
+            raise
+        finally:
+            span.end = time.perf_counter()
+            with self._lock:
+                self.spans.append(span)
+
+    def export_chrome_trace(self, path: str):
+        """Write the spans as a Chrome trace-event JSON file."""
+        pid = os.getpid()
+        with self._lock:
+            spans = list(self.spans)
+        events = [{
+            "name": s.name,
+            "cat": s.category,
+            "ph": "X",
+            "ts": (s.start - self.origin) * 1e6,
+            "dur": s.duration * 1e6,
+            "pid": pid,
+            "tid": s.thread,
+            "args": {k: v for k, v in s.attrs.items() if v is not None},
+        } for s in spans]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    def latency_table(self) -> str:
+        """Per-phase breakdown of wall time into LLM time and pauses."""
+        with self._lock:
+            spans = list(self.spans)
+        phases = [s for s in spans if s.category == "phase"]
+        calls = [s for s in spans if s.category == "llm"]
+        pauses = [s for s in spans if s.category == "pause"]
+
+        table = "Latency Breakdown\n"
+        table += "=================\n"
+        table += f"{'Phase':<18}{'Wall (s)':>10}{'LLM calls':>11}{'LLM busy (s)':>14}{'Pauses (s)':>12}\n"
+        for p in sorted(phases, key=lambda s: s.start):
+            in_phase = [c for c in calls if c.attrs.get("phase") == p.name]
+            paused = sum(s.duration for s in pauses if s.attrs.get("phase") == p.name)
+            table += (f"{p.name:<18}{p.duration:>10.2f}{len(in_phase):>11}"
+                      f"{sum(c.duration for c in in_phase):>14.2f}{paused:>12.2f}\n")
+
+        remote = [c.duration for c in calls if not c.attrs.get("cache_hit")]
+        hits = sum(1 for c in calls if c.attrs.get("cache_hit"))
+        table += f"\nLLM calls: {len(calls)} ({hits} cache hits"
+        retries = sum(c.attrs.get("retries", 0) for c in calls)
+        table += f", {retries} retries)\n"
+        prompt_tokens = sum(c.attrs.get("prompt_tokens") or 0 for c in calls)
+        cached_tokens = sum(c.attrs.get("cached_tokens") or 0 for c in calls)
+        table += f"Prompt tokens: {prompt_tokens} ({cached_tokens} from the provider's prompt cache)\n"
+        if remote:
+            latency = np.array(remote)
+            table += (f"Model latency: mean {latency.mean():.2f}s, p50 {np.percentile(latency, 50):.2f}s, "
+                      f"p95 {np.percentile(latency, 95):.2f}s, max {latency.max():.2f}s\n")
+        table += f"Total pause time: {sum(s.duration for s in pauses):.2f}s\n"
+        return table
+
+
+@contextmanager
+def tracing(tracer: Optional[Tracer] = None):
+    """Record spans into `tracer` (a new one by default) within the block."""
+    tracer = tracer if tracer is not None else Tracer()
+    token = _tracer.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _tracer.reset(token)
+
+
+def current_tracer() -> Optional[Tracer]:
+    """Return the active tracer, if any."""
+    return _tracer.get()
+
+
+@contextmanager
+def span(name: str, category: str, **attrs):
+    """Record a span when tracing is active; otherwise just run the block."""
+    tracer = _tracer.get()
+    if tracer is None:
+        yield attrs
+        return
+
+    if category == "phase":
+        token = _phase.set(name)
+        try:
+            with tracer.span(name, category, **attrs) as span_attrs:
+                yield span_attrs
+        finally:
+            _phase.reset(token)
+    else:
+        with tracer.span(name, category, **attrs) as span_attrs:
+            yield span_attrs
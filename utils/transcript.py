@@ -0,0 +1,300 @@
+"""
+Append-only transcript of every game event, for research archives.
+
+With TRANSCRIPT_DIR set, each game's introductions, questions, answers,
+votes and analyzer metrics are written there as compact JSON lines,
+optionally gzip- or zstd-compressed (TRANSCRIPT_COMPRESSION). Game threads
+only enqueue records; a background writer serializes them and flushes them
+in batches, so the game never waits on the disk. A new file is started
+before a record would take the current one past TRANSCRIPT_MAX_BYTES on
+disk:
+
+    transcripts/transcript-20250101-120000-4242-0000.jsonl.gz
+
+Every record carries the game id, a per-game sequence number, a Unix
+timestamp, the phase it happened in (see `utils.timing.phase`) and the
+event kind, followed by the event's own fields. `read_transcripts` streams
+the records back from any mix of plain and compressed files.
+"""
+import atexit
+import contextvars
+import glob
+import gzip
+import io
+import itertools
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from config import (
+    TRANSCRIPT_BATCH_SIZE,
+    TRANSCRIPT_COMPRESSION,
+    TRANSCRIPT_DIR,
+    TRANSCRIPT_FLUSH_INTERVAL,
+    TRANSCRIPT_MAX_BYTES,
+)
+from utils.timing import current_phase
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+SUFFIXES = {None: ".jsonl", "gzip": ".jsonl.gz", "zstd": ".jsonl.zst"}
+
+_STOP = object()
+
+
+class TranscriptLog:
+    """
+    Background JSONL writer with batched flushes and size-based rotation.
+
+    Args:
+        directory: Where transcript files are created
+        compression: None, "gzip" or "zstd" (needs the zstandard package)
+        max_bytes: Size on disk a file is kept under (a single larger record gets a file of its own)
+        flush_interval: Longest a record waits in memory before it is flushed (seconds)
+        batch_size: Records written between flushes at most
+    """
+
+    def __init__(self, directory: str, compression: Optional[str] = TRANSCRIPT_COMPRESSION,
+                 max_bytes: int = TRANSCRIPT_MAX_BYTES, flush_interval: float = TRANSCRIPT_FLUSH_INTERVAL,
+                 batch_size: int = TRANSCRIPT_BATCH_SIZE):
+        if compression not in SUFFIXES:
+            raise ValueError(f"Unknown transcript compression: {compression!r}")
+        if compression == "zstd" and zstandard is None:
+            raise RuntimeError("zstd transcripts need the 'zstandard' package (pip install zstandard)")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.compression = compression
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.paths: List[str] = []
+        self.records = 0
+        self._prefix = f"transcript-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+        self._raw = None
+        self._stream = None
+        self._file_records = 0
+        self._unflushed = 0
+        self._queue = queue.SimpleQueue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="transcript-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, record: Dict):
+        """Queue one record; returns immediately."""
+        self._queue.put(record)
+
+    def flush(self):
+        """Block until everything queued so far is on disk."""
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+
+    def close(self):
+        """Write out everything queued and close the current file."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _open(self):
+        path = os.path.join(self.directory, f"{self._prefix}-{len(self.paths):04d}{SUFFIXES[self.compression]}")
+        self._raw = open(path, "ab")
+        if self.compression == "gzip":
+            self._stream = gzip.GzipFile(fileobj=self._raw, mode="ab")
+        elif self.compression == "zstd":
+            self._stream = zstandard.ZstdCompressor().stream_writer(self._raw, closefd=False)
+        else:
+            self._stream = self._raw
+        self._file_records = 0
+        self._unflushed = 0
+        self.paths.append(path)
+
+    def _close_file(self):
+        if self._stream is not self._raw:
+            self._stream.close()
+        self._raw.close()
+        self._raw = self._stream = None
+
+    def _flush_file(self):
+        if self.compression == "zstd":
+            self._stream.flush(zstandard.FLUSH_BLOCK)
+        elif self.compression == "gzip":
+            self._stream.flush()
+        self._raw.flush()
+        self._unflushed = 0
+
+    def _size_with(self, size: int) -> int:
+        """
+        Size on disk of the current file once `size` more bytes are written,
+        at most. Data still in a compressor counts uncompressed, so near the
+        limit the compressor is flushed to see what it really takes.
+        """
+        if self._unflushed and self._raw.tell() + self._unflushed + size > self.max_bytes:
+            self._flush_file()
+        return self._raw.tell() + self._unflushed + size
+
+    def _write_record(self, data: bytes):
+        """Write one encoded record, starting a new file first if it would pass max_bytes."""
+        if self._raw is None:
+            self._open()
+        elif self._file_records and self._size_with(len(data)) > self.max_bytes:
+            self._close_file()
+            self._open()
+        self._stream.write(data)
+        self._file_records += 1
+        if self._stream is not self._raw:
+            self._unflushed += len(data)
+
+    def _next_batch(self) -> list:
+        """Wait for a record, then gather more until the batch is full or the flush interval is up."""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size and not isinstance(batch[-1], threading.Event) and batch[-1] is not _STOP:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            records = [item for item in batch if isinstance(item, dict)]
+            if records:
+                written = 0
+                try:
+                    for r in records:
+                        self._write_record(json.dumps(r, separators=(",", ":"), ensure_ascii=False,
+                                                      default=str).encode("utf-8") + b"\n")
+                        written += 1
+                    self._flush_file()
+                except OSError as e:
+                    print(f"Transcript write failed, {len(records) - written} records lost: {e}", file=sys.stderr)
+                self.records += written
+            for item in batch:
+                if isinstance(item, threading.Event):
+                    item.set()
+            if batch[-1] is _STOP:
+                if self._raw is not None:
+                    self._close_file()
+                return
+
+
+_log = None
+_log_lock = threading.Lock()
+_game = contextvars.ContextVar("transcript_game", default=None)
+
+
+def get_transcript_log() -> Optional[TranscriptLog]:
+    """The process-wide transcript log, created on first use if TRANSCRIPT_DIR is set."""
+    global _log
+    with _log_lock:
+        if _log is None and TRANSCRIPT_DIR:
+            _log = TranscriptLog(TRANSCRIPT_DIR)
+            atexit.register(_log.close)
+        return _log
+
+
+def set_transcript_log(log: Optional[TranscriptLog]):
+    """Replace the process-wide transcript log (None stops recording new games)."""
+    global _log
+    with _log_lock:
+        _log = log
+
+
+class _Game:
+    __slots__ = ("id", "log", "seq")
+
+    def __init__(self, log: TranscriptLog):
+        self.id = uuid.uuid4().hex
+        self.log = log
+        self.seq = itertools.count()
+
+
+@contextmanager
+def transcript_game(mode: str, human: str, ai_figures: List[str]):
+    """
+    Record the game played within the block, if transcripts are enabled.
+    Yields the game id (None when not recording).
+    """
+    log = get_transcript_log()
+    if log is None:
+        yield None
+        return
+
+    game = _Game(log)
+    token = _game.set(game)
+    try:
+        log_event("game_start", mode=mode, human=human, ai_figures=list(ai_figures))
+        yield game.id
+    except BaseException as e:
+        log_event("game_aborted", error=repr(e))
+        raise
+    else:
+        log_event("game_end")
+    finally:
+        _game.reset(token)
+
+
+def recording() -> bool:
+    """Whether events of the current game are being recorded."""
+    return _game.get() is not None
+
+
+def log_event(event: str, **fields):
+    """Record an event of the current game; does nothing outside `transcript_game`."""
+    game = _game.get()
+    if game is None:
+        return
+    game.log.write({
+        "game": game.id,
+        "seq": next(game.seq),
+        "t": round(time.time(), 3),
+        "phase": current_phase(),
+        "event": event,
+        **fields,
+    })
+
+
+def transcript_files(paths: Iterable[str]) -> List[str]:
+    """Expand directories among `paths` into the transcript files they hold, in write order."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "transcript-*.jsonl*"))))
+        else:
+            files.append(path)
+    return files
+
+
+def read_transcript(path: str) -> Iterator[Dict]:
+    """Stream the records of one transcript file (plain, .gz or .zst)."""
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError("reading zstd transcripts needs the 'zstandard' package (pip install zstandard)")
+        with open(path, "rb") as raw:
+            lines = io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(raw), encoding="utf-8")
+            yield from (json.loads(line) for line in lines if line.strip())
+        return
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as lines:
+        yield from (json.loads(line) for line in lines if line.strip())
+
+
+def read_transcripts(paths: Iterable[str]) -> Iterator[Dict]:
+    """Stream the records of every transcript file under `paths`."""
+    for path in transcript_files(paths):
+        yield from read_transcript(path)